@@ -0,0 +1,96 @@
+"""initial schema
+
+Baseline matching the tables previously created by Base.metadata.create_all.
+Existing databases created that way should be stamped with
+`alembic stamp 0001` before running `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:35:34.644812
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('role', sa.Enum('ADMIN', 'CLIENT', name='userrole'), nullable=False),
+    sa.Column('initial_deposit', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+
+    op.create_table('announcements',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('author_id', sa.String(), nullable=False),
+    sa.Column('timestamp', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_announcements_id', 'announcements', ['id'], unique=False)
+
+    op.create_table('trades',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('client_id', sa.String(), nullable=False),
+    sa.Column('coin_id', sa.String(), nullable=False),
+    sa.Column('coin_symbol', sa.String(), nullable=False),
+    sa.Column('entry_price', sa.Float(), nullable=False),
+    sa.Column('current_price', sa.Float(), nullable=True),
+    sa.Column('exit_price', sa.Float(), nullable=True),
+    sa.Column('quantity', sa.Float(), nullable=False),
+    sa.Column('take_profit', sa.Float(), nullable=True),
+    sa.Column('stop_loss', sa.Float(), nullable=True),
+    sa.Column('status', sa.Enum('OPEN', 'CLOSED', name='tradestatus'), nullable=False),
+    sa.Column('type', sa.Enum('LONG', 'SHORT', name='tradetype'), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('timestamp', sa.BigInteger(), nullable=False),
+    sa.Column('closed_at', sa.BigInteger(), nullable=True),
+    sa.ForeignKeyConstraint(['client_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_trades_id', 'trades', ['id'], unique=False)
+
+    op.create_table('replies',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('announcement_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('user_name', sa.String(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('timestamp', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['announcement_id'], ['announcements.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_replies_id', 'replies', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_replies_id', table_name='replies')
+    op.drop_table('replies')
+    op.drop_index('ix_trades_id', table_name='trades')
+    op.drop_table('trades')
+    op.drop_index('ix_announcements_id', table_name='announcements')
+    op.drop_table('announcements')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_table('users')
+    sa.Enum(name='tradetype').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='tradestatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='userrole').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,36 @@
+"""composite indexes for trade query shapes
+
+- (client_id, status, timestamp): trade list filtered by client and status
+- (client_id, timestamp): trade list filtered by client, portfolio summary
+- (status, timestamp): admin trade list filtered by status
+- (timestamp): unfiltered admin trade list ordered by time
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:41:12.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_trades_client_id_status_timestamp', 'trades', ['client_id', 'status', 'timestamp'], unique=False)
+    op.create_index('ix_trades_client_id_timestamp', 'trades', ['client_id', 'timestamp'], unique=False)
+    op.create_index('ix_trades_status_timestamp', 'trades', ['status', 'timestamp'], unique=False)
+    op.create_index('ix_trades_timestamp', 'trades', ['timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trades_timestamp', table_name='trades')
+    op.drop_index('ix_trades_status_timestamp', table_name='trades')
+    op.drop_index('ix_trades_client_id_timestamp', table_name='trades')
+    op.drop_index('ix_trades_client_id_status_timestamp', table_name='trades')
@@ -0,0 +1,43 @@
+"""extend trade indexes with id for keyset pagination
+
+Trade lists are ordered by (timestamp, id) so pages can resume after the last
+row seen. Appending id to each composite index lets the database seek to the
+cursor and read the page in index order without a sort.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 01:12:47.530921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_trades_client_id_status_timestamp_id', 'trades', ['client_id', 'status', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_trades_client_id_timestamp_id', 'trades', ['client_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_trades_status_timestamp_id', 'trades', ['status', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_trades_timestamp_id', 'trades', ['timestamp', 'id'], unique=False)
+    op.drop_index('ix_trades_timestamp', table_name='trades')
+    op.drop_index('ix_trades_status_timestamp', table_name='trades')
+    op.drop_index('ix_trades_client_id_timestamp', table_name='trades')
+    op.drop_index('ix_trades_client_id_status_timestamp', table_name='trades')
+
+
+def downgrade() -> None:
+    op.create_index('ix_trades_client_id_status_timestamp', 'trades', ['client_id', 'status', 'timestamp'], unique=False)
+    op.create_index('ix_trades_client_id_timestamp', 'trades', ['client_id', 'timestamp'], unique=False)
+    op.create_index('ix_trades_status_timestamp', 'trades', ['status', 'timestamp'], unique=False)
+    op.create_index('ix_trades_timestamp', 'trades', ['timestamp'], unique=False)
+    op.drop_index('ix_trades_timestamp_id', table_name='trades')
+    op.drop_index('ix_trades_status_timestamp_id', table_name='trades')
+    op.drop_index('ix_trades_client_id_timestamp_id', table_name='trades')
+    op.drop_index('ix_trades_client_id_status_timestamp_id', table_name='trades')
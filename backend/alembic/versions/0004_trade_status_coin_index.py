@@ -0,0 +1,28 @@
+"""index open trades by coin for mark-to-market
+
+Mark-to-market selects the distinct coins of open trades and updates open
+trades by coin_id; (status, coin_id) serves both.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 01:58:03.214776
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_trades_status_coin_id', 'trades', ['status', 'coin_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trades_status_coin_id', table_name='trades')
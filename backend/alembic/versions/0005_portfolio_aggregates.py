@@ -0,0 +1,70 @@
+"""portfolio aggregates table
+
+Per-client, per-coin running totals (realized PnL, win/closed counts, open
+notional and quantity) kept in step with trade writes, so the portfolio
+summary no longer scans a client's whole trade history. Backfilled from
+existing trades; `python portfolio_aggregates.py rebuild` recomputes it.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 03:12:47.508913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('portfolio_aggregates',
+    sa.Column('client_id', sa.String(), nullable=False),
+    sa.Column('coin_id', sa.String(), nullable=False),
+    sa.Column('realized_pnl', sa.Float(), nullable=False),
+    sa.Column('win_count', sa.Integer(), nullable=False),
+    sa.Column('closed_count', sa.Integer(), nullable=False),
+    sa.Column('open_count', sa.Integer(), nullable=False),
+    sa.Column('open_notional', sa.Float(), nullable=False),
+    sa.Column('open_quantity', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['client_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('client_id', 'coin_id')
+    )
+
+    op.execute("""
+        INSERT INTO portfolio_aggregates (
+            client_id, coin_id, realized_pnl, win_count, closed_count,
+            open_count, open_notional, open_quantity
+        )
+        SELECT
+            client_id,
+            coin_id,
+            COALESCE(SUM(CASE WHEN status = 'CLOSED' THEN realized ELSE 0.0 END), 0.0),
+            COALESCE(SUM(CASE WHEN status = 'CLOSED' AND realized > 0 THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN status = 'CLOSED' THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN status != 'CLOSED' THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN status != 'CLOSED' THEN entry_price * quantity ELSE 0.0 END), 0.0),
+            COALESCE(SUM(CASE WHEN status != 'CLOSED' THEN quantity ELSE 0.0 END), 0.0)
+        FROM (
+            SELECT
+                client_id,
+                coin_id,
+                status,
+                entry_price,
+                quantity,
+                CASE WHEN type = 'LONG' THEN exit_price - entry_price
+                     ELSE entry_price - exit_price END * quantity AS realized
+            FROM trades
+        ) AS trade_pnl
+        GROUP BY client_id, coin_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('portfolio_aggregates')
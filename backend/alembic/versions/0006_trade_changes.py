@@ -0,0 +1,54 @@
+"""trade updated_at and tombstones for delta sync
+
+GET /trades/changes returns the trades written or deleted since a watermark.
+Trades gain an updated_at column (backfilled from closed_at / timestamp)
+indexed with id for the watermark seek, and deleted trades leave a row in
+trade_tombstones.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 05:02:11.204375
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('trades', sa.Column('updated_at', sa.BigInteger(), nullable=True))
+    op.execute("UPDATE trades SET updated_at = COALESCE(closed_at, timestamp)")
+    with op.batch_alter_table('trades') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.BigInteger(), nullable=False)
+    op.create_index('ix_trades_updated_at_id', 'trades', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_trades_client_id_updated_at_id', 'trades', ['client_id', 'updated_at', 'id'], unique=False)
+
+    op.create_table('trade_tombstones',
+    sa.Column('trade_id', sa.String(), nullable=False),
+    sa.Column('client_id', sa.String(), nullable=False),
+    sa.Column('deleted_at', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('trade_id')
+    )
+    op.create_index('ix_trade_tombstones_deleted_at_trade_id', 'trade_tombstones', ['deleted_at', 'trade_id'], unique=False)
+    op.create_index(
+        'ix_trade_tombstones_client_id_deleted_at_trade_id', 'trade_tombstones',
+        ['client_id', 'deleted_at', 'trade_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trade_tombstones_client_id_deleted_at_trade_id', table_name='trade_tombstones')
+    op.drop_index('ix_trade_tombstones_deleted_at_trade_id', table_name='trade_tombstones')
+    op.drop_table('trade_tombstones')
+    op.drop_index('ix_trades_client_id_updated_at_id', table_name='trades')
+    op.drop_index('ix_trades_updated_at_id', table_name='trades')
+    with op.batch_alter_table('trades') as batch_op:
+        batch_op.drop_column('updated_at')
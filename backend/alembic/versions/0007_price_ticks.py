@@ -0,0 +1,34 @@
+"""price ticks table
+
+History of ingested coin prices, one row per coin per instant, written by
+POST /prices/ingest alongside the current_price update of open trades.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 09:41:26.318720
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('price_ticks',
+    sa.Column('coin_id', sa.String(), nullable=False),
+    sa.Column('timestamp', sa.BigInteger(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('coin_id', 'timestamp')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('price_ticks')
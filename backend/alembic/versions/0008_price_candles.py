@@ -0,0 +1,53 @@
+"""price candles and compact price ticks
+
+1m/1h/1d OHLC candles rolled up from price_ticks by the price rollup job.
+price_ticks gains a timestamp index for the rollup's scan and, on SQLite,
+is rebuilt WITHOUT ROWID so rows are stored once, in primary key order.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 11:07:53.942158
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    with op.batch_alter_table(
+        'price_ticks',
+        recreate='always' if sqlite else 'auto',
+        table_kwargs={'sqlite_with_rowid': False}
+    ) as batch_op:
+        batch_op.create_index('ix_price_ticks_timestamp', ['timestamp'], unique=False)
+
+    op.create_table('price_candles',
+    sa.Column('coin_id', sa.String(), nullable=False),
+    sa.Column('resolution', sa.Integer(), nullable=False),
+    sa.Column('bucket_start', sa.BigInteger(), nullable=False),
+    sa.Column('open', sa.Float(), nullable=False),
+    sa.Column('high', sa.Float(), nullable=False),
+    sa.Column('low', sa.Float(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('coin_id', 'resolution', 'bucket_start'),
+    sqlite_with_rowid=False
+    )
+    op.create_index(
+        'ix_price_candles_resolution_bucket_start', 'price_candles', ['resolution', 'bucket_start'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_price_candles_resolution_bucket_start', table_name='price_candles')
+    op.drop_table('price_candles')
+    op.drop_index('ix_price_ticks_timestamp', table_name='price_ticks')
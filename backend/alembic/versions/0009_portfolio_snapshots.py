@@ -0,0 +1,44 @@
+"""portfolio snapshots table
+
+One row per client per UTC day with the portfolio summary metrics as of
+that day's end, written by the nightly `python portfolio_snapshots.py`
+batch for statements and reports.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 14:26:09.771304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('portfolio_snapshots',
+    sa.Column('client_id', sa.String(), nullable=False),
+    sa.Column('day', sa.BigInteger(), nullable=False),
+    sa.Column('current_balance', sa.Float(), nullable=False),
+    sa.Column('total_invested', sa.Float(), nullable=False),
+    sa.Column('total_pnl', sa.Float(), nullable=False),
+    sa.Column('roi', sa.Float(), nullable=False),
+    sa.Column('win_rate', sa.Float(), nullable=False),
+    sa.Column('open_trades_count', sa.Integer(), nullable=False),
+    sa.Column('taken_at', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['client_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('client_id', 'day')
+    )
+    op.create_index('ix_portfolio_snapshots_day_client_id', 'portfolio_snapshots', ['day', 'client_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_portfolio_snapshots_day_client_id', table_name='portfolio_snapshots')
+    op.drop_table('portfolio_snapshots')
@@ -0,0 +1,37 @@
+"""trade levels_updated_at for the trigger index refresh
+
+Trades gain levels_updated_at, stamped when a trade is created or its
+coin, type, status or take-profit / stop-loss levels change, but not when
+it is repriced, so each process's trigger index only re-reads trades
+whose levels changed. Backfilled from updated_at.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 18:40:52.118032
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('trades', sa.Column('levels_updated_at', sa.BigInteger(), nullable=True))
+    op.execute("UPDATE trades SET levels_updated_at = updated_at")
+    with op.batch_alter_table('trades') as batch_op:
+        batch_op.alter_column('levels_updated_at', existing_type=sa.BigInteger(), nullable=False)
+    op.create_index('ix_trades_levels_updated_at', 'trades', ['levels_updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trades_levels_updated_at', table_name='trades')
+    with op.batch_alter_table('trades') as batch_op:
+        batch_op.drop_column('levels_updated_at')
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 import secrets
 import time
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.etag import compute_etag, etag_matches, is_conditional, not_modified, set_etag
 from app.models.models import Announcement, Reply, User
 from app.schemas.schemas import (
     AnnouncementCreate, AnnouncementResponse,
@@ -19,7 +21,7 @@ router = APIRouter(prefix="/announcements", tags=["Announcements"])
 async def create_announcement(
     announcement_data: AnnouncementCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new announcement"""
     announcement = Announcement(
@@ -31,19 +33,33 @@ async def create_announcement(
     )
     
     db.add(announcement)
-    db.commit()
-    db.refresh(announcement)
+    await db.commit()
+    await db.refresh(announcement)
     
     return announcement
 
 
 @router.get("/", response_model=List[AnnouncementResponse])
 async def get_announcements(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get all announcements"""
-    announcements = db.query(Announcement).order_by(Announcement.timestamp.desc()).all()
+    """Get all announcements (ETag / If-None-Match aware)"""
+    # Announcements are never edited: count and newest timestamp identify the list
+    if is_conditional(request):
+        version = (await db.execute(select(func.count(), func.max(Announcement.timestamp)))).one()
+        etag = compute_etag("announcements", *version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
+    announcements = (await db.scalars(
+        select(Announcement).order_by(Announcement.timestamp.desc())
+    )).all()
+    set_etag(response, compute_etag(
+        "announcements", len(announcements), max((a.timestamp for a in announcements), default=None)
+    ))
     return announcements
 
 
@@ -51,10 +67,10 @@ async def get_announcements(
 async def get_announcement(
     announcement_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get announcement by ID"""
-    announcement = db.query(Announcement).filter(Announcement.id == announcement_id).first()
+    announcement = await db.scalar(select(Announcement).where(Announcement.id == announcement_id))
     
     if not announcement:
         raise HTTPException(
@@ -69,10 +85,10 @@ async def get_announcement(
 async def delete_announcement(
     announcement_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete announcement (only by author)"""
-    announcement = db.query(Announcement).filter(Announcement.id == announcement_id).first()
+    announcement = await db.scalar(select(Announcement).where(Announcement.id == announcement_id))
     
     if not announcement:
         raise HTTPException(
@@ -87,8 +103,8 @@ async def delete_announcement(
             detail="Not enough permissions"
         )
     
-    db.delete(announcement)
-    db.commit()
+    await db.delete(announcement)
+    await db.commit()
     
     return None
 
@@ -100,11 +116,11 @@ async def create_reply(
     announcement_id: str,
     reply_data: ReplyCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a reply to an announcement"""
     # Verify announcement exists
-    announcement = db.query(Announcement).filter(Announcement.id == announcement_id).first()
+    announcement = await db.scalar(select(Announcement).where(Announcement.id == announcement_id))
     if not announcement:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -121,8 +137,8 @@ async def create_reply(
     )
     
     db.add(reply)
-    db.commit()
-    db.refresh(reply)
+    await db.commit()
+    await db.refresh(reply)
     
     return reply
 
@@ -130,13 +146,29 @@ async def create_reply(
 @router.get("/{announcement_id}/replies", response_model=List[ReplyResponse])
 async def get_replies(
     announcement_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get all replies for an announcement"""
-    replies = db.query(Reply).filter(
-        Reply.announcement_id == announcement_id
-    ).order_by(Reply.timestamp.asc()).all()
+    """Get all replies for an announcement (ETag / If-None-Match aware)"""
+    # Replies are never edited: count and newest timestamp identify the list
+    if is_conditional(request):
+        version = (await db.execute(
+            select(func.count(), func.max(Reply.timestamp)).where(Reply.announcement_id == announcement_id)
+        )).one()
+        etag = compute_etag("replies", announcement_id, *version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
+    replies = (await db.scalars(
+        select(Reply).where(
+            Reply.announcement_id == announcement_id
+        ).order_by(Reply.timestamp.asc())
+    )).all()
+    set_etag(response, compute_etag(
+        "replies", announcement_id, len(replies), max((reply.timestamp for reply in replies), default=None)
+    ))
     
     return replies
 
@@ -145,10 +177,10 @@ async def get_replies(
 async def delete_reply(
     reply_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete reply (only by author)"""
-    reply = db.query(Reply).filter(Reply.id == reply_id).first()
+    reply = await db.scalar(select(Reply).where(Reply.id == reply_id))
     
     if not reply:
         raise HTTPException(
@@ -163,7 +195,7 @@ async def delete_reply(
             detail="Not enough permissions"
         )
     
-    db.delete(reply)
-    db.commit()
+    await db.delete(reply)
+    await db.commit()
     
     return None
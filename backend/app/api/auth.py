@@ -1,23 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 import secrets
 import time
 
-from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.database import get_db, get_read_db
+from app.core.security import verify_and_update_password_async, get_password_hash_async, create_access_token
 from app.models.models import User, UserRole
 from app.schemas.schemas import UserCreate, UserResponse, UserLogin, Token, UserUpdate
 from app.api.dependencies import get_current_user, get_current_admin
+from app.services.user_cache import user_cache
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user (client)"""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -29,31 +31,40 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         id=secrets.token_urlsafe(16),
         email=user_data.email,
         name=user_data.name,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         role=user_data.role,
         initial_deposit=user_data.initial_deposit
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     return user
 
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
     """Login and get access token"""
     # Find user by email
-    user = db.query(User).filter(User.email == user_data.email).first()
+    user = await db.scalar(select(User).where(User.email == user_data.email))
     
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await verify_and_update_password_async(user_data.password, user.hashed_password)
+    
+    if not user or not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Transparently upgrade hashes created with a different bcrypt cost
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     # Create access token
     access_token = create_access_token(data={"sub": user.id, "role": user.role.value})
     
@@ -73,10 +84,10 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 @router.get("/users", response_model=List[UserResponse])
 async def get_all_users(
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all users (admin only)"""
-    users = db.query(User).all()
+    users = (await db.scalars(select(User))).all()
     return users
 
 
@@ -84,7 +95,7 @@ async def get_all_users(
 async def get_user_by_id(
     user_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get user by ID"""
     # Admin can view any user, clients can only view themselves
@@ -94,7 +105,7 @@ async def get_user_by_id(
             detail="Not enough permissions"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -109,10 +120,10 @@ async def update_user(
     user_id: str,
     user_data: UserUpdate,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -127,8 +138,9 @@ async def update_user(
     if user_data.initial_deposit is not None:
         user.initial_deposit = user_data.initial_deposit
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    await user_cache.invalidate(user_id)
     
     return user
 
@@ -137,17 +149,18 @@ async def update_user(
 async def delete_user(
     user_id: str,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete user (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    await user_cache.invalidate(user_id)
     
     return None
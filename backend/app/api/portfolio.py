@@ -1,22 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 
-from app.core.database import get_db
-from app.models.models import Trade, User, UserRole, TradeStatus, TradeType
-from app.schemas.schemas import PortfolioSummary
-from app.api.dependencies import get_current_user
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.core.etag import compute_etag, etag_matches, not_modified, set_etag
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.responses import ORJSONResponse, column_rows
+from app.models.models import PortfolioSnapshot, Trade, User, UserRole, current_millis
+from app.schemas.schemas import ClientOverviewPage, EquityCurve, PortfolioSnapshotResponse, PortfolioSummary
+from app.api.dependencies import get_current_user, get_current_admin
+from app.services.equity import equity_curve
+from app.services.portfolio import build_portfolio_summary, get_portfolio_aggregates, portfolio_overview_query
 
 router = APIRouter(prefix="/portfolio", tags=["Portfolio"])
 
+OVERVIEW_SORT_FIELDS = Literal[
+    "name", "current_balance", "total_invested", "total_pnl", "roi", "win_rate", "open_trades_count"
+]
+
+
+@router.get("/overview", response_model=ClientOverviewPage)
+async def get_portfolio_overview(
+    sort: OVERVIEW_SORT_FIELDS = "current_balance",
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(50, ge=1, le=settings.PORTFOLIO_OVERVIEW_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get every client's balance, PnL, ROI, win rate and open trade count
+    (admin only), sorted by `sort` (ties broken by id) and keyset-paginated
+    with `next_cursor`.
+    
+    All clients are summarized by one grouped query, the same metrics as
+    /portfolio/{user_id}/summary.
+    """
+    overview = portfolio_overview_query()
+    columns = list(overview.c)
+    key = (overview.c[sort], overview.c.id)
+    query = select(*columns)
+    
+    # Seek past the last row of the previous page
+    if cursor is not None:
+        last_value, last_id = decode_cursor(cursor, 2)
+        value_types = (str,) if sort == "name" else (int, float)
+        if not isinstance(last_value, value_types) or isinstance(last_value, bool) or not isinstance(last_id, str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        after = tuple_(*key) > tuple_(last_value, last_id) if order == "asc" else tuple_(*key) < tuple_(last_value, last_id)
+        query = query.where(after)
+    
+    ordering = [column.asc() if order == "asc" else column.desc() for column in key]
+    rows = (await db.execute(query.order_by(*ordering).limit(limit + 1))).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], sort), rows[-1].id)
+    
+    # Same shape as ClientOverviewPage
+    return ORJSONResponse({
+        "items": column_rows(columns, rows),
+        "next_cursor": next_cursor
+    })
+
 
 @router.get("/{user_id}/summary", response_model=PortfolioSummary)
 async def get_portfolio_summary(
     user_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get portfolio summary for a user"""
+    """Get portfolio summary for a user (ETag / If-None-Match aware)"""
     # Check permissions
     if current_user.role == UserRole.CLIENT and current_user.id != user_id:
         raise HTTPException(
@@ -24,56 +86,115 @@ async def get_portfolio_summary(
             detail="Not enough permissions"
         )
     
-    # Get user
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    # Get user, along with the count and last write time of their trades
+    trade_count = select(func.count()).where(Trade.client_id == user_id).scalar_subquery()
+    last_trade_write = select(func.max(Trade.updated_at)).where(Trade.client_id == user_id).scalar_subquery()
+    row = (await db.execute(
+        select(User, trade_count, last_trade_write).where(User.id == user_id)
+    )).first()
+    if not row:
         raise HTTPException(
             status_code=404,
             detail="User not found"
         )
+    user, *trades_version = row
+    
+    # Every input of the summary (trades, their marks, the deposit) is covered
+    # by the tag; a portfolio_aggregates rebuild is not
+    etag = compute_etag("portfolio_summary", user_id, user.initial_deposit, *trades_version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     
-    # Get all user trades
-    trades = db.query(Trade).filter(Trade.client_id == user_id).all()
+    # Maintained closed-trade totals plus the PnL of open positions
+    aggregates = await get_portfolio_aggregates(db, user_id)
     
-    initial = user.initial_deposit
-    realized_pnl = 0.0
-    unrealized_pnl = 0.0
-    total_invested = 0.0
-    win_count = 0
-    closed_count = 0
+    return build_portfolio_summary(user.initial_deposit, aggregates)
+
+
+@router.get("/{user_id}/equity", response_model=EquityCurve)
+async def get_portfolio_equity(
+    user_id: str,
+    start: int = Query(..., alias="from"),
+    end: Optional[int] = Query(None, alias="to"),
+    step: int = Query(3_600_000, ge=1000),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get a user's balance every `step` ms between `from` and `to` (epoch ms,
+    default now), reconstructed from their trades' open/close times and the
+    price history.
+    
+    Open trades are marked with the latest price observed at each point,
+    from candles at the coarsest resolution no wider than `step` (raw ticks
+    below one minute), so the newest points trail live prices by up to one
+    candle plus PRICE_ROLLUP_INTERVAL_SECONDS.
+    """
+    # Check permissions
+    if current_user.role == UserRole.CLIENT and current_user.id != user_id:
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions"
+        )
     
-    for trade in trades:
-        # For closed trades, use exit price; for open trades, use current price or entry price
-        current_price = trade.exit_price if trade.status == TradeStatus.CLOSED else (trade.current_price or trade.entry_price)
-        
-        # Calculate PnL based on trade type
-        if trade.type == TradeType.LONG:
-            diff = current_price - trade.entry_price
-        else:  # SHORT
-            diff = trade.entry_price - current_price
-        
-        pnl = diff * trade.quantity
-        
-        if trade.status == TradeStatus.CLOSED:
-            realized_pnl += pnl
-            closed_count += 1
-            if pnl > 0:
-                win_count += 1
-        else:
-            unrealized_pnl += pnl
-            total_invested += trade.entry_price * trade.quantity
+    end = current_millis() if end is None else end
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must not be before 'from'"
+        )
+    if (end - start) // step + 1 > settings.PORTFOLIO_EQUITY_MAX_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Equity curves are limited to {settings.PORTFOLIO_EQUITY_MAX_POINTS} points; increase 'step'"
+        )
+    
+    user = (await db.execute(select(User.initial_deposit).where(User.id == user_id))).first()
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="User not found"
+        )
+    
+    resolution, timestamps, balances = await equity_curve(db, user_id, user.initial_deposit, start, end, step)
+    # Built straight from the arrays; validating thousands of points is
+    # slower than computing them
+    return ORJSONResponse({
+        "user_id": user_id,
+        "step": step,
+        "resolution": resolution,
+        "points": [
+            {"timestamp": timestamp, "balance": balance}
+            for timestamp, balance in zip(timestamps.tolist(), balances.tolist())
+        ]
+    })
+
+
+@router.get("/{user_id}/snapshots", response_model=List[PortfolioSnapshotResponse])
+async def get_portfolio_snapshots(
+    user_id: str,
+    start: Optional[int] = Query(None, alias="from"),
+    end: Optional[int] = Query(None, alias="to"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get a user's daily portfolio snapshots for days starting between `from`
+    and `to` (epoch ms, inclusive), oldest first, as written by the nightly
+    `python portfolio_snapshots.py` batch.
+    """
+    # Check permissions
+    if current_user.role == UserRole.CLIENT and current_user.id != user_id:
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions"
+        )
     
-    total_pnl = realized_pnl + unrealized_pnl
-    current_balance = initial + total_pnl
-    roi = (total_pnl / initial * 100) if initial > 0 else 0
-    win_rate = (win_count / closed_count * 100) if closed_count > 0 else 0
-    open_trades_count = len([t for t in trades if t.status == TradeStatus.OPEN])
+    query = select(PortfolioSnapshot).where(PortfolioSnapshot.client_id == user_id)
+    if start is not None:
+        query = query.where(PortfolioSnapshot.day >= start)
+    if end is not None:
+        query = query.where(PortfolioSnapshot.day <= end)
     
-    return PortfolioSummary(
-        current_balance=current_balance,
-        total_invested=total_invested,
-        total_pnl=total_pnl,
-        roi=roi,
-        win_rate=win_rate,
-        open_trades_count=open_trades_count
-    )
+    return (await db.scalars(query.order_by(PortfolioSnapshot.day))).all()
@@ -0,0 +1,116 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Optional
+import re
+
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.models.models import User, current_millis
+from app.schemas.schemas import PriceHistory, PriceIngest, PriceIngestResult, PricePoint
+from app.services.mark_to_market import apply_prices
+from app.services.price_history import price_history, record_ticks
+from app.services.prices import PriceService, PriceFeedError, get_price_service
+from app.services.triggers import trigger_engine
+from app.api.dependencies import get_current_user, get_current_admin
+
+router = APIRouter(prefix="/prices", tags=["Prices"])
+
+# CoinGecko ids are lowercase slugs such as "bitcoin" or "usd-coin"
+COIN_ID_PATTERN = re.compile(r"[a-z0-9][a-z0-9._-]{0,99}")
+
+
+@router.get("/", response_model=Dict[str, float])
+async def get_prices(
+    ids: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    prices: PriceService = Depends(get_price_service)
+):
+    """Get cached USD prices for comma-separated coin ids (default: all traded coins)"""
+    coin_ids = [coin_id.strip() for coin_id in ids.split(",") if coin_id.strip()] if ids else None
+    if coin_ids is not None:
+        if len(coin_ids) > settings.PRICES_MAX_QUERY_IDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Price queries are limited to {settings.PRICES_MAX_QUERY_IDS} coin ids"
+            )
+        invalid = [coin_id for coin_id in coin_ids if not COIN_ID_PATTERN.fullmatch(coin_id)]
+        if invalid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid coin ids: {', '.join(invalid[:10])}"
+            )
+    
+    try:
+        return await prices.get_prices(db, coin_ids)
+    except PriceFeedError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Price feed unavailable"
+        )
+
+
+@router.post("/ingest", response_model=PriceIngestResult)
+async def ingest_prices(
+    ticks: PriceIngest,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Apply a batch of `{coin_id: price}` ticks (admin or price feed only).
+    
+    Every open trade of each coin is repriced with set-based UPDATEs, the
+    ticks are appended to the price history and trades whose take-profit or
+    stop-loss they cross are closed, all in one transaction.
+    """
+    if len(ticks.prices) > settings.PRICES_MAX_INGEST_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Price ingests are limited to {settings.PRICES_MAX_INGEST_SIZE} coins"
+        )
+    
+    try:
+        trades_updated = await apply_prices(db, ticks.prices)
+        ticks_recorded = await record_ticks(db, ticks.prices, ticks.timestamp or current_millis())
+        await trigger_engine.refresh(db)
+        fired = await trigger_engine.process_ticks(db, ticks.prices)
+        await db.commit()
+    except Exception:
+        # Fired triggers were rolled back; rebuild the index on the next use
+        trigger_engine.clear()
+        raise
+    
+    return PriceIngestResult(
+        coins=len(ticks.prices),
+        trades_updated=trades_updated,
+        ticks_recorded=ticks_recorded,
+        triggers_fired=len(fired)
+    )
+
+
+@router.get("/{coin_id}/history", response_model=PriceHistory)
+async def get_price_history(
+    coin_id: str,
+    start: int = Query(..., alias="from"),
+    end: Optional[int] = Query(None, alias="to"),
+    max_points: int = Query(500, ge=1, le=settings.PRICE_HISTORY_MAX_POINTS),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get a coin's price history between `from` and `to` (epoch ms, default now).
+    
+    Raw ticks are returned when there are at most `max_points` of them,
+    otherwise OHLC candles at the finest resolution (1m, 1h, 1d) that fits.
+    Candles trail the ticks by up to PRICE_ROLLUP_INTERVAL_SECONDS.
+    """
+    end = current_millis() if end is None else end
+    resolution, points = await price_history(db, coin_id, start, end, max_points)
+    return PriceHistory(
+        coin_id=coin_id,
+        resolution=resolution,
+        points=[
+            PricePoint(timestamp=timestamp, open=open_, high=high, low=low, close=close)
+            for timestamp, open_, high, low, close in points
+        ]
+    )
@@ -1,26 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, func, insert, select, tuple_, update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Literal, Optional, Union
 import secrets
 import time
 
-from app.core.database import get_db
-from app.models.models import Trade, User, UserRole, TradeStatus
-from app.schemas.schemas import TradeCreate, TradeResponse, TradeUpdate
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.core.etag import compute_etag, etag_matches, is_conditional, not_modified, set_etag
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.responses import ORJSONResponse, column_rows, csv_lines, ndjson_lines, schema_columns
+from app.models.models import Trade, TradeTombstone, User, UserRole, TradeStatus, current_millis
+from app.schemas.schemas import (
+    TradeCreate, TradeResponse, TradeUpdate, TradePage, TradeChanges,
+    TradeBulkCreate, TradeBulkClose, TradeBulkItemResult, TradeBulkResponse
+)
 from app.api.dependencies import get_current_user, get_current_admin
+from app.services.portfolio_aggregates import AggregateChanges
+from app.services.price_history import record_ticks
+from app.services.triggers import trigger_engine
 
 router = APIRouter(prefix="/trades", tags=["Trades"])
 
+# Trade lists are built from these columns and rendered with orjson,
+# skipping ORM objects and response_model validation
+TRADE_RESPONSE_COLUMNS = schema_columns(Trade, TradeResponse)
+
+EXPORT_FORMATS = {
+    "csv": (csv_lines, "text/csv"),
+    "ndjson": (ndjson_lines, "application/x-ndjson"),
+}
+
+
+def trade_filters(
+    current_user: User,
+    client_id: Optional[str],
+    status_filter: Optional[TradeStatus]
+) -> tuple:
+    """The effective client filter and WHERE conditions for a trade listing"""
+    conditions = []
+    
+    # If client, only show their trades
+    if current_user.role == UserRole.CLIENT:
+        client_id = current_user.id
+    if client_id:
+        # Admin can filter by client
+        conditions.append(Trade.client_id == client_id)
+    
+    # Apply status filter
+    if status_filter:
+        conditions.append(Trade.status == status_filter)
+    
+    return client_id, conditions
+
 
 @router.post("/", response_model=TradeResponse, status_code=status.HTTP_201_CREATED)
 async def create_trade(
     trade_data: TradeCreate,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new trade (admin only)"""
     # Verify client exists
-    client = db.query(User).filter(User.id == trade_data.client_id).first()
+    client = await db.scalar(select(User).where(User.id == trade_data.client_id))
     if not client:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -44,45 +88,388 @@ async def create_trade(
     )
     
     db.add(trade)
-    db.commit()
-    db.refresh(trade)
+    await db.commit()
+    await db.refresh(trade)
+    trigger_engine.upsert(trade)
     
     return trade
 
 
-@router.get("/", response_model=List[TradeResponse])
+@router.get("/", response_model=Union[TradePage, List[TradeResponse]])
 async def get_trades(
+    request: Request,
     client_id: Optional[str] = None,
     status_filter: Optional[TradeStatus] = None,
+    limit: Optional[int] = Query(None, ge=1, le=settings.TRADES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get trades with optional filters"""
-    query = db.query(Trade)
+    """
+    Get trades with optional filters.
+    
+    Passing `limit` and/or `cursor` returns a keyset-paginated page with a
+    `next_cursor`; without them the full list is returned for older clients.
+    Responses carry an ETag; a matching If-None-Match gets a 304 after a
+    lightweight version query instead of the full one. Rows are serialized
+    from column tuples with orjson rather than through TradeResponse.
+    """
+    client_id, conditions = trade_filters(current_user, client_id, status_filter)
+    order = (Trade.timestamp.desc(), Trade.id.desc())
+    etag_scope = ("trades", client_id, status_filter, limit, cursor)
+    
+    # Compatibility mode: unpaginated list, versioned by row count and last write
+    if limit is None and cursor is None:
+        if is_conditional(request):
+            version = (await db.execute(
+                select(func.count(), func.max(Trade.updated_at)).where(*conditions)
+            )).one()
+            etag = compute_etag(*etag_scope, *version)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+        
+        trades = (await db.execute(
+            select(*TRADE_RESPONSE_COLUMNS).where(*conditions).order_by(*order)
+        )).all()
+        response = ORJSONResponse(column_rows(TRADE_RESPONSE_COLUMNS, trades))
+        set_etag(response, compute_etag(
+            *etag_scope, len(trades), max((trade.updated_at for trade in trades), default=None)
+        ))
+        return response
+    
+    # Seek past the last row of the previous page
+    if cursor is not None:
+        last_timestamp, last_id = decode_cursor(cursor, 2)
+        if not isinstance(last_timestamp, int) or not isinstance(last_id, str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        conditions.append(tuple_(Trade.timestamp, Trade.id) < tuple_(last_timestamp, last_id))
+    
+    # A page is versioned by the keys of the rows it covers (plus one for next_cursor)
+    page_size = limit or settings.TRADES_MAX_PAGE_SIZE
+    if is_conditional(request):
+        keys = (await db.execute(
+            select(Trade.id, Trade.updated_at).where(*conditions).order_by(*order).limit(page_size + 1)
+        )).all()
+        etag = compute_etag(*etag_scope, [tuple(key) for key in keys])
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
+    trades = (await db.execute(
+        select(*TRADE_RESPONSE_COLUMNS).where(*conditions).order_by(*order).limit(page_size + 1)
+    )).all()
+    etag = compute_etag(*etag_scope, [(trade.id, trade.updated_at) for trade in trades])
+    
+    next_cursor = None
+    if len(trades) > page_size:
+        trades = trades[:page_size]
+        next_cursor = encode_cursor(trades[-1].timestamp, trades[-1].id)
+    
+    # Same shape as TradePage
+    response = ORJSONResponse({
+        "items": column_rows(TRADE_RESPONSE_COLUMNS, trades),
+        "next_cursor": next_cursor
+    })
+    set_etag(response, etag)
+    return response
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_trades(
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    client_id: Optional[str] = None,
+    status_filter: Optional[TradeStatus] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Export trades as CSV or NDJSON, with the same filters as the trade list.
+    
+    Rows are read through a server-side cursor and written out one batch at
+    a time, so memory use does not grow with the size of the export.
+    """
+    _, conditions = trade_filters(current_user, client_id, status_filter)
+    query = (
+        select(*TRADE_RESPONSE_COLUMNS)
+        .where(*conditions)
+        .order_by(Trade.timestamp.desc(), Trade.id.desc())
+        .execution_options(yield_per=settings.TRADES_EXPORT_BATCH_SIZE)
+    )
+    
+    async def partitions():
+        # The dependency closes its session before a streamed body is sent;
+        # the export reopens it for the cursor and closes it once done
+        try:
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                yield rows
+        finally:
+            await db.close()
+    
+    encode, media_type = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        encode(TRADE_RESPONSE_COLUMNS, partitions()),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="trades.{export_format}"'}
+    )
+
+
+@router.get("/changes", response_model=TradeChanges)
+async def get_trade_changes(
+    since: Optional[str] = None,
+    client_id: Optional[str] = None,
+    limit: int = Query(settings.TRADES_MAX_PAGE_SIZE, ge=1, le=settings.TRADES_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get trades inserted, updated or deleted since a watermark.
+    
+    Omit `since` for a full sync, then pass back the returned `watermark`;
+    poll again straight away while `has_more` is set. Recent changes may be
+    delivered more than once, so clients should apply them idempotently.
+    
+    Served from the primary: the watermark follows this server's clock, so a
+    replica lagging past TRADE_CHANGES_SETTLE_MS would let it skip changes.
+    """
+    trades_query = select(Trade)
+    tombstones_query = select(TradeTombstone)
     
     # If client, only show their trades
     if current_user.role == UserRole.CLIENT:
-        query = query.filter(Trade.client_id == current_user.id)
-    elif client_id:
-        # Admin can filter by client
-        query = query.filter(Trade.client_id == client_id)
+        client_id = current_user.id
+    if client_id:
+        trades_query = trades_query.where(Trade.client_id == client_id)
+        tombstones_query = tombstones_query.where(TradeTombstone.client_id == client_id)
     
-    # Apply status filter
-    if status_filter:
-        query = query.filter(Trade.status == status_filter)
+    # Seek past the watermark on (updated_at, id) / (deleted_at, trade_id)
+    since_key = (0, "")
+    if since is not None:
+        since_key = tuple(decode_cursor(since, 2))
+        if not isinstance(since_key[0], int) or not isinstance(since_key[1], str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        trades_query = trades_query.where(tuple_(Trade.updated_at, Trade.id) > tuple_(*since_key))
+    
+    trades = (await db.scalars(
+        trades_query.order_by(Trade.updated_at, Trade.id).limit(limit + 1)
+    )).all()
+    changes = [((trade.updated_at, trade.id), trade) for trade in trades]
+    
+    # A full sync has nothing to delete yet
+    if since is not None:
+        tombstones = (await db.scalars(
+            tombstones_query
+            .where(tuple_(TradeTombstone.deleted_at, TradeTombstone.trade_id) > tuple_(*since_key))
+            .order_by(TradeTombstone.deleted_at, TradeTombstone.trade_id)
+            .limit(limit + 1)
+        )).all()
+        changes += [((tombstone.deleted_at, tombstone.trade_id), tombstone) for tombstone in tombstones]
+    
+    changes.sort(key=lambda change: change[0])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    
+    if has_more:
+        watermark = changes[-1][0]
+    else:
+        # Everything up to now has been returned, but rows stamped in the
+        # last few seconds may still be joined by slower commits
+        watermark = max(since_key, (current_millis() - settings.TRADE_CHANGES_SETTLE_MS, ""))
+    
+    return TradeChanges(
+        trades=[TradeResponse.model_validate(change) for _, change in changes if isinstance(change, Trade)],
+        deleted=[change.trade_id for _, change in changes if isinstance(change, TradeTombstone)],
+        watermark=encode_cursor(*watermark),
+        has_more=has_more
+    )
+
+
+def check_bulk_size(count: int):
+    """Reject bulk requests above the configured item limit"""
+    if count > settings.TRADES_MAX_BULK_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bulk requests are limited to {settings.TRADES_MAX_BULK_SIZE} trades"
+        )
+
+
+def bulk_rejection(errors: Dict[int, str]) -> HTTPException:
+    """Error for an atomic bulk request with failing items"""
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=[{"index": index, "error": error} for index, error in sorted(errors.items())]
+    )
+
+
+def bulk_response(count: int, trades: Dict[int, Trade], errors: Dict[int, str]) -> TradeBulkResponse:
+    """Per-item results of a bulk request, in request order"""
+    results = [
+        TradeBulkItemResult(index=index, ok=False, error=errors[index]) if index in errors
+        else TradeBulkItemResult(index=index, ok=True, trade=TradeResponse.model_validate(trades[index]))
+        for index in range(count)
+    ]
+    return TradeBulkResponse(succeeded=len(trades), failed=len(errors), results=results)
+
+
+@router.post("/bulk", response_model=TradeBulkResponse)
+async def create_trades_bulk(
+    payload: TradeBulkCreate,
+    atomic: bool = False,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create many trades in one transaction (admin only).
+    
+    Items for unknown clients are reported as errors and the rest are created;
+    with `atomic=true` any failing item rejects the whole batch (422).
+    """
+    check_bulk_size(len(payload.trades))
+    
+    # Verify all clients exist in one query
+    client_ids = {item.client_id for item in payload.trades}
+    known_clients = set((await db.scalars(select(User.id).where(User.id.in_(client_ids)))).all())
+    errors = {
+        index: "Client not found"
+        for index, item in enumerate(payload.trades)
+        if item.client_id not in known_clients
+    }
+    if errors and atomic:
+        raise bulk_rejection(errors)
+    
+    timestamp = int(time.time() * 1000)
+    rows = {
+        index: {
+            **item.model_dump(),
+            "id": secrets.token_urlsafe(16),
+            "status": TradeStatus.OPEN,
+            "timestamp": timestamp,
+            "updated_at": timestamp,
+            "levels_updated_at": timestamp
+        }
+        for index, item in enumerate(payload.trades)
+        if index not in errors
+    }
+    trades = {index: Trade(**row) for index, row in rows.items()}
     
-    trades = query.order_by(Trade.timestamp.desc()).all()
-    return trades
+    if rows:
+        # A single executemany INSERT; bulk statements bypass the ORM events,
+        # so the portfolio aggregates are adjusted explicitly
+        await db.execute(insert(Trade), list(rows.values()))
+        changes = AggregateChanges()
+        for trade in trades.values():
+            changes.add(trade)
+        await changes.apply(db)
+        await db.commit()
+    
+    for trade in trades.values():
+        trigger_engine.upsert(trade)
+    
+    return bulk_response(len(payload.trades), trades, errors)
+
+
+@router.post("/bulk-close", response_model=TradeBulkResponse)
+async def close_trades_bulk(
+    payload: TradeBulkClose,
+    atomic: bool = False,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Close many trades in one transaction (admin only).
+    
+    Unknown, duplicated or already closed trades are reported as errors and
+    the rest are closed; with `atomic=true` any failing item rejects the
+    whole batch (422).
+    """
+    check_bulk_size(len(payload.trades))
+    
+    # Load (and on PostgreSQL lock) every referenced trade in one query
+    trade_ids = {item.trade_id for item in payload.trades}
+    found = {
+        trade.id: trade
+        for trade in (await db.scalars(select(Trade).where(Trade.id.in_(trade_ids)).with_for_update())).all()
+    }
+    
+    errors = {}
+    closing = {}
+    seen = set()
+    for index, item in enumerate(payload.trades):
+        trade = found.get(item.trade_id)
+        if trade is None:
+            errors[index] = "Trade not found"
+        elif item.trade_id in seen:
+            errors[index] = "Duplicate trade in request"
+        elif trade.status == TradeStatus.CLOSED:
+            errors[index] = "Trade is already closed"
+        else:
+            closing[index] = (trade, item.exit_price)
+        seen.add(item.trade_id)
+    if errors and atomic:
+        raise bulk_rejection(errors)
+    
+    closed_at = int(time.time() * 1000)
+    trades = {}
+    if closing:
+        # A single UPDATE; the status guard keeps a close that committed since
+        # the trades were loaded from being applied twice, and RETURNING
+        # reports which rows this request actually closed
+        trades_table = Trade.__table__
+        exit_prices = {trade.id: exit_price for trade, exit_price in closing.values()}
+        closed_ids = set((await db.scalars(
+            update(trades_table)
+            .where(trades_table.c.id.in_(exit_prices), trades_table.c.status == TradeStatus.OPEN)
+            .values(
+                status=TradeStatus.CLOSED,
+                exit_price=case(exit_prices, value=trades_table.c.id),
+                closed_at=closed_at,
+                updated_at=closed_at,
+                levels_updated_at=closed_at
+            )
+            .returning(trades_table.c.id)
+        )).all())
+        
+        changes = AggregateChanges()
+        for index, (trade, exit_price) in closing.items():
+            if trade.id not in closed_ids:
+                errors[index] = "Trade is already closed"
+                continue
+            # Mirror the update on the loaded trade without marking it dirty;
+            # bulk statements bypass the ORM events, so the portfolio
+            # aggregates are adjusted explicitly
+            changes.remove(trade)
+            set_committed_value(trade, "status", TradeStatus.CLOSED)
+            set_committed_value(trade, "exit_price", exit_price)
+            set_committed_value(trade, "closed_at", closed_at)
+            set_committed_value(trade, "updated_at", closed_at)
+            set_committed_value(trade, "levels_updated_at", closed_at)
+            changes.add(trade)
+            trades[index] = trade
+        if errors and atomic:
+            await db.rollback()
+            raise bulk_rejection(errors)
+        await changes.apply(db)
+        await db.commit()
+    
+    for trade in trades.values():
+        trigger_engine.discard(trade.id)
+    
+    return bulk_response(len(payload.trades), trades, errors)
 
 
 @router.get("/{trade_id}", response_model=TradeResponse)
 async def get_trade(
     trade_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get trade by ID"""
-    trade = db.query(Trade).filter(Trade.id == trade_id).first()
+    trade = await db.scalar(select(Trade).where(Trade.id == trade_id))
     
     if not trade:
         raise HTTPException(
@@ -105,10 +492,12 @@ async def update_trade(
     trade_id: str,
     trade_data: TradeUpdate,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update trade (admin only)"""
-    trade = db.query(Trade).filter(Trade.id == trade_id).first()
+    # Locked (on PostgreSQL) so the aggregate change is computed from the
+    # row this update replaces, not one a concurrent write already changed
+    trade = await db.scalar(select(Trade).where(Trade.id == trade_id).with_for_update())
     
     if not trade:
         raise HTTPException(
@@ -132,8 +521,13 @@ async def update_trade(
     if trade_data.closed_at is not None:
         trade.closed_at = trade_data.closed_at
     
-    db.commit()
-    db.refresh(trade)
+    # A manual reprice is a price observation too
+    if trade_data.current_price is not None:
+        await record_ticks(db, {trade.coin_id: trade_data.current_price}, current_millis())
+    
+    await db.commit()
+    await db.refresh(trade)
+    trigger_engine.upsert(trade)
     
     return trade
 
@@ -143,10 +537,11 @@ async def close_trade(
     trade_id: str,
     exit_price: float,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Close a trade (admin only)"""
-    trade = db.query(Trade).filter(Trade.id == trade_id).first()
+    # Locked (on PostgreSQL) so a concurrent close waits and then sees CLOSED
+    trade = await db.scalar(select(Trade).where(Trade.id == trade_id).with_for_update())
     
     if not trade:
         raise HTTPException(
@@ -165,8 +560,9 @@ async def close_trade(
     trade.exit_price = exit_price
     trade.closed_at = int(time.time() * 1000)
     
-    db.commit()
-    db.refresh(trade)
+    await db.commit()
+    await db.refresh(trade)
+    trigger_engine.discard(trade.id)
     
     return trade
 
@@ -175,10 +571,10 @@ async def close_trade(
 async def delete_trade(
     trade_id: str,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete trade (admin only)"""
-    trade = db.query(Trade).filter(Trade.id == trade_id).first()
+    trade = await db.scalar(select(Trade).where(Trade.id == trade_id).with_for_update())
     
     if not trade:
         raise HTTPException(
@@ -186,7 +582,8 @@ async def delete_trade(
             detail="Trade not found"
         )
     
-    db.delete(trade)
-    db.commit()
+    await db.delete(trade)
+    await db.commit()
+    trigger_engine.discard(trade_id)
     
     return None
@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class CacheBackend(ABC):
+    """Interface for key/value caches holding JSON-serializable values"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache(CacheBackend):
+    """
+    Shared cache for multi-worker deployments.
+
+    Requires the optional `redis` package (redis>=4.2 for redis.asyncio).
+    """
+
+    def __init__(self, url: str, prefix: str = "cc:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RedisCache requires the 'redis' package: pip install redis") from e
+
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self._client.set(self.prefix + key, json.dumps(value), px=max(int(ttl * 1000), 1))
+
+    async def delete(self, key: str):
+        await self._client.delete(self.prefix + key)
+
+    async def clear(self):
+        async for key in self._client.scan_iter(match=self.prefix + "*"):
+            await self._client.delete(key)
+
+
+def create_cache_backend(url: str, max_size: int) -> CacheBackend:
+    """Build a cache backend from a URL: empty for in-process, redis:// for shared"""
+    if not url:
+        return MemoryCache(max_size=max_size)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(url)
+    raise ValueError(f"Unsupported cache URL: {url}")
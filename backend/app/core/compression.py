@@ -0,0 +1,187 @@
+import zlib
+from typing import Callable, Dict, Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Optional codecs: offered only when installed (pip install brotli zstandard)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class GzipCompressor:
+    """Streaming gzip (zlib with a gzip header)"""
+
+    def __init__(self, level: int):
+        self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync-flush so every streamed chunk is decodable as soon as it arrives
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._zlib.compress(data) + self._zlib.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level: int):
+        self._brotli = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._brotli.process(data) + self._brotli.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._brotli.process(data) + self._brotli.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        self._zstd = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._zstd.compress(data) + self._zstd.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._zstd.compress(data) + self._zstd.flush()
+
+
+def available_compressors(levels: Dict[str, int]) -> Dict[str, Callable]:
+    """Compressor factories for the encodings usable in this process"""
+    compressors = {"gzip": lambda: GzipCompressor(levels["gzip"])}
+    if brotli is not None:
+        compressors["br"] = lambda: BrotliCompressor(levels["br"])
+    if zstandard is not None:
+        compressors["zstd"] = lambda: ZstdCompressor(levels["zstd"])
+    return compressors
+
+
+def negotiate_encoding(accept_encoding: str, preference: Iterable[str]) -> Optional[str]:
+    """
+    Pick the content coding for an Accept-Encoding header: the highest
+    q-value wins, ties go to the earlier encoding in `preference`.
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            weights[name.strip()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in preference:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best encoding the client accepts (br, zstd
+    or gzip, as installed and listed in `encodings`).
+
+    Complete bodies under `minimum_size` are sent as-is. Streaming responses
+    are compressed chunk by chunk as they are produced, never buffered.
+    Responses that are already encoded, empty or not text-like are skipped.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encodings: Iterable[str] = ("br", "zstd", "gzip"),
+        levels: Optional[Dict[str, int]] = None
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressors = available_compressors({"gzip": 6, "br": 4, "zstd": 3, **(levels or {})})
+        self.encodings = [encoding for encoding in encodings if encoding in self.compressors]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Hold the headers until the first body chunk shows the size
+                start_message = message
+                headers = Headers(raw=message["headers"])
+                passthrough = (
+                    message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = self.compressors[encoding]()
+                headers = MutableHeaders(scope=start_message)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                # Different bytes: a strong validator no longer applies
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                if more_body:
+                    del headers["Content-Length"]
+                    message["body"] = compressor.compress(body)
+                else:
+                    message["body"] = compressor.finish(body)
+                    headers["Content-Length"] = str(len(message["body"]))
+                await send(start_message)
+                await send(message)
+                return
+
+            message["body"] = compressor.compress(body) if more_body else compressor.finish(body)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -1,22 +1,232 @@
-from sqlalchemy import create_engine
+import time
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram, computed_gauge
+from app.core.replicas import ReplicaSet, RoutingSession, db_read_routes, wrote_recently
+from app.core import query_stats  # noqa: F401  (registers query instrumentation on all engines)
+
+# asyncio drivers used by the API for each supported backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(database_url: str) -> str:
+    """Swap the driver of a database URL for its asyncio counterpart"""
+    url = make_url(database_url)
+    if url.get_dialect().is_async:
+        return url.render_as_string(hide_password=False)
+
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+# ===== CONNECTION POOL =====
+
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the database pool",
+    ("pool",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+db_pool_checkout_timeouts = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Connection checkouts that gave up after the pool timeout",
+    ("pool",)
+)
+db_pool_checked_out = Gauge(
+    "db_pool_connections_checked_out",
+    "Connections currently checked out of the pool",
+    ("pool",),
+    multiprocess_mode="livesum"
+)
+db_pool_capacity = Gauge(
+    "db_pool_max_connections",
+    "Maximum connections the pool will open (pool size + max overflow)",
+    ("pool",),
+    multiprocess_mode="livesum"
+)
+db_pool_utilization = Gauge(
+    "db_pool_utilization_ratio",
+    "Checked-out connections as a fraction of pool capacity",
+    ("pool",),
+    multiprocess_mode="livemax"
+)
+
+
+class CheckoutTimingMixin:
+    """Pool mixin observing how long each connection checkout takes"""
+    metric_name = "default"
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            db_pool_checkout_timeouts.labels(pool=self.metric_name).inc()
+            raise
+        finally:
+            db_pool_checkout_wait.labels(pool=self.metric_name).observe(time.perf_counter() - start)
+
+
+def is_memory_database(url: URL) -> bool:
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+
+def default_pool_class(url: URL):
+    """Pool class for a URL, pooling file-based aiosqlite connections too"""
+    if url.get_backend_name() == "sqlite" and url.get_dialect().is_async and not is_memory_database(url):
+        return AsyncAdaptedQueuePool
+    return url.get_dialect().get_pool_class(url)
+
+
+def instrumented_pool_class(database_url: str, name: str):
+    """Subclass of the default pool class for a URL that records checkout wait"""
+    pool_class = default_pool_class(make_url(database_url))
+    return type(
+        f"Instrumented{pool_class.__name__}",
+        (CheckoutTimingMixin, pool_class),
+        {"metric_name": name}
+    )
+
 
-# Create database engine
-engine = create_engine(settings.DATABASE_URL)
+def engine_options(database_url: str, name: str) -> dict:
+    """Keyword arguments for create_engine / create_async_engine from pool settings"""
+    url = make_url(database_url)
+    pool_class = instrumented_pool_class(database_url, name)
+    options = {
+        "poolclass": pool_class,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+    if issubclass(pool_class, QueuePool):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS
+        )
+
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        # Pooled connections move between threads (and the aiosqlite worker thread)
+        options["connect_args"] = {"check_same_thread": False}
+    elif backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+
+    return options
+
+
+def configure_engine(engine: Engine, name: str):
+    """Apply per-connection SQLite pragmas and publish pool utilization metrics"""
+    if engine.dialect.name == "sqlite":
+        memory = is_memory_database(engine.url)
+
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            if not memory:
+                # WAL lets readers proceed alongside the single writer; NORMAL
+                # only fsyncs at checkpoints, which is safe in WAL mode
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.DB_POOL_TIMEOUT_SECONDS * 1000)}")
+            cursor.close()
+
+    def checked_out() -> int:
+        # Read through the engine: dispose() swaps in a new pool
+        return engine.pool.checkedout() if isinstance(engine.pool, QueuePool) else 0
+
+    def capacity() -> int:
+        if not isinstance(engine.pool, QueuePool):
+            return 0
+        return engine.pool.size() + max(engine.pool._max_overflow, 0)
+
+    computed_gauge(db_pool_checked_out.labels(pool=name), checked_out)
+    computed_gauge(db_pool_capacity.labels(pool=name), capacity)
+    computed_gauge(db_pool_utilization.labels(pool=name), lambda: checked_out() / capacity() if capacity() else 0.0)
+
+
+# Create synchronous database engine (scripts, migrations, table creation)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, "sync"))
+configure_engine(engine, "sync")
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create asyncio engine used by the API request handlers
+async_engine = create_async_engine(
+    to_async_url(settings.DATABASE_URL),
+    **engine_options(to_async_url(settings.DATABASE_URL), "async")
+)
+configure_engine(async_engine.sync_engine, "async")
+
+# Create async session factory
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Read replicas (optional); reads fall back to the primary when none are healthy
+replica_set = ReplicaSet(
+    [
+        create_async_engine(to_async_url(url), **engine_options(to_async_url(url), f"replica{index}"))
+        for index, url in enumerate(settings.replica_urls)
+    ],
+    check_interval=settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS
+)
+for index, replica_engine in enumerate(replica_set.engines):
+    configure_engine(replica_engine.sync_engine, f"replica{index}")
+
+# Create session factory for read-only request handlers
+ReadSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    replicas=replica_set,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency to get async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def read_session_factory(request: Request, primary=AsyncSessionLocal, replicas=ReadSessionLocal):
+    """
+    Session factory for a read-only request: replica-routed, unless the client
+    wrote within REPLICA_READ_YOUR_WRITES_SECONDS and must see its own writes
+    """
+    if not wrote_recently(request.cookies, request.headers, settings.REPLICA_READ_YOUR_WRITES_SECONDS * 1000):
+        return replicas
+    if replica_set:
+        db_read_routes.labels(target="primary").inc()
+    return primary
+
+
+async def get_read_db(request: Request):
+    """Dependency to get async session that reads from a replica when configured"""
+    async with read_session_factory(request)() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,50 @@
+import hashlib
+import json
+from typing import Any
+
+from fastapi import Request, Response, status
+
+# Responses depend on the caller's credentials: let only the client cache
+# them, and make it revalidate every time
+CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(*parts: Any) -> str:
+    """
+    Weak ETag over the values a response is derived from.
+
+    Weak because two responses with the same tag are equivalent, not
+    byte-identical (e.g. once compressed).
+    """
+    raw = json.dumps(parts, separators=(",", ":"), default=str).encode()
+    return f'W/"{hashlib.sha1(raw).hexdigest()}"'
+
+
+def is_conditional(request: Request) -> bool:
+    """Whether the client sent a cached ETag worth checking before the full query"""
+    return "if-none-match" in request.headers
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of `etag` against the request's If-None-Match"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response confirming the client's cached copy"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
+
+
+def set_etag(response: Response, etag: str):
+    """Attach the ETag to a full response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,109 @@
+import glob
+import logging
+import os
+import re
+import threading
+from typing import Callable, List, Tuple
+
+from app.core.config import settings
+
+# prometheus_client picks its value store when it is first imported: export
+# the directory from settings (.env) before that happens
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    disable_created_metrics,
+    generate_latest as _generate_latest,
+    multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+# *_created series double the exposition size and no dashboard uses them
+disable_created_metrics()
+
+_GAUGE_FILE = re.compile(r"gauge_live\w+?_(\d+)\.db$")
+
+_computed: List[Tuple[object, Callable[[], float]]] = []
+_computed_lock = threading.Lock()
+
+
+def multiproc_dir() -> str:
+    """Shared metrics directory, or "" when this process reports on its own"""
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR", "")
+
+
+def computed_gauge(gauge, function: Callable[[], float]):
+    """
+    Report `function()` as the value of `gauge` (a Gauge or one labelled child).
+
+    In a single process the value is computed on every scrape. Multiprocess
+    gauges are read from the shared files, so there the value is stored by
+    refresh_computed_gauges(), which the runtime metrics worker calls on every
+    tick and /metrics calls before rendering.
+    """
+    if multiproc_dir():
+        with _computed_lock:
+            _computed.append((gauge, function))
+        gauge.set(function())
+    else:
+        gauge.set_function(function)
+
+
+def refresh_computed_gauges():
+    """Store the current value of every computed gauge (multiprocess mode)"""
+    with _computed_lock:
+        computed = list(_computed)
+    for gauge, function in computed:
+        try:
+            gauge.set(function())
+        except Exception:
+            logger.exception("Could not compute gauge value")
+
+
+def generate_latest() -> bytes:
+    """Render all metrics, aggregated across workers in multiprocess mode"""
+    if not multiproc_dir():
+        return _generate_latest(REGISTRY)
+    refresh_computed_gauges()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return _generate_latest(registry)
+
+
+def mark_process_dead(pid: int = 0):
+    """Drop the live gauges of `pid` (default: this process); counters are kept"""
+    if multiproc_dir():
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def mark_dead_processes():
+    """Drop live gauges left behind by workers that were killed without shutting down"""
+    directory = multiproc_dir()
+    if not directory:
+        return
+    pids = set()
+    for path in glob.glob(os.path.join(directory, "gauge_live*.db")):
+        match = _GAUGE_FILE.search(os.path.basename(path))
+        if match:
+            pids.add(int(match.group(1)))
+    for pid in pids:
+        if not _pid_alive(pid):
+            multiprocess.mark_process_dead(pid, directory)
@@ -0,0 +1,130 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.query_stats import track_queries
+from app.core.replicas import LAST_WRITE_COOKIE, LAST_WRITE_HEADER
+
+http_requests = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code",
+    ("method", "route", "status")
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template",
+    ("method", "route")
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    ("method", "route"),
+    multiprocess_mode="livesum"
+)
+
+
+class QueryStatsMiddleware:
+    """
+    Count the SQL queries and database time of each request and report them,
+    with the total handler time, in a Server-Timing response header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        with track_queries(scope["path"]) as stats:
+            async def send_with_timing(message: Message):
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", stats.server_timing())
+                    headers.append("Server-Timing", f"app;dur={(time.perf_counter() - start) * 1000:.2f}")
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the route that will handle the request (e.g. /trades/{trade_id}),
+    so metrics are labelled per route rather than per URL
+    """
+    partial = None
+    for route in getattr(scope.get("app"), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    """Record request counts, latency and in-flight requests per route"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status = "500"
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        in_flight = http_requests_in_flight.labels(method=method, route=route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_request_duration.labels(method=method, route=route).observe(time.perf_counter() - start)
+            http_requests.labels(method=method, route=route, status=status).inc()
+            in_flight.dec()
+
+
+class LastWriteMiddleware:
+    """
+    Stamp successful writes (any non-GET/HEAD/OPTIONS request answered below
+    400) with the write time, as a cookie and a header, so the client's next
+    reads within the replica lag window are served by the primary.
+    """
+
+    def __init__(self, app: ASGIApp, window_seconds: float):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_last_write(message: Message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                written_at = str(int(time.time() * 1000))
+                headers = MutableHeaders(scope=message)
+                headers.append(LAST_WRITE_HEADER, written_at)
+                headers.append(
+                    "Set-Cookie",
+                    f"{LAST_WRITE_COOKIE}={written_at}; Max-Age={max(int(self.window_seconds), 1)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_last_write)
@@ -0,0 +1,83 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.sql")
+
+
+@dataclass
+class QueryStats:
+    """SQL queries issued while handling one request"""
+    path: str = ""
+    count: int = 0
+    total_time: float = 0.0
+    # Queries (included in count) that raised
+    failed: int = 0
+
+    def server_timing(self) -> str:
+        """Server-Timing header value for the database share of the request"""
+        failed = f", {self.failed} failed" if self.failed else ""
+        return f'db;dur={self.total_time * 1000:.2f};desc="{self.count} queries{failed}"'
+
+
+# Stats of the request being handled by the current task, if any
+request_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+@contextmanager
+def track_queries(path: str = ""):
+    """Collect query stats for everything executed inside the block"""
+    stats = QueryStats(path=path)
+    token = request_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        request_query_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution rather than pushed onto the connection: a
+    # statement that raises never reaches after_cursor_execute
+    context.query_start_time = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(context, statement, failed=False)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    # Errors raised before the cursor ran (e.g. while connecting) or after
+    # it completed (while fetching results) are not query time
+    if getattr(context, "query_start_time", None) is not None:
+        _record_query(context, exception_context.statement or "", failed=True)
+
+
+def _record_query(context, statement: str, failed: bool):
+    elapsed = time.perf_counter() - context.query_start_time
+    context.query_start_time = None
+
+    stats = request_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_time += elapsed
+        stats.failed += failed
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            "Slow query (%.1f ms) during %s: %s",
+            elapsed * 1000,
+            stats.path if stats is not None else "background task",
+            " ".join(statement.split())[:1000]
+        )
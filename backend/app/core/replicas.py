@@ -0,0 +1,136 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import List, Mapping, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from app.core.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+db_replica_healthy = Gauge(
+    "db_replica_healthy",
+    "Whether a read replica passed its last health check (1) or not (0)",
+    ("replica",),
+    multiprocess_mode="livemin"
+)
+db_read_routes = Counter(
+    "db_read_sessions_total",
+    "Read-only sessions by the database they were routed to",
+    ("target",)
+)
+
+
+# Time of a client's last write (epoch ms), set on responses to writes and
+# sent back as a cookie, or echoed in the header by clients that do not keep
+# cookies (e.g. cross-site)
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "x-last-write"
+
+
+def wrote_recently(cookies: Mapping[str, str], headers: Mapping[str, str], window_ms: float) -> bool:
+    """Whether the client's last write is within `window_ms`, so replicas may not have it yet"""
+    for value in (cookies.get(LAST_WRITE_COOKIE), headers.get(LAST_WRITE_HEADER)):
+        try:
+            if value is not None and time.time() * 1000 - int(value) < window_ms:
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+class ReplicaSet:
+    """Read replicas chosen round-robin, skipping those failing health checks"""
+
+    def __init__(self, engines: List[AsyncEngine], check_interval: float = 5.0, check_timeout: float = 2.0):
+        self.engines = engines
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._healthy = [True] * len(engines)
+        self._cycle = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        for index in range(len(engines)):
+            db_replica_healthy.labels(replica=str(index)).set(1)
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """Next healthy replica, or None when every replica is down"""
+        for _ in range(len(self.engines)):
+            index = next(self._cycle) % len(self.engines)
+            if self._healthy[index]:
+                return self.engines[index]
+        return None
+
+    def mark(self, index: int, healthy: bool):
+        if healthy != self._healthy[index]:
+            logger.warning("Read replica %d is %s", index, "back up" if healthy else "down, routing reads elsewhere")
+        self._healthy[index] = healthy
+        db_replica_healthy.labels(replica=str(index)).set(1 if healthy else 0)
+
+    async def _check_one(self, engine: AsyncEngine):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check(self):
+        """Probe every replica with SELECT 1 and update its health"""
+        results = await asyncio.gather(
+            *(asyncio.wait_for(self._check_one(engine), self.check_timeout) for engine in self.engines),
+            return_exceptions=True
+        )
+        for index, result in enumerate(results):
+            self.mark(index, not isinstance(result, BaseException))
+
+    async def _loop(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    def start(self):
+        if self.engines and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for engine in self.engines:
+            await engine.dispose()
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from a replica, for read-only request handlers.
+
+    One replica is picked per session so a request sees a consistent snapshot.
+    Handlers that write use the primary session (get_db), and reads from a
+    client that wrote within the replica lag window are routed there too.
+    """
+
+    def __init__(self, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.replicas = replicas
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not self.replicas:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+
+        if self._replica is None:
+            replica = self.replicas.choose()
+            if replica is None:
+                db_read_routes.labels(target="primary").inc()
+                self._replica = super().get_bind(mapper, clause=clause, **kwargs)
+            else:
+                db_read_routes.labels(target="replica").inc()
+                self._replica = replica.sync_engine
+        return self._replica
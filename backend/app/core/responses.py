@@ -0,0 +1,81 @@
+import csv
+import enum
+import io
+from typing import Any, AsyncIterator, Iterable, List, Sequence, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _orjson_exact(content: Any) -> bool:
+    """
+    Whether orjson renders `content` byte-for-byte like the stdlib encoder.
+
+    They only disagree on floats: orjson writes values below 1e-4 or from
+    1e16 up without the padded exponent (1e-5 vs 1e-05) and NaN/inf as null.
+    """
+    stack = [content] if isinstance(content, (dict, list)) else [[content]]
+    while stack:
+        item = stack.pop()
+        for value in item.values() if isinstance(item, dict) else item:
+            cls = type(value)
+            if cls is float:
+                if not (value == 0 or 1e-4 <= abs(value) < 1e16):
+                    return False
+            elif cls is dict or cls is list:
+                stack.append(value)
+    return True
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, falling back to the stdlib encoder
+    for the rare payloads it would format differently, so the bytes always
+    match a regular JSONResponse.
+
+    Content is not validated: routes opting in build it themselves, usually
+    with `column_rows`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if _orjson_exact(content):
+            return orjson.dumps(content)
+        return super().render(content)
+
+
+def schema_columns(model, schema: Type[BaseModel]) -> list:
+    """Columns of a mapped model named after the schema's fields, in field order"""
+    table = model.__table__
+    return [table.c[name] for name in schema.model_fields]
+
+
+def column_rows(columns: list, rows: Iterable) -> List[dict]:
+    """Response rows straight from SQL column tuples, keyed like the schema"""
+    keys = [column.key for column in columns]
+    return [dict(zip(keys, row)) for row in rows]
+
+
+async def csv_lines(columns: list, partitions: AsyncIterator[Sequence]) -> AsyncIterator[bytes]:
+    """CSV with a header row, one chunk per batch of SQL rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in columns])
+    async for rows in partitions:
+        writer.writerows(
+            [value.value if isinstance(value, enum.Enum) else value for value in row]
+            for row in rows
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only when there were no rows
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def ndjson_lines(columns: list, partitions: AsyncIterator[Sequence]) -> AsyncIterator[bytes]:
+    """Newline-delimited JSON objects keyed like the schema, one chunk per batch of SQL rows"""
+    keys = [column.key for column in columns]
+    async for rows in partitions:
+        yield b"".join(orjson.dumps(dict(zip(keys, row))) + b"\n" for row in rows)
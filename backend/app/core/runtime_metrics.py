@@ -0,0 +1,55 @@
+import asyncio
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import Gauge, Histogram, mark_dead_processes, mark_process_dead, refresh_computed_gauges
+
+event_loop_lag = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when the event loop should have woken a task and when it did",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+event_loop_last_lag = Gauge(
+    "event_loop_last_lag_seconds",
+    "Most recently measured event loop lag",
+    multiprocess_mode="livemax"
+)
+
+
+class RuntimeMetricsWorker:
+    """
+    Background task sampling event-loop lag and, in multiprocess mode,
+    storing this worker's computed gauges for the other workers' scrapes
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _loop(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - start - self.interval, 0.0)
+            event_loop_lag.observe(lag)
+            event_loop_last_lag.set(lag)
+            refresh_computed_gauges()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            mark_dead_processes()
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        mark_process_dead()
+
+
+runtime_metrics_worker = RuntimeMetricsWorker(interval=settings.EVENT_LOOP_LAG_INTERVAL_SECONDS)
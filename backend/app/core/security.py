@@ -1,11 +1,32 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import Gauge, computed_gauge
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# Bounded worker pool for bcrypt so hashing never runs on the event loop thread
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+_hash_queue_depth = 0
+_hash_queue_lock = threading.Lock()
+
+password_hash_queue_depth = Gauge(
+    "password_hash_queue_depth",
+    "Password hashing jobs waiting for a free worker",
+    multiprocess_mode="livesum"
+)
+computed_gauge(password_hash_queue_depth, lambda: _hash_queue_depth)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -18,6 +39,52 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _get_hash_executor() -> ThreadPoolExecutor:
+    """Create the password hashing pool on first use"""
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash"
+            )
+        return _hash_executor
+
+
+async def _run_in_hash_pool(func, *args):
+    """Run a bcrypt call in the worker pool, tracking how many calls are queued"""
+    global _hash_queue_depth
+
+    def job():
+        global _hash_queue_depth
+        with _hash_queue_lock:
+            _hash_queue_depth -= 1
+        return func(*args)
+
+    with _hash_queue_lock:
+        _hash_queue_depth += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), job)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the hashing worker pool"""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str,
+    hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a new hash if the stored one uses outdated settings"""
+    return await _run_in_hash_pool(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the hashing worker pool"""
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
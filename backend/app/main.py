@@ -1,20 +1,35 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api import auth, trades, announcements, portfolio
+from app.core.database import async_engine, replica_set
+from app.core.metrics import CONTENT_TYPE_LATEST, generate_latest
+from app.core.middleware import LastWriteMiddleware, MetricsMiddleware, QueryStatsMiddleware
+from app.core.runtime_metrics import runtime_metrics_worker
+from app.api import auth, trades, announcements, portfolio, prices
+
+# The schema is owned by the Alembic migrations: run `alembic upgrade head`
+# (or init_db.py) before starting the app
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background workers with the application"""
+    runtime_metrics_worker.start()
+    replica_set.start()
+    yield
+    await runtime_metrics_worker.stop()
+    await replica_set.stop()
+    await async_engine.dispose()
 
-# Create database tables (skip if connection fails, e.g., during testing)
-try:
-    Base.metadata.create_all(bind=engine)
-except Exception as e:
-    print(f"Warning: Could not create database tables: {e}")
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Crypto Cartel Transparency Platform API",
     description="Backend API for institutional crypto portfolio management and transparency",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -28,11 +43,33 @@ app.add_middleware(
     max_age=3600,
 )
 
+# Compress responses the client accepts compressed (inside the timing middleware)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    encodings=settings.compression_encodings,
+    levels={
+        "gzip": settings.COMPRESSION_GZIP_LEVEL,
+        "br": settings.COMPRESSION_BROTLI_QUALITY,
+        "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+    }
+)
+
+# Send reads that follow a client's own write to the primary, not a lagging replica
+app.add_middleware(LastWriteMiddleware, window_seconds=settings.REPLICA_READ_YOUR_WRITES_SECONDS)
+
+# Report per-request SQL query count and time in Server-Timing headers
+app.add_middleware(QueryStatsMiddleware)
+
+# Record per-route request counts and latency for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(trades.router)
 app.include_router(announcements.router)
 app.include_router(portfolio.router)
+app.include_router(prices.router)
 
 
 @app.get("/")
@@ -51,6 +88,15 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint (aggregated across workers in multiprocess mode)"""
+    return Response(
+        content=generate_latest(),
+        media_type=CONTENT_TYPE_LATEST
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,9 +1,15 @@
-from sqlalchemy import Column, String, Integer, Float, Enum, ForeignKey, BigInteger, Text
+from sqlalchemy import Column, String, Integer, Float, Enum, ForeignKey, BigInteger, Text, Index
 from sqlalchemy.orm import relationship
 import enum
+import time
 from app.core.database import Base
 
 
+def current_millis() -> int:
+    """Current Unix time in milliseconds, the unit of all stored timestamps"""
+    return int(time.time() * 1000)
+
+
 class UserRole(str, enum.Enum):
     """User role enumeration"""
     ADMIN = "ADMIN"
@@ -37,6 +43,8 @@ class User(Base):
     trades = relationship("Trade", back_populates="client", cascade="all, delete-orphan")
     announcements = relationship("Announcement", back_populates="author", cascade="all, delete-orphan")
     replies = relationship("Reply", back_populates="user", cascade="all, delete-orphan")
+    portfolio_aggregates = relationship("PortfolioAggregate", back_populates="client", cascade="all, delete-orphan")
+    portfolio_snapshots = relationship("PortfolioSnapshot", back_populates="client", cascade="all, delete-orphan")
 
 
 class Trade(Base):
@@ -58,9 +66,118 @@ class Trade(Base):
     notes = Column(Text, nullable=True)
     timestamp = Column(BigInteger, nullable=False)
     closed_at = Column(BigInteger, nullable=True)
+    # Set on every insert and update (ORM or Core); the delta sync watermark
+    updated_at = Column(BigInteger, nullable=False, default=current_millis, onupdate=current_millis)
+    # Set on insert and whenever coin, type, status or trigger levels change,
+    # but not on price updates; the trigger index refresh watermark
+    levels_updated_at = Column(BigInteger, nullable=False, default=current_millis)
     
     # Relationships
     client = relationship("User", back_populates="trades")
+    
+    # Indexes matching the trade list and portfolio summary access paths;
+    # trailing id supports keyset pagination on (timestamp, id)
+    __table_args__ = (
+        Index("ix_trades_client_id_status_timestamp_id", "client_id", "status", "timestamp", "id"),
+        Index("ix_trades_client_id_timestamp_id", "client_id", "timestamp", "id"),
+        Index("ix_trades_status_timestamp_id", "status", "timestamp", "id"),
+        Index("ix_trades_timestamp_id", "timestamp", "id"),
+        Index("ix_trades_status_coin_id", "status", "coin_id"),
+        Index("ix_trades_updated_at_id", "updated_at", "id"),
+        Index("ix_trades_client_id_updated_at_id", "client_id", "updated_at", "id"),
+        Index("ix_trades_levels_updated_at", "levels_updated_at"),
+    )
+
+
+class TradeTombstone(Base):
+    """Record of a deleted trade, so delta sync clients can drop it"""
+    __tablename__ = "trade_tombstones"
+    
+    trade_id = Column(String, primary_key=True)
+    # No foreign key: tombstones outlive deleted clients
+    client_id = Column(String, nullable=False)
+    deleted_at = Column(BigInteger, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_trade_tombstones_deleted_at_trade_id", "deleted_at", "trade_id"),
+        Index("ix_trade_tombstones_client_id_deleted_at_trade_id", "client_id", "deleted_at", "trade_id"),
+    )
+
+
+class PortfolioAggregate(Base):
+    """Running per-client, per-coin trade totals, maintained on every trade write"""
+    __tablename__ = "portfolio_aggregates"
+    
+    client_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    coin_id = Column(String, primary_key=True)
+    realized_pnl = Column(Float, nullable=False, default=0.0)
+    win_count = Column(Integer, nullable=False, default=0)
+    closed_count = Column(Integer, nullable=False, default=0)
+    open_count = Column(Integer, nullable=False, default=0)
+    open_notional = Column(Float, nullable=False, default=0.0)
+    open_quantity = Column(Float, nullable=False, default=0.0)
+    
+    # Relationships
+    client = relationship("User", back_populates="portfolio_aggregates")
+
+
+class PortfolioSnapshot(Base):
+    """A client's portfolio summary as of the end of one UTC day, written by the nightly batch"""
+    __tablename__ = "portfolio_snapshots"
+    
+    client_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    # Epoch ms of the UTC midnight the day starts at
+    day = Column(BigInteger, primary_key=True)
+    current_balance = Column(Float, nullable=False)
+    total_invested = Column(Float, nullable=False)
+    total_pnl = Column(Float, nullable=False)
+    roi = Column(Float, nullable=False)
+    win_rate = Column(Float, nullable=False)
+    open_trades_count = Column(Integer, nullable=False)
+    # When the batch computed the row (marks are as of this time)
+    taken_at = Column(BigInteger, nullable=False)
+    
+    # Relationships
+    client = relationship("User", back_populates="portfolio_snapshots")
+    
+    # Reports read every client's snapshot for a day
+    __table_args__ = (
+        Index("ix_portfolio_snapshots_day_client_id", "day", "client_id"),
+    )
+
+
+class PriceTick(Base):
+    """USD price of a coin at an instant, as ingested or marked to market"""
+    __tablename__ = "price_ticks"
+    
+    coin_id = Column(String, primary_key=True)
+    timestamp = Column(BigInteger, primary_key=True)
+    price = Column(Float, nullable=False)
+    
+    # Rows live in the primary key index on SQLite (no separate rowid table);
+    # the timestamp index serves the rollup job's "since" scan
+    __table_args__ = (
+        Index("ix_price_ticks_timestamp", "timestamp"),
+        {"sqlite_with_rowid": False},
+    )
+
+
+class PriceCandle(Base):
+    """Open/high/low/close of a coin's price over one bucket of `resolution` ms"""
+    __tablename__ = "price_candles"
+    
+    coin_id = Column(String, primary_key=True)
+    resolution = Column(Integer, primary_key=True)
+    bucket_start = Column(BigInteger, primary_key=True)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_price_candles_resolution_bucket_start", "resolution", "bucket_start"),
+        {"sqlite_with_rowid": False},
+    )
 
 
 class Announcement(Base):
@@ -92,3 +209,7 @@ class Reply(Base):
     # Relationships
     announcement = relationship("Announcement", back_populates="replies")
     user = relationship("User", back_populates="replies")
+
+
+# Keep portfolio_aggregates and trade_tombstones in step with ORM writes to trades
+from app.services import portfolio_aggregates, trade_changes  # noqa: E402,F401
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Annotated, Dict, Optional, List
 from enum import Enum
 
 
@@ -103,11 +103,57 @@ class TradeResponse(TradeBase):
     status: TradeStatus
     timestamp: int
     closed_at: Optional[int] = None
+    updated_at: int
     
     class Config:
         from_attributes = True
 
 
+class TradePage(BaseModel):
+    """Schema for a keyset-paginated page of trades"""
+    items: List[TradeResponse]
+    next_cursor: Optional[str] = None
+
+
+class TradeChanges(BaseModel):
+    """Schema for trades inserted, updated or deleted since a watermark"""
+    trades: List[TradeResponse]
+    deleted: List[str]
+    watermark: str
+    has_more: bool
+
+
+class TradeBulkCreate(BaseModel):
+    """Schema for creating many trades in one request"""
+    trades: List[TradeCreate] = Field(..., min_length=1)
+
+
+class TradeCloseItem(BaseModel):
+    """Schema for one trade to close in a bulk close"""
+    trade_id: str
+    exit_price: float
+
+
+class TradeBulkClose(BaseModel):
+    """Schema for closing many trades in one request"""
+    trades: List[TradeCloseItem] = Field(..., min_length=1)
+
+
+class TradeBulkItemResult(BaseModel):
+    """Outcome of one item of a bulk request, by its position in the request"""
+    index: int
+    ok: bool
+    trade: Optional[TradeResponse] = None
+    error: Optional[str] = None
+
+
+class TradeBulkResponse(BaseModel):
+    """Schema for the per-item results of a bulk request"""
+    succeeded: int
+    failed: int
+    results: List[TradeBulkItemResult]
+
+
 # ===== ANNOUNCEMENT SCHEMAS =====
 
 class AnnouncementBase(BaseModel):
@@ -167,6 +213,44 @@ class PortfolioSummary(BaseModel):
     open_trades_count: int
 
 
+class ClientOverview(PortfolioSummary):
+    """Schema for one client's row in the admin portfolio overview"""
+    id: str
+    name: str
+    email: str
+
+
+class ClientOverviewPage(BaseModel):
+    """Schema for a keyset-paginated page of the portfolio overview"""
+    items: List[ClientOverview]
+    next_cursor: Optional[str] = None
+
+
+class PortfolioSnapshotResponse(PortfolioSummary):
+    """Schema for a client's portfolio summary at the end of a UTC day"""
+    # Epoch ms of the UTC midnight the day starts at
+    day: int
+    taken_at: int
+    
+    class Config:
+        from_attributes = True
+
+
+class EquityPoint(BaseModel):
+    """Schema for an account balance at a point in time"""
+    timestamp: int
+    balance: float
+
+
+class EquityCurve(BaseModel):
+    """Schema for a client's balance over time"""
+    user_id: str
+    step: int
+    # Price history marking open trades ("tick", "1m", "1h" or "1d")
+    resolution: str
+    points: List[EquityPoint]
+
+
 # ===== COIN PRICE SCHEMAS =====
 
 class CoinPrice(BaseModel):
@@ -175,3 +259,34 @@ class CoinPrice(BaseModel):
     symbol: str
     name: str
     current_price: float
+
+
+class PriceIngest(BaseModel):
+    """Schema for a batch of price ticks keyed by coin id"""
+    prices: Dict[str, Annotated[float, Field(gt=0, allow_inf_nan=False)]] = Field(..., min_length=1)
+    # Epoch milliseconds the ticks were observed at (default: now)
+    timestamp: Optional[int] = None
+
+
+class PriceIngestResult(BaseModel):
+    """Schema for the outcome of a price ingest"""
+    coins: int
+    trades_updated: int
+    ticks_recorded: int
+    triggers_fired: int
+
+
+class PricePoint(BaseModel):
+    """Schema for one price history point (a raw tick has open = high = low = close)"""
+    timestamp: int
+    open: float
+    high: float
+    low: float
+    close: float
+
+
+class PriceHistory(BaseModel):
+    """Schema for a coin's price history at the resolution chosen for the range"""
+    coin_id: str
+    resolution: str
+    points: List[PricePoint]
@@ -0,0 +1,180 @@
+import itertools
+from operator import itemgetter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.models import PriceCandle, PriceTick, Trade, TradeStatus, TradeType
+from app.services.price_history import RESOLUTIONS
+
+# Per-trade inputs of the equity sweep, in the order `equity_sweep` expects
+EQUITY_TRADE_COLUMNS = [
+    Trade.coin_id,
+    Trade.type,
+    Trade.status,
+    Trade.entry_price,
+    Trade.exit_price,
+    Trade.quantity,
+    Trade.timestamp,
+    # Trades closed before closed_at was recorded close at their last write
+    func.coalesce(Trade.closed_at, Trade.updated_at),
+]
+
+# A price series per coin: observation times (ascending) and prices
+PriceSeries = Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+
+def price_resolution(step: int) -> str:
+    """Coarsest price history resolution no wider than `step` ms ("tick" below 1m)"""
+    fitting = [name for name, width in RESOLUTIONS.items() if width <= step]
+    return fitting[-1] if fitting else "tick"
+
+
+def _observations(resolution: str):
+    """
+    (model, time column, price column, conditions, delay) of a resolution.
+
+    A candle's close is only known once its bucket ends, so it is observed
+    `delay` = width after bucket_start; a tick is observed at its timestamp.
+    """
+    if resolution == "tick":
+        model = aliased(PriceTick)
+        return model, model.timestamp, model.price, [], 0
+    width = RESOLUTIONS[resolution]
+    model = aliased(PriceCandle)
+    return model, model.bucket_start, model.close, [model.resolution == width], width
+
+
+async def load_prices(
+    db: AsyncSession,
+    client_id: str,
+    resolution: str,
+    start: int,
+    end: int
+) -> PriceSeries:
+    """
+    Prices of every coin the client traded, observed in (start, end], plus
+    the last observation at or before `start` to seed each series.
+    """
+    coins = select(Trade.coin_id).where(Trade.client_id == client_id, Trade.timestamp <= end).distinct().subquery()
+
+    # Seeds: one correlated max per coin, answered from the primary key
+    model, at, price, conditions, delay = _observations(resolution)
+    inner, inner_at, _, inner_conditions, _ = _observations(resolution)
+    latest = select(func.max(inner_at)).where(
+        inner.coin_id == coins.c.coin_id,
+        inner_at <= start - delay,
+        *inner_conditions
+    ).scalar_subquery()
+    seeds = (await db.execute(
+        select(model.coin_id, at + delay, price)
+        .join(coins, model.coin_id == coins.c.coin_id)
+        .where(at == latest, *conditions)
+    )).all()
+
+    rows = (await db.execute(
+        select(model.coin_id, at + delay, price)
+        .where(
+            model.coin_id.in_(select(coins.c.coin_id)),
+            at > start - delay,
+            at <= end - delay,
+            *conditions
+        )
+        .order_by(model.coin_id, at)
+    )).all()
+
+    series: Dict[str, List[tuple]] = {coin_id: [(observed_at, value)] for coin_id, observed_at, value in seeds}
+    for coin_id, group in itertools.groupby(rows, key=itemgetter(0)):
+        series.setdefault(coin_id, []).extend((observed_at, value) for _, observed_at, value in group)
+    return {
+        coin_id: (
+            np.fromiter((observed_at for observed_at, _ in points), dtype=np.int64, count=len(points)),
+            np.fromiter((value for _, value in points), dtype=np.float64, count=len(points))
+        )
+        for coin_id, points in series.items()
+    }
+
+
+def equity_sweep(initial_deposit: float, trades: Sequence[tuple], prices: PriceSeries, grid: np.ndarray) -> np.ndarray:
+    """
+    Account balance at each grid time: the deposit, plus the PnL of trades
+    closed by then, plus the open trades marked at each coin's latest price.
+
+    Opens and closes are sorted once and swept with cumulative sums and
+    binary searches, so the cost is O((trades + prices) log n + coins x
+    points) rather than a re-scan of every trade per point. An open position
+    with no price observed yet is carried at its entry price (zero PnL), as
+    in the portfolio summary.
+    """
+    balance = np.full(len(grid), float(initial_deposit or 0.0))
+    if not trades:
+        return balance
+
+    coin_ids, types, statuses, entry, exit_, quantity, opened_at, closed_at = zip(*trades)
+    coins, coin_codes = np.unique(np.array(coin_ids, dtype=object), return_inverse=True)
+    entry = np.array(entry, dtype=np.float64)
+    is_long = np.fromiter((trade_type == TradeType.LONG for trade_type in types), dtype=bool, count=len(trades))
+    signed_quantity = np.where(is_long, 1.0, -1.0) * np.array(quantity, dtype=np.float64)
+    opened_at = np.array(opened_at, dtype=np.int64)
+    closed = np.fromiter((status == TradeStatus.CLOSED for status in statuses), dtype=bool, count=len(trades))
+
+    # Realized PnL: running total over closes, looked up per point. A closed
+    # trade without an exit price counts as flat, as in the summary
+    close_times = np.array(closed_at, dtype=np.int64)[closed]
+    exit_prices = np.array(exit_, dtype=np.float64)
+    exit_prices = np.where(np.isnan(exit_prices), entry, exit_prices)
+    realized = (signed_quantity * (exit_prices - entry))[closed]
+    order = np.argsort(close_times, kind="stable")
+    realized_total = np.concatenate(([0.0], np.cumsum(realized[order])))
+    balance += realized_total[np.searchsorted(close_times[order], grid, side="right")]
+
+    # Open exposure per coin: net signed quantity and cost basis step up at
+    # each open and back down at each close
+    event_times = np.concatenate((opened_at, close_times))
+    event_coins = np.concatenate((coin_codes, coin_codes[closed]))
+    event_quantity = np.concatenate((signed_quantity, -signed_quantity[closed]))
+    event_cost = np.concatenate((signed_quantity * entry, -(signed_quantity * entry)[closed]))
+    order = np.lexsort((event_times, event_coins))
+    bounds = np.searchsorted(event_coins[order], np.arange(len(coins) + 1))
+
+    for code, coin_id in enumerate(coins):
+        if coin_id not in prices:
+            continue
+        segment = order[bounds[code]:bounds[code + 1]]
+        held = np.searchsorted(event_times[segment], grid, side="right")
+        quantity_held = np.concatenate(([0.0], np.cumsum(event_quantity[segment])))[held]
+        cost_held = np.concatenate(([0.0], np.cumsum(event_cost[segment])))[held]
+
+        price_times, price_values = prices[coin_id]
+        latest = np.searchsorted(price_times, grid, side="right") - 1
+        marked = latest >= 0
+        balance += np.where(marked, quantity_held * price_values[np.maximum(latest, 0)] - cost_held, 0.0)
+
+    return balance
+
+
+async def equity_curve(
+    db: AsyncSession,
+    client_id: str,
+    initial_deposit: float,
+    start: int,
+    end: int,
+    step: int
+) -> Tuple[str, np.ndarray, np.ndarray]:
+    """
+    A client's balance every `step` ms from `start` to `end` (inclusive),
+    marked with the price history at the coarsest resolution no wider than
+    the step.
+
+    Returns the price resolution used, the point times and the balances.
+    """
+    grid = np.arange(start, end + 1, step, dtype=np.int64)
+    trades = (await db.execute(
+        select(*EQUITY_TRADE_COLUMNS).where(Trade.client_id == client_id, Trade.timestamp <= end)
+    )).all()
+    resolution = price_resolution(step)
+    prices = await load_prices(db, client_id, resolution, start, end) if trades else {}
+    return resolution, grid, equity_sweep(initial_deposit, trades, prices, grid)
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import Float, String, bindparam, column, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import Counter, Gauge, computed_gauge
+from app.models.models import Trade, TradeStatus, current_millis
+from app.services.price_history import record_ticks
+from app.services.prices import PriceService, PriceFeedError, price_service
+from app.services.triggers import TriggerEngine, trigger_engine
+
+logger = logging.getLogger(__name__)
+
+trades_table = Trade.__table__
+
+mark_to_market_runs = Counter(
+    "mark_to_market_runs_total",
+    "Mark-to-market runs by outcome",
+    ("outcome",)
+)
+mark_to_market_rows = Counter(
+    "mark_to_market_rows_updated_total",
+    "Open trades whose current_price was changed by mark-to-market"
+)
+mark_to_market_duration = Gauge(
+    "mark_to_market_last_duration_seconds",
+    "Duration of the last mark-to-market run",
+    multiprocess_mode="livemostrecent"
+)
+mark_to_market_last_rows = Gauge(
+    "mark_to_market_last_rows_updated",
+    "Rows changed by the last mark-to-market run",
+    multiprocess_mode="livemostrecent"
+)
+_last_success: Optional[float] = None
+mark_to_market_lag = Gauge(
+    "mark_to_market_lag_seconds",
+    "Seconds since open trades were last marked to market",
+    multiprocess_mode="livemax"
+)
+computed_gauge(mark_to_market_lag, lambda: time.time() - _last_success if _last_success else 0.0)
+
+
+@dataclass
+class MarkToMarketResult:
+    """Outcome of a single mark-to-market run"""
+    coins: int
+    rows_updated: int
+    triggers_fired: int
+    duration: float
+
+
+async def apply_prices(db: AsyncSession, prices: Dict[str, float], batch_size: Optional[int] = None) -> int:
+    """
+    Set current_price on every open trade of the given coins with set-based
+    UPDATEs and return the number of rows changed (caller commits).
+
+    PostgreSQL gets one UPDATE ... FROM (VALUES ...) per batch of coins; other
+    backends fall back to an executemany of per-coin UPDATEs.
+    """
+    if not prices:
+        return 0
+
+    batch_size = batch_size or settings.MARK_TO_MARKET_BATCH_SIZE
+    items = sorted(prices.items())
+    rows_updated = 0
+
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+
+        if db.bind.dialect.name == "postgresql":
+            quotes = values(
+                column("coin_id", String), column("price", Float), name="quotes"
+            ).data(batch)
+            statement = update(trades_table).where(
+                trades_table.c.coin_id == quotes.c.coin_id,
+                trades_table.c.status == TradeStatus.OPEN,
+                trades_table.c.current_price.is_distinct_from(quotes.c.price)
+            ).values(current_price=quotes.c.price)
+            result = await db.execute(statement)
+        else:
+            statement = update(trades_table).where(
+                trades_table.c.coin_id == bindparam("quote_coin_id"),
+                trades_table.c.status == TradeStatus.OPEN,
+                trades_table.c.current_price.is_distinct_from(bindparam("quote_price"))
+            ).values(current_price=bindparam("quote_price"))
+            result = await db.execute(
+                statement,
+                [{"quote_coin_id": coin_id, "quote_price": price} for coin_id, price in batch]
+            )
+
+        rows_updated += max(result.rowcount, 0)
+
+    return rows_updated
+
+
+async def mark_to_market(
+    db: AsyncSession,
+    prices: PriceService,
+    triggers: Optional[TriggerEngine] = None
+) -> MarkToMarketResult:
+    """
+    Pull quotes for all coins with open trades and write them in bulk (and to
+    the price history), closing trades whose take-profit / stop-loss the new
+    quotes cross
+    """
+    global _last_success
+    start = time.perf_counter()
+
+    coin_ids = (await db.scalars(
+        select(Trade.coin_id).where(Trade.status == TradeStatus.OPEN).distinct()
+    )).all()
+    quotes = await prices.get_prices(db, coin_ids) if coin_ids else {}
+
+    rows_updated = await apply_prices(db, quotes)
+    await record_ticks(db, quotes, current_millis())
+    fired = []
+    if triggers is not None:
+        await triggers.refresh(db)
+        fired = await triggers.process_ticks(db, quotes)
+    await db.commit()
+
+    duration = time.perf_counter() - start
+    _last_success = time.time()
+    mark_to_market_runs.labels(outcome="success").inc()
+    mark_to_market_rows.inc(rows_updated)
+    mark_to_market_last_rows.set(rows_updated)
+    mark_to_market_duration.set(duration)
+
+    return MarkToMarketResult(
+        coins=len(quotes),
+        rows_updated=rows_updated,
+        triggers_fired=len(fired),
+        duration=duration
+    )
+
+
+class MarkToMarketWorker:
+    """
+    Marks open trades to market on a fixed interval. Runs in the
+    mark_to_market.py process, never in the API workers: exactly one
+    instance may reprice trades and fire their triggers.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        prices: PriceService = price_service,
+        triggers: Optional[TriggerEngine] = trigger_engine,
+        session_factory=AsyncSessionLocal
+    ):
+        self.interval = interval
+        self.prices = prices
+        self.triggers = triggers
+        self.session_factory = session_factory
+
+    async def run_once(self) -> Optional[MarkToMarketResult]:
+        try:
+            async with self.session_factory() as db:
+                result = await mark_to_market(db, self.prices, self.triggers)
+            logger.debug(
+                "Marked %d rows across %d coins in %.3fs, %d triggers fired",
+                result.rows_updated, result.coins, result.duration, result.triggers_fired
+            )
+            return result
+        except PriceFeedError as e:
+            mark_to_market_runs.labels(outcome="price_error").inc()
+            logger.warning("Mark-to-market skipped: %s", e)
+        except Exception:
+            mark_to_market_runs.labels(outcome="error").inc()
+            logger.exception("Mark-to-market run failed")
+            # Fired triggers were rolled back; rebuild the index on the next run
+            if self.triggers is not None:
+                self.triggers.clear()
+        return None
+
+    async def run_forever(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,129 @@
+from sqlalchemy import Float, and_, case, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import PortfolioAggregate, Trade, TradeStatus, TradeType, User, UserRole
+from app.schemas.schemas import PortfolioSummary
+
+
+def trade_pnl_expression():
+    """SQL expression for a trade's PnL (exit price if closed, else current or entry price)"""
+    is_closed = Trade.status == TradeStatus.CLOSED
+    mark_price = case(
+        (is_closed, Trade.exit_price),
+        else_=func.coalesce(Trade.current_price, Trade.entry_price)
+    )
+    diff = case(
+        (Trade.type == TradeType.LONG, mark_price - Trade.entry_price),
+        else_=Trade.entry_price - mark_price
+    )
+    return diff * Trade.quantity
+
+
+def portfolio_aggregate_columns():
+    """Labelled aggregate columns shared by the per-client and grouped summary queries"""
+    is_closed = Trade.status == TradeStatus.CLOSED
+    is_open = Trade.status != TradeStatus.CLOSED
+    pnl = trade_pnl_expression()
+
+    return [
+        func.coalesce(func.sum(case((is_closed, pnl), else_=0.0)), 0.0).label("realized_pnl"),
+        func.coalesce(func.sum(case((is_open, pnl), else_=0.0)), 0.0).label("unrealized_pnl"),
+        func.coalesce(
+            func.sum(case((is_open, Trade.entry_price * Trade.quantity), else_=0.0)), 0.0
+        ).label("total_invested"),
+        func.coalesce(func.sum(case((and_(is_closed, pnl > 0), 1), else_=0)), 0).label("win_count"),
+        func.coalesce(func.sum(case((is_closed, 1), else_=0)), 0).label("closed_count"),
+        func.coalesce(func.sum(case((is_open, 1), else_=0)), 0).label("open_count"),
+    ]
+
+
+def portfolio_aggregates_query(client_id: str):
+    """
+    Summary aggregates of a client in one query returning one row: closed-trade
+    totals come from the maintained portfolio_aggregates rows, unrealized PnL
+    from the client's open trades only.
+    """
+    unrealized_pnl = select(
+        func.coalesce(func.sum(trade_pnl_expression()), 0.0)
+    ).where(
+        Trade.client_id == client_id,
+        Trade.status == TradeStatus.OPEN
+    ).scalar_subquery()
+
+    return select(
+        func.coalesce(func.sum(PortfolioAggregate.realized_pnl), 0.0).label("realized_pnl"),
+        unrealized_pnl.label("unrealized_pnl"),
+        func.coalesce(func.sum(PortfolioAggregate.open_notional), 0.0).label("total_invested"),
+        func.coalesce(func.sum(PortfolioAggregate.win_count), 0).label("win_count"),
+        func.coalesce(func.sum(PortfolioAggregate.closed_count), 0).label("closed_count"),
+        func.coalesce(func.sum(PortfolioAggregate.open_count), 0).label("open_count"),
+    ).where(PortfolioAggregate.client_id == client_id)
+
+
+async def get_portfolio_aggregates(db: AsyncSession, client_id: str):
+    """Row of `portfolio_aggregates_query` for a client"""
+    return (await db.execute(portfolio_aggregates_query(client_id))).one()
+
+
+def portfolio_overview_query():
+    """
+    Every client with their summary metrics as columns, in one statement:
+    users joined to their portfolio_aggregates totals and to the PnL of
+    their open trades, each grouped by client. Returned as a subquery so
+    callers can sort, filter and page on any metric.
+
+    The metrics are computed as in `build_portfolio_summary`, operation for
+    operation, so they match the per-client summary exactly.
+    """
+    totals = select(
+        PortfolioAggregate.client_id,
+        func.sum(PortfolioAggregate.realized_pnl).label("realized_pnl"),
+        func.sum(PortfolioAggregate.open_notional).label("total_invested"),
+        func.sum(PortfolioAggregate.win_count).label("win_count"),
+        func.sum(PortfolioAggregate.closed_count).label("closed_count"),
+        func.sum(PortfolioAggregate.open_count).label("open_count"),
+    ).group_by(PortfolioAggregate.client_id).subquery()
+    open_pnl = select(
+        Trade.client_id,
+        func.sum(trade_pnl_expression()).label("unrealized_pnl")
+    ).where(Trade.status == TradeStatus.OPEN).group_by(Trade.client_id).subquery()
+
+    initial = func.coalesce(User.initial_deposit, 0.0)
+    total_pnl = func.coalesce(totals.c.realized_pnl, 0.0) + func.coalesce(open_pnl.c.unrealized_pnl, 0.0)
+    closed_count = func.coalesce(totals.c.closed_count, 0)
+    win_count = func.coalesce(totals.c.win_count, 0)
+
+    return select(
+        User.id,
+        User.name,
+        User.email,
+        # total_pnl first: SQL adds left to right without the grouping
+        (total_pnl + initial).label("current_balance"),
+        func.coalesce(totals.c.total_invested, 0.0).label("total_invested"),
+        total_pnl.label("total_pnl"),
+        case((initial > 0, total_pnl / initial * 100), else_=0.0).label("roi"),
+        case((closed_count > 0, cast(win_count, Float) / cast(closed_count, Float) * 100), else_=0.0).label("win_rate"),
+        func.coalesce(totals.c.open_count, 0).label("open_trades_count"),
+    ).outerjoin(
+        totals, totals.c.client_id == User.id
+    ).outerjoin(
+        open_pnl, open_pnl.c.client_id == User.id
+    ).where(User.role == UserRole.CLIENT).subquery("portfolio_overview")
+
+
+def build_portfolio_summary(initial_deposit: float, aggregates) -> PortfolioSummary:
+    """Derive the portfolio summary metrics from an aggregate row"""
+    initial = initial_deposit or 0.0
+    total_pnl = aggregates.realized_pnl + aggregates.unrealized_pnl
+    current_balance = initial + total_pnl
+    roi = (total_pnl / initial * 100) if initial > 0 else 0
+    win_rate = (aggregates.win_count / aggregates.closed_count * 100) if aggregates.closed_count > 0 else 0
+
+    return PortfolioSummary(
+        current_balance=current_balance,
+        total_invested=aggregates.total_invested,
+        total_pnl=total_pnl,
+        roi=roi,
+        win_rate=win_rate,
+        open_trades_count=aggregates.open_count
+    )
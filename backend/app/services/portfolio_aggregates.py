@@ -0,0 +1,259 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, delete, event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.models import PortfolioAggregate, Trade, TradeStatus, TradeType, User
+
+AGGREGATE_FIELDS = ("realized_pnl", "win_count", "closed_count", "open_count", "open_notional", "open_quantity")
+
+# Dialect-specific INSERT constructs supporting ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+TRADE_FIELDS = ("client_id", "coin_id", "status", "type", "entry_price", "exit_price", "quantity")
+
+
+def trade_contribution(trade) -> Dict[str, float]:
+    """What a single trade adds to its (client, coin) aggregate row"""
+    contribution = dict.fromkeys(AGGREGATE_FIELDS, 0)
+    if trade.status == TradeStatus.CLOSED:
+        contribution["closed_count"] = 1
+        if trade.exit_price is not None:
+            diff = trade.exit_price - trade.entry_price
+            pnl = (diff if trade.type == TradeType.LONG else -diff) * trade.quantity
+            contribution["realized_pnl"] = pnl
+            contribution["win_count"] = 1 if pnl > 0 else 0
+    else:
+        contribution["open_count"] = 1
+        contribution["open_notional"] = trade.entry_price * trade.quantity
+        contribution["open_quantity"] = trade.quantity
+    return contribution
+
+
+class AggregateChanges:
+    """
+    Accumulates aggregate deltas for trades changed in one transaction and
+    applies them as a single executemany upsert.
+
+    Call `remove(trade)` with the trade's state before a change and `add(trade)`
+    with its state after (just `add` for new trades, just `remove` for deleted).
+    """
+
+    def __init__(self):
+        self._deltas: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(lambda: dict.fromkeys(AGGREGATE_FIELDS, 0))
+        # Clients deleted in the same transaction; their rows go with them
+        self.deleted_clients = set()
+
+    def __bool__(self) -> bool:
+        return bool(self.rows())
+
+    def _apply(self, trade, sign: int):
+        delta = self._deltas[(trade.client_id, trade.coin_id)]
+        for field, value in trade_contribution(trade).items():
+            delta[field] += sign * value
+
+    def add(self, trade):
+        self._apply(trade, 1)
+
+    def remove(self, trade):
+        self._apply(trade, -1)
+
+    def rows(self) -> List[dict]:
+        return [
+            {"client_id": client_id, "coin_id": coin_id, **delta}
+            for (client_id, coin_id), delta in sorted(self._deltas.items())
+            if any(delta.values()) and client_id not in self.deleted_clients
+        ]
+
+    def statement(self, dialect_name: str):
+        if dialect_name not in UPSERT_INSERTS:
+            raise ValueError(f"Portfolio aggregates are not supported on database backend '{dialect_name}'")
+        statement = UPSERT_INSERTS[dialect_name](PortfolioAggregate)
+        return statement.on_conflict_do_update(
+            index_elements=[PortfolioAggregate.client_id, PortfolioAggregate.coin_id],
+            set_={field: getattr(PortfolioAggregate, field) + statement.excluded[field] for field in AGGREGATE_FIELDS}
+        )
+
+    async def apply(self, db: AsyncSession):
+        """Upsert the accumulated deltas in the session's transaction"""
+        rows = self.rows()
+        if rows:
+            await db.execute(self.statement(db.bind.dialect.name), rows)
+        self._deltas.clear()
+
+    def apply_sync(self, connection: Connection):
+        rows = self.rows()
+        if rows:
+            connection.execute(self.statement(connection.dialect.name), rows)
+        self._deltas.clear()
+
+
+@dataclass
+class TradeValues:
+    """The trade columns aggregates depend on, e.g. as they were before an update"""
+    client_id: str
+    coin_id: str
+    status: TradeStatus
+    type: TradeType
+    entry_price: float
+    exit_price: Optional[float]
+    quantity: float
+
+
+def _previous_values(trade: Trade) -> TradeValues:
+    """Values of a trade as loaded, before the pending flush changed them"""
+    state = inspect(trade)
+    values = {}
+    for field in TRADE_FIELDS:
+        history = state.attrs[field].history
+        values[field] = history.deleted[0] if history.deleted else getattr(trade, field)
+    return TradeValues(**values)
+
+
+# ===== ORM MAINTENANCE =====
+# Every ORM insert/update/delete of a trade adjusts the aggregates in the same
+# flush, so API handlers, scripts and fixtures all keep the table consistent.
+# Core bulk statements on trades must use AggregateChanges explicitly.
+
+def _pending_changes(instance) -> AggregateChanges:
+    session = inspect(instance).session
+    return session.info.setdefault("portfolio_aggregate_changes", AggregateChanges())
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the old value of expired attributes when they are assigned, so the
+# flush can tell what the trade contributed before the change
+for _field in TRADE_FIELDS:
+    event.listen(getattr(Trade, _field), "set", _load_previous_value, active_history=True, retval=True)
+
+
+@event.listens_for(Trade, "after_insert")
+def _trade_inserted(mapper, connection, trade):
+    _pending_changes(trade).add(trade)
+
+
+@event.listens_for(Trade, "after_update")
+def _trade_updated(mapper, connection, trade):
+    changes = _pending_changes(trade)
+    changes.remove(_previous_values(trade))
+    changes.add(trade)
+
+
+@event.listens_for(Trade, "before_delete")
+def _trade_deleted(mapper, connection, trade):
+    _pending_changes(trade).remove(_previous_values(trade))
+
+
+@event.listens_for(User, "before_delete")
+def _client_deleted(mapper, connection, user):
+    _pending_changes(user).deleted_clients.add(user.id)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_pending_changes(session, flush_context):
+    changes = session.info.pop("portfolio_aggregate_changes", None)
+    if changes:
+        changes.apply_sync(session.connection(bind_arguments={"mapper": inspect(Trade)}))
+
+
+# ===== REBUILD / CONSISTENCY CHECK =====
+
+def trade_aggregate_columns():
+    """Labelled columns computing the stored aggregate fields from trades"""
+    is_closed = Trade.status == TradeStatus.CLOSED
+    is_open = Trade.status != TradeStatus.CLOSED
+    diff = case(
+        (Trade.type == TradeType.LONG, Trade.exit_price - Trade.entry_price),
+        else_=Trade.entry_price - Trade.exit_price
+    )
+    realized = diff * Trade.quantity
+
+    return [
+        func.coalesce(func.sum(case((is_closed, realized), else_=0.0)), 0.0).label("realized_pnl"),
+        func.coalesce(func.sum(case((and_(is_closed, realized > 0), 1), else_=0)), 0).label("win_count"),
+        func.coalesce(func.sum(case((is_closed, 1), else_=0)), 0).label("closed_count"),
+        func.coalesce(func.sum(case((is_open, 1), else_=0)), 0).label("open_count"),
+        func.coalesce(
+            func.sum(case((is_open, Trade.entry_price * Trade.quantity), else_=0.0)), 0.0
+        ).label("open_notional"),
+        func.coalesce(func.sum(case((is_open, Trade.quantity), else_=0.0)), 0.0).label("open_quantity"),
+    ]
+
+
+def _recompute_query(client_id: Optional[str] = None):
+    query = select(Trade.client_id, Trade.coin_id, *trade_aggregate_columns()).group_by(Trade.client_id, Trade.coin_id)
+    if client_id is not None:
+        query = query.where(Trade.client_id == client_id)
+    return query
+
+
+async def rebuild_portfolio_aggregates(db: AsyncSession, client_id: Optional[str] = None) -> int:
+    """Recompute aggregates from trades (for one client or everyone) and return the rows written"""
+    statement = delete(PortfolioAggregate)
+    if client_id is not None:
+        statement = statement.where(PortfolioAggregate.client_id == client_id)
+    await db.execute(statement)
+
+    result = await db.execute(
+        PortfolioAggregate.__table__.insert().from_select(
+            ["client_id", "coin_id", *AGGREGATE_FIELDS], _recompute_query(client_id)
+        )
+    )
+    await db.commit()
+    return max(result.rowcount, 0)
+
+
+@dataclass
+class AggregateMismatch:
+    """A stored aggregate field that disagrees with a recomputation from trades"""
+    client_id: str
+    coin_id: str
+    field: str
+    stored: float
+    expected: float
+
+
+def _close(a: float, b: float, tolerance: float) -> bool:
+    return abs(a - b) <= tolerance * max(1.0, abs(a), abs(b))
+
+
+async def check_portfolio_aggregates(
+    db: AsyncSession,
+    client_id: Optional[str] = None,
+    tolerance: float = 1e-9
+) -> List[AggregateMismatch]:
+    """Compare stored aggregates with a fresh recomputation from trades"""
+    stored_query = select(PortfolioAggregate)
+    if client_id is not None:
+        stored_query = stored_query.where(PortfolioAggregate.client_id == client_id)
+
+    stored = {
+        (row.client_id, row.coin_id): {field: getattr(row, field) for field in AGGREGATE_FIELDS}
+        for row in (await db.scalars(stored_query)).all()
+    }
+    expected = {
+        (row.client_id, row.coin_id): {field: getattr(row, field) for field in AGGREGATE_FIELDS}
+        for row in (await db.execute(_recompute_query(client_id))).all()
+    }
+
+    # A (client, coin) whose trades were all deleted keeps a row of zeros
+    empty = dict.fromkeys(AGGREGATE_FIELDS, 0)
+    mismatches = []
+    for key in sorted(stored.keys() | expected.keys()):
+        stored_values = stored.get(key, empty)
+        expected_values = expected.get(key, empty)
+        for field in AGGREGATE_FIELDS:
+            if not _close(stored_values[field], expected_values[field], tolerance):
+                mismatches.append(AggregateMismatch(*key, field, stored_values[field], expected_values[field]))
+    return mismatches
@@ -0,0 +1,138 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.models.models import PortfolioSnapshot, Trade, User, UserRole, current_millis
+from app.schemas.schemas import PortfolioSummary
+from app.services.portfolio import build_portfolio_summary, portfolio_aggregate_columns
+from app.services.portfolio_aggregates import UPSERT_INSERTS
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 86_400_000
+
+SNAPSHOT_FIELDS = tuple(PortfolioSummary.model_fields)
+
+
+def last_completed_day(now: Optional[int] = None) -> int:
+    """Start (epoch ms, UTC midnight) of the most recent day that has ended"""
+    now = current_millis() if now is None else now
+    return now // DAY_MS * DAY_MS - DAY_MS
+
+
+@dataclass
+class SnapshotProgress:
+    """Clients snapshotted so far in one batch run"""
+    day: int
+    clients: int
+    seconds: float
+    # Last client written; a rerun for the same day resumes after it
+    last_client_id: Optional[str]
+
+    @property
+    def clients_per_second(self) -> float:
+        return self.clients / self.seconds if self.seconds else 0.0
+
+
+def _summary_chunk_query(after: Optional[str], chunk_size: int):
+    """Summary aggregates of the next `chunk_size` clients by id, grouping their trades in one query"""
+    # Grouping by the primary key alone (initial_deposit is functionally
+    # dependent on it) lets the database walk users in id order and stop
+    # after the chunk, instead of grouping every remaining client first
+    query = (
+        select(User.id, User.initial_deposit, *portfolio_aggregate_columns())
+        .outerjoin(Trade, Trade.client_id == User.id)
+        .where(User.role == UserRole.CLIENT)
+        .group_by(User.id)
+        .order_by(User.id)
+        .limit(chunk_size)
+    )
+    if after is not None:
+        query = query.where(User.id > after)
+    return query
+
+
+async def snapshot_chunk(db: AsyncSession, day: int, after: Optional[str], chunk_size: int) -> list:
+    """
+    Compute and upsert the snapshots of the next chunk of clients after
+    `after` (caller commits). Returns the client ids written, in order.
+    """
+    rows = (await db.execute(_summary_chunk_query(after, chunk_size))).all()
+    if not rows:
+        return []
+
+    dialect_name = db.bind.dialect.name
+    if dialect_name not in UPSERT_INSERTS:
+        raise ValueError(f"Portfolio snapshots are not supported on database backend '{dialect_name}'")
+
+    taken_at = current_millis()
+    statement = UPSERT_INSERTS[dialect_name](PortfolioSnapshot)
+    statement = statement.on_conflict_do_update(
+        index_elements=[PortfolioSnapshot.client_id, PortfolioSnapshot.day],
+        set_={field: statement.excluded[field] for field in (*SNAPSHOT_FIELDS, "taken_at")}
+    )
+    await db.execute(statement, [
+        {
+            "client_id": row.id,
+            "day": day,
+            "taken_at": taken_at,
+            **build_portfolio_summary(row.initial_deposit, row).model_dump()
+        }
+        for row in rows
+    ])
+    return [row.id for row in rows]
+
+
+async def take_portfolio_snapshots(
+    day: int,
+    chunk_size: int,
+    restart: bool = False,
+    session_factory=AsyncSessionLocal,
+    on_chunk: Optional[Callable[[SnapshotProgress], None]] = None
+) -> SnapshotProgress:
+    """
+    Snapshot every client's portfolio summary for `day`, `chunk_size`
+    clients per query and transaction.
+
+    Summaries are computed from the live trades and marks, so `day` must be
+    last_completed_day(): past days cannot be backfilled, and a run that
+    misses its day leaves a gap rather than storing today's figures under it.
+
+    Chunks are committed in client id order, so an interrupted run resumes
+    after the last client already snapshotted for the day (unless
+    `restart`), and memory stays bounded by the chunk size. Rerunning a
+    finished day is a no-op; `restart` recomputes it.
+    """
+    if day != last_completed_day():
+        raise ValueError("Only the last completed day can be snapshotted: snapshots record the current portfolio")
+
+    async with session_factory() as db:
+        after = None if restart else await db.scalar(
+            select(func.max(PortfolioSnapshot.client_id)).where(PortfolioSnapshot.day == day)
+        )
+        progress = SnapshotProgress(day=day, clients=0, seconds=0.0, last_client_id=after)
+        start = time.perf_counter()
+        while True:
+            written = await snapshot_chunk(db, day, progress.last_client_id, chunk_size)
+            if not written:
+                break
+            await db.commit()
+            progress.clients += len(written)
+            progress.last_client_id = written[-1]
+            progress.seconds = time.perf_counter() - start
+            if on_chunk is not None:
+                on_chunk(progress)
+            if len(written) < chunk_size:
+                break
+
+    progress.seconds = time.perf_counter() - start
+    logger.info(
+        "Snapshotted %d portfolios in %.1fs (%.0f clients/s)",
+        progress.clients, progress.seconds, progress.clients_per_second
+    )
+    return progress
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import BigInteger, and_, func, literal_column, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import Counter, Gauge
+from app.models.models import PriceCandle, PriceTick
+from app.services.portfolio_aggregates import UPSERT_INSERTS
+
+logger = logging.getLogger(__name__)
+
+# Candle resolutions in ms, finest first; each is rolled up from the one before
+# it (the finest from raw ticks)
+RESOLUTIONS = {
+    "1m": 60_000,
+    "1h": 3_600_000,
+    "1d": 86_400_000,
+}
+
+candles_table = PriceCandle.__table__
+
+price_rollup_runs = Counter(
+    "price_rollup_runs_total",
+    "Price history rollup runs by outcome",
+    ("outcome",)
+)
+price_rollup_duration = Gauge(
+    "price_rollup_last_duration_seconds",
+    "Duration of the last price history rollup",
+    multiprocess_mode="livemostrecent"
+)
+
+
+def _upsert(dialect_name: str, table):
+    if dialect_name not in UPSERT_INSERTS:
+        raise ValueError(f"Price history is not supported on database backend '{dialect_name}'")
+    return UPSERT_INSERTS[dialect_name](table)
+
+
+async def record_ticks(db: AsyncSession, prices: Dict[str, float], timestamp: int) -> int:
+    """
+    Append one tick per coin at `timestamp` with a single executemany
+    (caller commits). A repeated (coin_id, timestamp) keeps the latest price.
+    """
+    if not prices:
+        return 0
+
+    statement = _upsert(db.bind.dialect.name, PriceTick)
+    statement = statement.on_conflict_do_update(
+        index_elements=[PriceTick.coin_id, PriceTick.timestamp],
+        set_={"price": statement.excluded.price}
+    )
+    await db.execute(statement, [
+        {"coin_id": coin_id, "timestamp": timestamp, "price": price}
+        for coin_id, price in prices.items()
+    ])
+    return len(prices)
+
+
+def _inline(value: int):
+    # Constants rendered into the SQL, so PostgreSQL sees the same GROUP BY
+    # expression in the select list and never has to guess a parameter's type
+    return literal_column(str(int(value)), BigInteger)
+
+
+def _from_ticks(width: int, since: int):
+    """OHLC rows per (coin, bucket) for ticks at or after `since`"""
+    bucket = (PriceTick.timestamp // _inline(width)) * _inline(width)
+    grouped = (
+        select(
+            PriceTick.coin_id,
+            bucket.label("bucket_start"),
+            func.max(PriceTick.price).label("high"),
+            func.min(PriceTick.price).label("low"),
+            func.min(PriceTick.timestamp).label("first_at"),
+            func.max(PriceTick.timestamp).label("last_at")
+        )
+        .where(PriceTick.timestamp >= since)
+        .group_by(PriceTick.coin_id, bucket)
+        .subquery()
+    )
+    first, last = aliased(PriceTick), aliased(PriceTick)
+    return (
+        select(
+            grouped.c.coin_id, _inline(width), grouped.c.bucket_start,
+            first.price, grouped.c.high, grouped.c.low, last.price
+        )
+        .join(first, and_(first.coin_id == grouped.c.coin_id, first.timestamp == grouped.c.first_at))
+        .join(last, and_(last.coin_id == grouped.c.coin_id, last.timestamp == grouped.c.last_at))
+    )
+
+
+def _from_candles(width: int, child_width: int, since: int):
+    """OHLC rows per (coin, bucket) merged from the finer candles at or after `since`"""
+    child = aliased(PriceCandle)
+    bucket = (child.bucket_start // _inline(width)) * _inline(width)
+    grouped = (
+        select(
+            child.coin_id,
+            bucket.label("bucket_start"),
+            func.max(child.high).label("high"),
+            func.min(child.low).label("low"),
+            func.min(child.bucket_start).label("first_at"),
+            func.max(child.bucket_start).label("last_at")
+        )
+        .where(child.resolution == child_width, child.bucket_start >= since)
+        .group_by(child.coin_id, bucket)
+        .subquery()
+    )
+    first, last = aliased(PriceCandle), aliased(PriceCandle)
+    return (
+        select(
+            grouped.c.coin_id, _inline(width), grouped.c.bucket_start,
+            first.open, grouped.c.high, grouped.c.low, last.close
+        )
+        .join(first, and_(
+            first.coin_id == grouped.c.coin_id,
+            first.resolution == child_width,
+            first.bucket_start == grouped.c.first_at
+        ))
+        .join(last, and_(
+            last.coin_id == grouped.c.coin_id,
+            last.resolution == child_width,
+            last.bucket_start == grouped.c.last_at
+        ))
+    )
+
+
+async def roll_up(db: AsyncSession) -> Dict[str, int]:
+    """
+    Bring the 1m/1h/1d candles up to date with the ticks and return the
+    buckets written per resolution (caller commits).
+
+    1m candles restart from their newest bucket less the lateness window;
+    each coarser level restarts from its newest bucket or where the finer
+    level changed, whichever is earlier. A run only rewrites recent buckets,
+    and a first or interrupted run catches up on everything with the same
+    set-based INSERT ... SELECT upserts.
+    """
+    lateness = int(settings.PRICE_ROLLUP_LATENESS_SECONDS * 1000)
+    written = {}
+    changed_since = None
+    child_width = None
+
+    for name, width in RESOLUTIONS.items():
+        newest = await db.scalar(select(func.max(PriceCandle.bucket_start)).where(PriceCandle.resolution == width))
+        if child_width is None:
+            since = 0 if newest is None else max(newest - lateness, 0)
+        else:
+            # Coarser levels only need the buckets the finer level touched
+            since = min(0 if newest is None else newest, changed_since)
+        since = since // width * width
+
+        rows = _from_ticks(width, since) if child_width is None else _from_candles(width, child_width, since)
+        statement = _upsert(db.bind.dialect.name, candles_table)
+        statement = statement.from_select(
+            ["coin_id", "resolution", "bucket_start", "open", "high", "low", "close"],
+            # SQLite needs a WHERE to tell the upsert's ON CONFLICT from a join's ON
+            rows.where(true())
+        ).on_conflict_do_update(
+            index_elements=["coin_id", "resolution", "bucket_start"],
+            set_={field: statement.excluded[field] for field in ("open", "high", "low", "close")}
+        )
+        result = await db.execute(statement)
+
+        written[name] = max(result.rowcount, 0)
+        changed_since = since
+        child_width = width
+
+    return written
+
+
+async def price_history(
+    db: AsyncSession,
+    coin_id: str,
+    start: int,
+    end: int,
+    max_points: int
+) -> Tuple[str, List[tuple]]:
+    """
+    Price points for a coin in [start, end) at the finest resolution that
+    fits in `max_points`: raw ticks when there are few enough, otherwise the
+    first candle resolution with at most `max_points` buckets in the range
+    (1d when even that has more).
+
+    Returns the resolution name ("tick", "1m", "1h" or "1d") and
+    (timestamp, open, high, low, close) rows; a tick is its own candle.
+    """
+    ticks = (await db.execute(
+        select(PriceTick.timestamp, PriceTick.price)
+        .where(PriceTick.coin_id == coin_id, PriceTick.timestamp >= start, PriceTick.timestamp < end)
+        .order_by(PriceTick.timestamp)
+        .limit(max_points + 1)
+    )).all()
+    if len(ticks) <= max_points:
+        return "tick", [(timestamp, price, price, price, price) for timestamp, price in ticks]
+
+    name, width = next(
+        ((name, width) for name, width in RESOLUTIONS.items() if -(-(end - start) // width) <= max_points),
+        list(RESOLUTIONS.items())[-1]
+    )
+    candles = (await db.execute(
+        select(PriceCandle.bucket_start, PriceCandle.open, PriceCandle.high, PriceCandle.low, PriceCandle.close)
+        .where(
+            PriceCandle.coin_id == coin_id,
+            PriceCandle.resolution == width,
+            PriceCandle.bucket_start >= start // width * width,
+            PriceCandle.bucket_start < end
+        )
+        .order_by(PriceCandle.bucket_start)
+    )).all()
+    return name, [tuple(candle) for candle in candles]
+
+
+class PriceRollupWorker:
+    """
+    Rolls price ticks up into OHLC candles on a fixed interval. Runs in the
+    price_rollup.py process, never in the API workers: exactly one instance
+    may write candles.
+    """
+
+    def __init__(self, interval: float, session_factory=AsyncSessionLocal):
+        self.interval = interval
+        self.session_factory = session_factory
+
+    async def run_once(self) -> Optional[Dict[str, int]]:
+        start = time.perf_counter()
+        try:
+            async with self.session_factory() as db:
+                written = await roll_up(db)
+                await db.commit()
+        except Exception:
+            price_rollup_runs.labels(outcome="error").inc()
+            logger.exception("Price history rollup failed")
+            return None
+
+        price_rollup_runs.labels(outcome="success").inc()
+        price_rollup_duration.set(time.perf_counter() - start)
+        logger.debug("Rolled up price candles: %s", written)
+        return written
+
+    async def run_forever(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Set
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.models import Trade
+
+logger = logging.getLogger(__name__)
+
+
+class PriceFeedError(Exception):
+    """Raised when quotes cannot be fetched and nothing usable is cached"""
+
+
+@dataclass
+class Quote:
+    """Cached USD price for a coin"""
+    price: float
+    fetched_at: float
+
+
+class PriceService:
+    """
+    Server-side CoinGecko price oracle.
+
+    Every refresh batches all tracked coin ids (the distinct Trade.coin_id values
+    plus up to `max_extra_ids` ids requested since) into one /simple/price request.
+    Quotes, and ids CoinGecko has no quote for, are cached for `ttl` seconds and
+    concurrent callers share a single in-flight refresh.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = "",
+        ttl: float = 10.0,
+        timeout: float = 10.0,
+        max_extra_ids: int = 500
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_extra_ids = max_extra_ids
+        self._quotes: Dict[str, Quote] = {}
+        # Requested ids upstream returned no quote for, by monotonic time of the miss
+        self._missing: Dict[str, float] = {}
+        self._extra_ids: Set[str] = set()
+        self._refreshed_at: Optional[float] = None
+        self._refresh: Optional[asyncio.Future] = None
+
+    def cached(self, coin_ids: Optional[Iterable[str]] = None, fresh_only: bool = False) -> Dict[str, float]:
+        """Return cached prices, optionally restricted to `coin_ids` and unexpired quotes"""
+        now = time.monotonic()
+        ids = self._quotes.keys() if coin_ids is None else coin_ids
+        return {
+            coin_id: self._quotes[coin_id].price
+            for coin_id in ids
+            if coin_id in self._quotes and (not fresh_only or now - self._quotes[coin_id].fetched_at < self.ttl)
+        }
+
+    def _is_fresh(self, coin_ids: Optional[Set[str]]) -> bool:
+        """Whether `coin_ids` (None: every tracked coin) can be answered from the cache"""
+        now = time.monotonic()
+        if coin_ids is None:
+            return self._refreshed_at is not None and now - self._refreshed_at < self.ttl
+        return all(
+            (coin_id in self._quotes and now - self._quotes[coin_id].fetched_at < self.ttl)
+            or (coin_id in self._missing and now - self._missing[coin_id] < self.ttl)
+            for coin_id in coin_ids
+        )
+
+    async def get_prices(self, db: AsyncSession, coin_ids: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Get USD prices for `coin_ids` (or every tracked coin), refreshing the
+        cache in one batched upstream request when any quote is missing or stale.
+        """
+        requested = set(coin_ids) if coin_ids is not None else None
+        if self._is_fresh(requested):
+            return self.cached(requested)
+
+        if requested:
+            self._track(requested - self.cached(requested, fresh_only=True).keys())
+        try:
+            await self._coalesced_refresh(db)
+        except PriceFeedError:
+            stale = self.cached(requested)
+            if not stale:
+                raise
+            logger.warning("Price refresh failed, serving %d stale quotes", len(stale))
+            return stale
+
+        if requested:
+            # Ids still unquoted (unknown upstream, or beyond the extra id
+            # limit) are answered from the cache until the TTL runs out
+            missed_at = time.monotonic()
+            for coin_id in requested - self._quotes.keys():
+                self._missing[coin_id] = missed_at
+        return self.cached(requested)
+
+    def _track(self, coin_ids: Set[str]):
+        """Add requested ids to the next refresh, up to `max_extra_ids` pending ids"""
+        room = max(self.max_extra_ids - len(self._extra_ids), 0)
+        new_ids = sorted(coin_ids - self._extra_ids)
+        if len(new_ids) > room:
+            logger.warning("Price refresh already tracks %d extra ids, skipping %d", len(self._extra_ids), len(new_ids) - room)
+        self._extra_ids.update(new_ids[:room])
+
+    async def _coalesced_refresh(self, db: AsyncSession):
+        """Join the in-flight refresh, or start one if none is running"""
+        loop = asyncio.get_running_loop()
+        if not self._refresh_running(loop):
+            coin_ids = await self.tracked_coin_ids(db)
+            # Another caller may have started a refresh while we were querying
+            if not self._refresh_running(loop):
+                self._refresh = loop.create_task(self._do_refresh(coin_ids))
+        await asyncio.shield(self._refresh)
+
+    def _refresh_running(self, loop: asyncio.AbstractEventLoop) -> bool:
+        return self._refresh is not None and not self._refresh.done() and self._refresh.get_loop() is loop
+
+    async def tracked_coin_ids(self, db: AsyncSession) -> Set[str]:
+        """All coin ids the oracle keeps quotes for"""
+        trade_coin_ids = (await db.scalars(select(Trade.coin_id).distinct())).all()
+        return set(trade_coin_ids) | self._extra_ids
+
+    async def _do_refresh(self, coin_ids: Set[str]):
+        prices = await self.fetch(sorted(coin_ids)) if coin_ids else {}
+        fetched_at = time.monotonic()
+        for coin_id, price in prices.items():
+            self._quotes[coin_id] = Quote(price=price, fetched_at=fetched_at)
+        self._missing = {
+            coin_id: missed_at
+            for coin_id, missed_at in self._missing.items()
+            if fetched_at - missed_at < self.ttl and coin_id not in prices
+        }
+        for coin_id in coin_ids - prices.keys():
+            self._missing[coin_id] = fetched_at
+        self._extra_ids -= coin_ids
+        self._refreshed_at = fetched_at
+
+    async def fetch(self, coin_ids) -> Dict[str, float]:
+        """Fetch USD prices for `coin_ids` with a single /simple/price request"""
+        params = {"ids": ",".join(coin_ids), "vs_currencies": "usd"}
+        if self.api_key:
+            params["x_cg_pro_api_key"] = self.api_key
+
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as http:
+                response = await http.get(f"{self.base_url}/simple/price", params=params)
+                response.raise_for_status()
+                data = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise PriceFeedError(f"CoinGecko request failed: {e}") from e
+
+        return {
+            coin_id: float(quote["usd"])
+            for coin_id, quote in data.items()
+            if isinstance(quote, dict) and quote.get("usd") is not None
+        }
+
+
+price_service = PriceService(
+    base_url=settings.COINGECKO_API_URL,
+    api_key=settings.COINGECKO_API_KEY,
+    ttl=settings.PRICE_CACHE_TTL_SECONDS,
+    timeout=settings.PRICE_REQUEST_TIMEOUT_SECONDS,
+    max_extra_ids=settings.PRICE_MAX_EXTRA_IDS
+)
+
+
+def get_price_service() -> PriceService:
+    """Dependency to get the shared price service"""
+    return price_service
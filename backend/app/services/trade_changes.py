@@ -0,0 +1,39 @@
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+
+from app.models.models import Trade, TradeTombstone, current_millis
+
+
+# ===== TRIGGER INPUTS =====
+# ORM updates that change what the trigger index holds stamp
+# levels_updated_at; repricing (current_price only) leaves it alone. Core
+# updates of these columns must set it explicitly.
+
+TRIGGER_INPUTS = ("coin_id", "type", "status", "take_profit", "stop_loss")
+
+
+@event.listens_for(Trade, "before_update")
+def _trigger_inputs_changed(mapper, connection, trade):
+    state = inspect(trade)
+    if any(state.attrs[name].history.has_changes() for name in TRIGGER_INPUTS):
+        trade.levels_updated_at = current_millis()
+
+
+# ===== TOMBSTONES =====
+# Every ORM delete of a trade (including cascades from deleting its client)
+# records a tombstone in the same flush, so GET /trades/changes can report it.
+# Core bulk deletes of trades must insert tombstones explicitly.
+
+@event.listens_for(Trade, "before_delete")
+def _trade_deleted(mapper, connection, trade):
+    session = inspect(trade).session
+    session.info.setdefault("trade_tombstones", []).append(
+        {"trade_id": trade.id, "client_id": trade.client_id, "deleted_at": current_millis()}
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _write_tombstones(session, flush_context):
+    tombstones = session.info.pop("trade_tombstones", None)
+    if tombstones:
+        session.connection(bind_arguments={"mapper": inspect(Trade)}).execute(insert(TradeTombstone), tombstones)
@@ -0,0 +1,275 @@
+import bisect
+import itertools
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.models.models import Trade, TradeStatus, TradeTombstone, TradeType, current_millis
+from app.services.portfolio_aggregates import AggregateChanges, TradeValues
+
+TAKE_PROFIT = "take_profit"
+STOP_LOSS = "stop_loss"
+
+# Books are compacted once stale entries outnumber live ones by this margin
+COMPACT_THRESHOLD = 64
+
+trades_table = Trade.__table__
+
+# Everything the index needs to know about a trade
+TRIGGER_COLUMNS = (Trade.id, Trade.coin_id, Trade.type, Trade.status, Trade.take_profit, Trade.stop_loss)
+
+triggers_fired = Counter(
+    "trade_triggers_fired_total",
+    "Trades closed by take-profit / stop-loss triggers",
+    ("kind",)
+)
+
+
+@dataclass
+class FiredTrigger:
+    """A take-profit or stop-loss level crossed by a price tick"""
+    trade_id: str
+    coin_id: str
+    kind: str
+    level: float
+    price: float
+
+
+# (level, trade_id, version, kind); sorted by level
+Entry = Tuple[float, str, int, str]
+
+
+def _level(entry: Entry) -> float:
+    return entry[0]
+
+
+@dataclass
+class _Position:
+    coin_id: str
+    version: int
+    entries: List[Tuple[str, float, str]]  # (side, level, kind)
+
+
+@dataclass
+class _CoinBook:
+    """Trigger levels of one coin, split by the direction that fires them"""
+    rising: List[Entry] = field(default_factory=list)   # fire when price >= level
+    falling: List[Entry] = field(default_factory=list)  # fire when price <= level
+    stale: int = 0
+
+    def insert(self, side: str, entry: Entry):
+        bisect.insort(self.rising if side == "rising" else self.falling, entry, key=_level)
+
+
+class TriggerEngine:
+    """
+    In-memory index of take-profit / stop-loss levels of open trades.
+
+    Levels are kept per coin in two sorted lists: those fired by the price rising
+    to them (LONG take-profit, SHORT stop-loss) and those fired by the price
+    falling to them (LONG stop-loss, SHORT take-profit). A tick bisects each list
+    and only visits the crossed entries. Entries of removed or re-levelled trades
+    are invalidated lazily through a per-position version.
+
+    Each process holds its own index, so `refresh` re-reads the trades other
+    workers changed before every tick batch: by `levels_updated_at`, which
+    repricing leaves alone, so a tick only re-reads trades whose coin, side,
+    status or levels changed.
+    """
+
+    def __init__(self):
+        self._books: Dict[str, _CoinBook] = {}
+        self._positions: Dict[str, _Position] = {}
+        self._versions = itertools.count()
+        self.loaded = False
+        # levels_updated_at watermark (epoch ms) the index is known to be current up to
+        self._synced_at = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def clear(self):
+        self._books.clear()
+        self._positions.clear()
+        self.loaded = False
+
+    async def load(self, db: AsyncSession):
+        """Rebuild the index from all open trades that have a trigger level"""
+        self.clear()
+        synced_at = current_millis()
+        trades = (await db.execute(
+            select(*TRIGGER_COLUMNS).where(
+                Trade.status == TradeStatus.OPEN,
+                or_(Trade.take_profit.isnot(None), Trade.stop_loss.isnot(None))
+            )
+        )).all()
+        for trade in trades:
+            self.upsert(trade)
+        self.loaded = True
+        self._synced_at = synced_at
+
+    async def refresh(self, db: AsyncSession):
+        """
+        Load the index on first use, then re-index the trades created, changed
+        or deleted (by any worker) since the last refresh.
+
+        The watermark trails the clock by TRADE_CHANGES_SETTLE_MS, like delta
+        sync, so commits that land late or come from a server with a skewed
+        clock are still seen; rows read again with unchanged levels are skipped.
+        """
+        if not self.loaded:
+            await self.load(db)
+            return
+
+        synced_at = current_millis()
+        since = self._synced_at - settings.TRADE_CHANGES_SETTLE_MS
+        trades = (await db.execute(select(*TRIGGER_COLUMNS).where(Trade.levels_updated_at > since))).all()
+        for trade in trades:
+            self.upsert(trade)
+        deleted = (await db.scalars(select(TradeTombstone.trade_id).where(TradeTombstone.deleted_at > since))).all()
+        for trade_id in deleted:
+            self.discard(trade_id)
+        self._synced_at = synced_at
+
+    def upsert(self, trade):
+        """Index (or re-index) a trade's trigger levels; a Trade or a row of TRIGGER_COLUMNS"""
+        if trade.status != TradeStatus.OPEN or (trade.take_profit is None and trade.stop_loss is None):
+            self.discard(trade.id)
+            return
+
+        is_long = trade.type == TradeType.LONG
+        entries = []
+        if trade.take_profit is not None:
+            entries.append(("rising" if is_long else "falling", trade.take_profit, TAKE_PROFIT))
+        if trade.stop_loss is not None:
+            entries.append(("falling" if is_long else "rising", trade.stop_loss, STOP_LOSS))
+
+        current = self._positions.get(trade.id)
+        if current is not None and current.coin_id == trade.coin_id and current.entries == entries:
+            return
+        self.discard(trade.id)
+        position = _Position(coin_id=trade.coin_id, version=next(self._versions), entries=entries)
+        self._positions[trade.id] = position
+        book = self._books.setdefault(trade.coin_id, _CoinBook())
+        for side, level, kind in entries:
+            book.insert(side, (level, trade.id, position.version, kind))
+
+    def discard(self, trade_id: str):
+        """Stop watching a trade (closed, deleted or re-levelled)"""
+        position = self._positions.pop(trade_id, None)
+        if position is not None:
+            book = self._books[position.coin_id]
+            book.stale += len(position.entries)
+            self._maybe_compact(position.coin_id)
+
+    def on_tick(self, coin_id: str, price: float) -> List[FiredTrigger]:
+        """Pop and return the triggers crossed by `price`"""
+        book = self._books.get(coin_id)
+        if book is None:
+            return []
+
+        cut = bisect.bisect_right(book.rising, price, key=_level)
+        crossed = book.rising[:cut]
+        del book.rising[:cut]
+        cut = bisect.bisect_left(book.falling, price, key=_level)
+        crossed.extend(book.falling[cut:])
+        del book.falling[cut:]
+
+        fired = []
+        for level, trade_id, version, kind in crossed:
+            position = self._positions.get(trade_id)
+            if position is None or position.version != version:
+                book.stale -= 1
+                continue
+            # The trade's other level (if any) is now stale
+            del self._positions[trade_id]
+            book.stale += len(position.entries) - 1
+            fired.append(FiredTrigger(trade_id=trade_id, coin_id=coin_id, kind=kind, level=level, price=price))
+
+        self._maybe_compact(coin_id)
+        return fired
+
+    def _maybe_compact(self, coin_id: str):
+        book = self._books[coin_id]
+        live = len(book.rising) + len(book.falling) - book.stale
+        if book.stale <= max(COMPACT_THRESHOLD, live):
+            return
+
+        compacted = _CoinBook()
+        for trade_id, position in self._positions.items():
+            if position.coin_id == coin_id:
+                for side, level, kind in position.entries:
+                    compacted.insert(side, (level, trade_id, position.version, kind))
+        self._books[coin_id] = compacted
+
+    async def process_ticks(self, db: AsyncSession, prices: Dict[str, float]) -> List[FiredTrigger]:
+        """Apply a batch of ticks and close every triggered trade at its tick price (caller commits)"""
+        fired = []
+        for coin_id, price in prices.items():
+            fired.extend(self.on_tick(coin_id, price))
+
+        if fired:
+            await close_triggered(db, fired)
+            for trigger in fired:
+                triggers_fired.labels(kind=trigger.kind).inc()
+        return fired
+
+
+def _still_crossed(price: float):
+    """SQL guard that the stored levels are still crossed at `price`"""
+    is_long = trades_table.c.type == TradeType.LONG
+    is_short = trades_table.c.type == TradeType.SHORT
+    return or_(
+        and_(is_long, or_(trades_table.c.take_profit <= price, trades_table.c.stop_loss >= price)),
+        and_(is_short, or_(trades_table.c.take_profit >= price, trades_table.c.stop_loss <= price)),
+    )
+
+
+async def close_triggered(db: AsyncSession, fired: List[FiredTrigger]) -> int:
+    """
+    Close triggered trades with one UPDATE per coin, using the tick price as
+    exit_price, and move them from open to closed in the portfolio aggregates
+    """
+    by_coin = defaultdict(list)
+    for trigger in fired:
+        by_coin[(trigger.coin_id, trigger.price)].append(trigger.trade_id)
+
+    closed_at = int(time.time() * 1000)
+    changes = AggregateChanges()
+    closed = 0
+    for (coin_id, price), trade_ids in by_coin.items():
+        result = await db.execute(
+            update(trades_table).where(
+                trades_table.c.id.in_(trade_ids),
+                trades_table.c.status == TradeStatus.OPEN,
+                _still_crossed(price)
+            ).values(
+                status=TradeStatus.CLOSED,
+                exit_price=price,
+                closed_at=closed_at,
+                levels_updated_at=closed_at
+            ).returning(
+                trades_table.c.client_id,
+                trades_table.c.type,
+                trades_table.c.entry_price,
+                trades_table.c.quantity
+            )
+        )
+        for row in result:
+            trade = TradeValues(coin_id=coin_id, status=TradeStatus.OPEN, exit_price=None, **row._mapping)
+            changes.remove(trade)
+            trade.status, trade.exit_price = TradeStatus.CLOSED, price
+            changes.add(trade)
+            closed += 1
+
+    await changes.apply(db)
+    return closed
+
+
+trigger_engine = TriggerEngine()
@@ -0,0 +1,68 @@
+from typing import Optional
+
+from app.core.cache import CacheBackend, create_cache_backend
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.models.models import User, UserRole
+
+user_cache_hits = Counter("user_cache_hits_total", "Authenticated user lookups served from cache")
+user_cache_misses = Counter("user_cache_misses_total", "Authenticated user lookups that went to the database")
+
+
+class UserCache:
+    """
+    Cache of authenticated user principals keyed by user id.
+
+    Only the public profile columns are stored (never the password hash); hits
+    are returned as transient User objects that are not attached to a session.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"user:{user_id}"
+
+    async def get(self, user_id: str) -> Optional[User]:
+        if self.ttl <= 0:
+            return None
+
+        data = await self.backend.get(self._key(user_id))
+        if data is None:
+            user_cache_misses.inc()
+            return None
+
+        user_cache_hits.inc()
+        return User(
+            id=data["id"],
+            email=data["email"],
+            name=data["name"],
+            role=UserRole(data["role"]),
+            initial_deposit=data["initial_deposit"]
+        )
+
+    async def set(self, user: User):
+        if self.ttl <= 0:
+            return
+
+        await self.backend.set(self._key(user.id), {
+            "id": user.id,
+            "email": user.email,
+            "name": user.name,
+            "role": user.role.value,
+            "initial_deposit": user.initial_deposit,
+        }, self.ttl)
+
+    async def invalidate(self, user_id: str):
+        await self.backend.delete(self._key(user_id))
+
+    async def clear(self):
+        await self.backend.clear()
+
+
+user_cache = UserCache(
+    backend=create_cache_backend(settings.USER_CACHE_URL, settings.USER_CACHE_MAX_SIZE),
+    ttl=settings.USER_CACHE_TTL_SECONDS
+)
@@ -1,11 +1,22 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_read_db
+from app.core.metrics import REGISTRY
 from app.core.security import get_password_hash
-from app.models.models import User, UserRole
+from app.models.models import Trade, TradeStatus, TradeType, User, UserRole
+from app.services.user_cache import user_cache
 import secrets
 
 # Create test database
@@ -13,27 +24,55 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The API uses an async session; NullPool keeps connections from outliving
+# the per-request event loop that TestClient spins up
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 
-def override_get_db():
+async def override_get_db():
     """Override database dependency for testing"""
-    try:
-        db = TestingSessionLocal()
+    async with AsyncTestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 
 client = TestClient(app)
 
 
+def query_count(response) -> int:
+    """Number of SQL queries the request behind `response` issued (from Server-Timing)"""
+    for value in response.headers.get_list("server-timing"):
+        if value.startswith("db;"):
+            return int(value.split('desc="', 1)[1].split(" ", 1)[0])
+    raise AssertionError("Response has no db Server-Timing entry")
+
+
+def assert_max_queries(response, maximum: int):
+    """Fail if the request behind `response` issued more than `maximum` SQL queries"""
+    count = query_count(response)
+    assert count <= maximum, (
+        f"{response.request.method} {response.request.url.path} issued {count} queries, "
+        f"budget is {maximum}"
+    )
+
+
+def metric_value(name: str, **labels) -> float:
+    """Current value of a metric sample in this process (0 if never recorded)"""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
 @pytest.fixture(autouse=True)
 def setup_database():
     """Setup and teardown test database"""
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
+    asyncio.run(user_cache.clear())
 
 
 @pytest.fixture
@@ -98,3 +137,83 @@ def client_token(client_user):
         json={"email": "client@test.com", "password": "password123"}
     )
     return response.json()["access_token"]
+
+
+@pytest.fixture
+def make_trade():
+    """
+    Factory for unsaved trades: make_trade(client_id, coin_id="bitcoin", **columns)
+    builds a LONG of 1.0 coin entered at 100.0 now, closed when given an
+    exit_price and open otherwise; keyword arguments override any column.
+    """
+    def make(client_id, coin_id="bitcoin", **columns):
+        values = {
+            "id": secrets.token_urlsafe(16),
+            "client_id": client_id,
+            "coin_id": coin_id,
+            "coin_symbol": coin_id[:3].upper(),
+            "entry_price": 100.0,
+            "quantity": 1.0,
+            "type": TradeType.LONG,
+            "status": TradeStatus.CLOSED if columns.get("exit_price") is not None else TradeStatus.OPEN,
+            "timestamp": int(time.time() * 1000),
+        }
+        values.update(columns)
+        return Trade(**values)
+    
+    return make
+
+
+class _PriceStubHandler(BaseHTTPRequestHandler):
+    """Minimal CoinGecko /simple/price stand-in"""
+    
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        ids = query.get("ids", [""])[0].split(",")
+        self.server.requests.append(ids)
+        time.sleep(self.server.delay)
+        
+        if self.server.fail:
+            self.send_response(500)
+            self.end_headers()
+            return
+        
+        body = json.dumps({
+            coin_id: {"usd": self.server.prices[coin_id]}
+            for coin_id in ids if coin_id in self.server.prices
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def price_stub():
+    """Local HTTP server serving CoinGecko-style quotes from `price_stub.prices`"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PriceStubHandler)
+    server.prices = {}
+    server.requests = []
+    server.delay = 0.0
+    server.fail = False
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def price_service(price_stub):
+    """Price service pointed at the stub server and injected into the app"""
+    from app.services.prices import PriceService, get_price_service
+    
+    service = PriceService(base_url=price_stub.url, ttl=60)
+    app.dependency_overrides[get_price_service] = lambda: service
+    yield service
+    app.dependency_overrides.pop(get_price_service, None)
@@ -1,6 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.tests.conftest import metric_value
 
 client = TestClient(app)
 
@@ -173,3 +174,69 @@ class TestAuthEndpoints:
             headers={"Authorization": f"Bearer {admin_token}"}
         )
         assert response.status_code == 404
+    
+    def test_current_user_served_from_cache(self, client_token):
+        """Test repeated authenticated requests hit the user cache"""
+        misses = metric_value("user_cache_misses_total")
+        hits = metric_value("user_cache_hits_total")
+        for _ in range(3):
+            response = client.get("/auth/me", headers={"Authorization": f"Bearer {client_token}"})
+            assert response.status_code == 200
+            assert response.json()["email"] == "client@test.com"
+        
+        assert metric_value("user_cache_misses_total") == misses + 1
+        assert metric_value("user_cache_hits_total") == hits + 2
+    
+    def test_update_user_invalidates_cache(self, admin_token, client_token, client_user):
+        """Test cached principal is refreshed after an admin update"""
+        client.get("/auth/me", headers={"Authorization": f"Bearer {client_token}"})
+        
+        client.put(
+            f"/auth/users/{client_user.id}",
+            headers={"Authorization": f"Bearer {admin_token}"},
+            json={"name": "Renamed Client"}
+        )
+        
+        response = client.get("/auth/me", headers={"Authorization": f"Bearer {client_token}"})
+        assert response.json()["name"] == "Renamed Client"
+    
+    def test_delete_user_invalidates_cache(self, admin_token, client_token, client_user):
+        """Test a deleted user's token stops working immediately"""
+        client.get("/auth/me", headers={"Authorization": f"Bearer {client_token}"})
+        
+        client.delete(
+            f"/auth/users/{client_user.id}",
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        
+        response = client.get("/auth/me", headers={"Authorization": f"Bearer {client_token}"})
+        assert response.status_code == 401
+    
+    def test_memory_cache_lru_and_ttl(self):
+        """Test in-process cache evicts least recently used and expired entries"""
+        import asyncio
+        from app.core.cache import MemoryCache
+        
+        async def run():
+            cache = MemoryCache(max_size=2)
+            await cache.set("a", 1, ttl=60)
+            await cache.set("b", 2, ttl=60)
+            assert await cache.get("a") == 1  # "b" is now least recently used
+            await cache.set("c", 3, ttl=60)
+            assert await cache.get("b") is None
+            assert await cache.get("a") == 1
+            await cache.set("d", 4, ttl=0)
+            assert await cache.get("d") is None
+        
+        asyncio.run(run())
+    
+    def test_incomplete_cache_backend_is_rejected(self):
+        """Test a backend missing part of the interface fails when created"""
+        from app.core.cache import CacheBackend
+        
+        class GetOnlyCache(CacheBackend):
+            async def get(self, key):
+                return None
+        
+        with pytest.raises(TypeError):
+            GetOnlyCache()
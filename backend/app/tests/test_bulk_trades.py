@@ -0,0 +1,198 @@
+import asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select, update
+from app.main import app
+from app.core.config import settings
+from app.models.models import Trade, TradeStatus
+from app.services.portfolio_aggregates import check_portfolio_aggregates
+from app.services.triggers import trigger_engine
+from app.tests.conftest import AsyncTestingSessionLocal, assert_max_queries, async_engine
+
+client = TestClient(app)
+
+
+def new_trade(client_id, entry_price=100.0, **fields):
+    """Request body for one trade"""
+    return {
+        "client_id": client_id,
+        "coin_id": "bitcoin",
+        "coin_symbol": "BTC",
+        "entry_price": entry_price,
+        "quantity": 1.0,
+        "type": "LONG",
+        **fields
+    }
+
+
+def check():
+    """Mismatches between stored aggregates and a recomputation from trades"""
+    async def run():
+        async with AsyncTestingSessionLocal() as db:
+            return await check_portfolio_aggregates(db)
+    return asyncio.run(run())
+
+
+def trade_count(test_db):
+    """Number of trades in the database"""
+    test_db.expire_all()
+    return test_db.scalar(select(func.count()).select_from(Trade))
+
+
+class TestBulkCreate:
+    """Test POST /trades/bulk"""
+    
+    def test_partial_failure(self, admin_token, client_user, test_db):
+        """Test items for unknown clients fail while the rest are created"""
+        response = client.post("/trades/bulk", json={"trades": [
+            new_trade(client_user.id, 100.0, take_profit=120.0),
+            new_trade("missing-client"),
+            new_trade(client_user.id, 200.0),
+        ]}, headers={"Authorization": f"Bearer {admin_token}"})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["succeeded"], data["failed"]) == (2, 1)
+        assert [result["ok"] for result in data["results"]] == [True, False, True]
+        assert data["results"][1]["error"] == "Client not found"
+        assert data["results"][0]["trade"]["status"] == "OPEN"
+        assert data["results"][2]["trade"]["entry_price"] == 200.0
+        
+        assert trade_count(test_db) == 2
+        assert data["results"][0]["trade"]["id"] in trigger_engine._positions
+        assert check() == []
+    
+    def test_atomic_rejects_batch(self, admin_token, client_user, test_db):
+        """Test atomic mode writes nothing when any item fails"""
+        response = client.post("/trades/bulk?atomic=true", json={"trades": [
+            new_trade(client_user.id),
+            new_trade("missing-client"),
+        ]}, headers={"Authorization": f"Bearer {admin_token}"})
+        
+        assert response.status_code == 422
+        assert response.json()["detail"] == [{"index": 1, "error": "Client not found"}]
+        assert trade_count(test_db) == 0
+    
+    def test_query_count_is_constant(self, admin_token, client_user):
+        """Test a batch costs the same few queries regardless of its size"""
+        response = client.post("/trades/bulk", json={
+            "trades": [new_trade(client_user.id, 100.0 + i) for i in range(50)]
+        }, headers={"Authorization": f"Bearer {admin_token}"})
+        
+        assert response.json()["succeeded"] == 50
+        assert_max_queries(response, 4)
+    
+    def test_size_limit(self, admin_token, client_user, monkeypatch):
+        """Test batches above TRADES_MAX_BULK_SIZE are rejected"""
+        monkeypatch.setattr(settings, "TRADES_MAX_BULK_SIZE", 2)
+        response = client.post("/trades/bulk", json={
+            "trades": [new_trade(client_user.id) for _ in range(3)]
+        }, headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 400
+    
+    def test_requires_admin(self, client_token, client_user):
+        """Test clients cannot bulk create trades"""
+        response = client.post("/trades/bulk", json={
+            "trades": [new_trade(client_user.id)]
+        }, headers={"Authorization": f"Bearer {client_token}"})
+        assert response.status_code == 403
+
+
+class TestBulkClose:
+    """Test POST /trades/bulk-close"""
+    
+    def create(self, admin_token, client_user, count):
+        """Bulk create `count` open trades with take-profit levels and return their ids"""
+        response = client.post("/trades/bulk", json={
+            "trades": [new_trade(client_user.id, 100.0, take_profit=150.0) for _ in range(count)]
+        }, headers={"Authorization": f"Bearer {admin_token}"})
+        return [result["trade"]["id"] for result in response.json()["results"]]
+    
+    def test_partial_failure(self, admin_token, client_user, test_db):
+        """Test unknown, duplicate and already closed trades fail while the rest close"""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        first, second, third = self.create(admin_token, client_user, 3)
+        client.post(f"/trades/{third}/close?exit_price=90.0", headers=headers)
+        
+        response = client.post("/trades/bulk-close", json={"trades": [
+            {"trade_id": first, "exit_price": 130.0},
+            {"trade_id": "missing-trade", "exit_price": 130.0},
+            {"trade_id": second, "exit_price": 80.0},
+            {"trade_id": first, "exit_price": 140.0},
+            {"trade_id": third, "exit_price": 130.0},
+        ]}, headers=headers)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["succeeded"], data["failed"]) == (2, 3)
+        assert [result["error"] for result in data["results"]] == [
+            None, "Trade not found", None, "Duplicate trade in request", "Trade is already closed"
+        ]
+        assert data["results"][0]["trade"]["status"] == "CLOSED"
+        assert data["results"][0]["trade"]["exit_price"] == 130.0
+        
+        test_db.expire_all()
+        trade = test_db.get(Trade, first)
+        assert (trade.status, trade.exit_price) == (TradeStatus.CLOSED, 130.0)
+        assert trade.closed_at is not None
+        assert first not in trigger_engine._positions
+        
+        # 30 won, -20 lost on bulk close; -10 lost earlier
+        summary = client.get(f"/portfolio/{client_user.id}/summary", headers=headers).json()
+        assert summary["total_pnl"] == 0.0
+        assert check() == []
+    
+    def test_concurrent_close_is_not_applied_twice(self, admin_token, client_user, test_db):
+        """Test a trade closed after the batch loaded it is reported, not closed again"""
+        first, second = self.create(admin_token, client_user, 2)
+        closed = []
+        
+        def close_second_first(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE trades SET") and not closed:
+                closed.append(second)
+                test_db.execute(update(Trade).where(Trade.id == second).values(status=TradeStatus.CLOSED, exit_price=90.0))
+                test_db.commit()
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", close_second_first)
+        try:
+            response = client.post("/trades/bulk-close", json={"trades": [
+                {"trade_id": first, "exit_price": 130.0},
+                {"trade_id": second, "exit_price": 80.0},
+            ]}, headers={"Authorization": f"Bearer {admin_token}"})
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", close_second_first)
+        
+        data = response.json()
+        assert (data["succeeded"], data["failed"]) == (1, 1)
+        assert data["results"][1]["error"] == "Trade is already closed"
+        test_db.expire_all()
+        assert test_db.get(Trade, second).exit_price == 90.0
+        
+        # The concurrent close went around the ORM, so only the bulk close
+        # is in the aggregates: 30 won
+        summary = client.get(
+            f"/portfolio/{client_user.id}/summary", headers={"Authorization": f"Bearer {admin_token}"}
+        ).json()
+        assert summary["total_pnl"] == 30.0
+    
+    def test_atomic_rejects_batch(self, admin_token, client_user, test_db):
+        """Test atomic mode closes nothing when any item fails"""
+        (trade_id,) = self.create(admin_token, client_user, 1)
+        response = client.post("/trades/bulk-close?atomic=true", json={"trades": [
+            {"trade_id": trade_id, "exit_price": 130.0},
+            {"trade_id": "missing-trade", "exit_price": 130.0},
+        ]}, headers={"Authorization": f"Bearer {admin_token}"})
+        
+        assert response.status_code == 422
+        test_db.expire_all()
+        assert test_db.get(Trade, trade_id).status == TradeStatus.OPEN
+    
+    def test_query_count_is_constant(self, admin_token, client_user):
+        """Test closing a batch costs the same few queries regardless of its size"""
+        trade_ids = self.create(admin_token, client_user, 50)
+        response = client.post("/trades/bulk-close", json={
+            "trades": [{"trade_id": trade_id, "exit_price": 110.0} for trade_id in trade_ids]
+        }, headers={"Authorization": f"Bearer {admin_token}"})
+        
+        assert response.json()["succeeded"] == 50
+        assert_max_queries(response, 4)
+        assert check() == []
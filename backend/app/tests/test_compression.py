@@ -0,0 +1,139 @@
+import asyncio
+import gzip
+import secrets
+import time
+import zlib
+from fastapi.testclient import TestClient
+from starlette.responses import Response, StreamingResponse
+from app.main import app
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.models.models import Trade, TradeStatus, TradeType
+
+client = TestClient(app)
+
+
+def run_middleware(response, accept_encoding="gzip", **options):
+    """Send a request through CompressionMiddleware around `response` and collect the messages"""
+    middleware = CompressionMiddleware(response, **options)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+    messages = []
+    
+    async def receive():
+        # Streaming responses listen for a disconnect that never comes
+        await asyncio.Event().wait()
+    
+    async def send(message):
+        messages.append(message)
+    
+    asyncio.run(middleware(scope, receive, send))
+    headers = {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+    return headers, [message.get("body", b"") for message in messages[1:]]
+
+
+class TestNegotiation:
+    """Test Accept-Encoding parsing"""
+    
+    def test_preference_order_breaks_ties(self):
+        assert negotiate_encoding("gzip, br", ["br", "gzip"]) == "br"
+        assert negotiate_encoding("gzip, br", ["gzip", "br"]) == "gzip"
+    
+    def test_q_values(self):
+        assert negotiate_encoding("br;q=0.5, gzip;q=0.8", ["br", "gzip"]) == "gzip"
+        assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+        assert negotiate_encoding("*", ["br", "gzip"]) == "br"
+        assert negotiate_encoding("*;q=0.1, gzip;q=0", ["gzip"]) is None
+    
+    def test_unsupported_or_missing(self):
+        assert negotiate_encoding("", ["gzip"]) is None
+        assert negotiate_encoding("identity", ["gzip"]) is None
+        assert negotiate_encoding("deflate, compress", ["br", "gzip"]) is None
+
+
+class TestCompressionMiddleware:
+    """Test which responses are compressed and how"""
+    
+    def test_compresses_large_body(self):
+        """Test a complete body over the threshold is gzipped with a matching Content-Length"""
+        body = b'{"items":[' + b",".join(b'{"coin":"bitcoin","price":45000.0}' for _ in range(200)) + b"]}"
+        headers, chunks = run_middleware(
+            Response(body, media_type="application/json", headers={"ETag": '"v1"'}),
+            minimum_size=100
+        )
+        assert headers["content-encoding"] == "gzip"
+        assert headers["vary"] == "Accept-Encoding"
+        assert headers["etag"] == 'W/"v1"'
+        assert int(headers["content-length"]) == len(chunks[0]) < len(body) // 5
+        assert gzip.decompress(chunks[0]) == body
+    
+    def test_skips_small_body(self):
+        """Test bodies under the threshold are sent unchanged"""
+        headers, chunks = run_middleware(Response(b'{"ok":true}', media_type="application/json"), minimum_size=100)
+        assert "content-encoding" not in headers
+        assert chunks == [b'{"ok":true}']
+    
+    def test_skips_binary_and_unaccepted(self):
+        """Test non-text content and clients without a usable encoding get identity"""
+        headers, _ = run_middleware(Response(b"\x89PNG" * 500, media_type="image/png"), minimum_size=10)
+        assert "content-encoding" not in headers
+        headers, _ = run_middleware(Response(b"x" * 5000, media_type="text/plain"), accept_encoding="identity")
+        assert "content-encoding" not in headers
+    
+    def test_streams_without_buffering(self):
+        """Test each streamed chunk is compressed and decodable as it is sent"""
+        lines = [f'{{"row":{i},"coin":"bitcoin"}}\n'.encode() * 50 for i in range(5)]
+        
+        async def produce():
+            for line in lines:
+                yield line
+        
+        headers, chunks = run_middleware(
+            StreamingResponse(produce(), media_type="application/x-ndjson"),
+            minimum_size=10_000
+        )
+        assert headers["content-encoding"] == "gzip"
+        assert "content-length" not in headers
+        
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        received = [decoder.decompress(chunk) for chunk in chunks]
+        assert received[:len(lines)] == lines
+        assert b"".join(received) + decoder.flush() == b"".join(lines)
+
+
+class TestAppCompression:
+    """Test compression on real API responses"""
+    
+    def test_trade_list_is_compressed(self, admin_token, client_user, test_db):
+        """Test a large trade list is served gzipped and decodes to the same JSON"""
+        now = int(time.time() * 1000)
+        test_db.add_all([
+            Trade(
+                id=secrets.token_urlsafe(16),
+                client_id=client_user.id,
+                coin_id="bitcoin",
+                coin_symbol="BTC",
+                entry_price=45000.0 + i,
+                quantity=0.5,
+                type=TradeType.LONG,
+                status=TradeStatus.OPEN,
+                timestamp=now + i
+            )
+            for i in range(50)
+        ])
+        test_db.commit()
+        
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        compressed = client.get("/trades/", headers={**headers, "Accept-Encoding": "gzip"})
+        plain = client.get("/trades/", headers={**headers, "Accept-Encoding": "identity"})
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert "content-encoding" not in plain.headers
+        assert compressed.json() == plain.json()
+        assert any(value.startswith("db;") for value in compressed.headers.get_list("server-timing"))
+    
+    def test_small_response_is_not_compressed(self):
+        response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
@@ -0,0 +1,134 @@
+import pytest
+import random
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.models.models import PriceCandle, PriceTick, TradeType
+from app.tests.conftest import assert_max_queries
+
+client = TestClient(app)
+
+# 2024-01-01T00:00:00Z
+T0 = 1_704_067_200_000
+HOUR = 3_600_000
+
+
+def get_equity(token, user_id, **params):
+    return client.get(f"/portfolio/{user_id}/equity", params=params, headers={"Authorization": f"Bearer {token}"})
+
+
+def loop_balance(initial_deposit, trades, ticks, at):
+    """Balance at `at` by re-scanning every trade, marked with the latest tick at or before `at`"""
+    balance = initial_deposit
+    for trade in trades:
+        if trade.timestamp > at:
+            continue
+        sign = 1 if trade.type == TradeType.LONG else -1
+        if trade.closed_at is not None and trade.closed_at <= at:
+            balance += sign * (trade.exit_price - trade.entry_price) * trade.quantity
+            continue
+        seen = [tick for tick in ticks if tick.coin_id == trade.coin_id and tick.timestamp <= at]
+        if seen:
+            price = max(seen, key=lambda tick: tick.timestamp).price
+            balance += sign * (price - trade.entry_price) * trade.quantity
+    return balance
+
+
+class TestPortfolioEquity:
+    """Test GET /portfolio/{user_id}/equity"""
+    
+    def test_hourly_curve(self, admin_token, client_user, test_db, make_trade):
+        """Test balances from closed trades and hourly candles, worked by hand"""
+        test_db.add_all([
+            # +50 realized once closed at T0+3h
+            make_trade(client_user.id, "bitcoin", timestamp=T0 + HOUR, exit_price=150.0, closed_at=T0 + 3 * HOUR),
+            make_trade(client_user.id, "ethereum", type=TradeType.SHORT, entry_price=50.0, quantity=2.0, timestamp=T0 + 2 * HOUR),
+            # Opened after the range: never counted
+            make_trade(client_user.id, "ethereum", entry_price=1.0, quantity=1000.0, timestamp=T0 + 10 * HOUR),
+        ])
+        # Hourly closes, each known once its hour is over
+        closes = {"bitcoin": [110.0, 120.0, 130.0, 140.0], "ethereum": [40.0, 45.0, 55.0, 60.0]}
+        test_db.add_all([
+            PriceCandle(coin_id=coin_id, resolution=HOUR, bucket_start=T0 + i * HOUR, open=close, high=close, low=close, close=close)
+            for coin_id, values in closes.items()
+            for i, close in enumerate(values)
+        ])
+        test_db.commit()
+        
+        response = get_equity(admin_token, client_user.id, **{"from": T0, "to": T0 + 4 * HOUR, "step": HOUR})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["resolution"] == "1h"
+        assert [point["timestamp"] for point in data["points"]] == [T0 + i * HOUR for i in range(5)]
+        assert [point["balance"] for point in data["points"]] == [
+            10000.0,
+            # Long marked at the T0 close
+            10000.0 + (110.0 - 100.0),
+            # Short opened, marked at the T0+1h close
+            10000.0 + (120.0 - 100.0) + 2 * (50.0 - 45.0),
+            # Long closed at 150
+            10000.0 + 50.0 + 2 * (50.0 - 55.0),
+            10000.0 + 50.0 + 2 * (50.0 - 60.0),
+        ]
+    
+    def test_matches_per_point_loop(self, admin_token, client_user, test_db, make_trade):
+        """Test random trades and ticks against re-scanning every trade per point"""
+        rng = random.Random(8)
+        coins = ["bitcoin", "ethereum", "solana"]
+        ticks = [
+            PriceTick(coin_id=coin_id, timestamp=T0 + rng.randrange(2 * HOUR), price=rng.uniform(50, 150))
+            for coin_id in coins
+            for _ in range(40)
+        ]
+        trades = []
+        for _ in range(100):
+            opened_at = T0 + rng.randrange(2 * HOUR)
+            closed = rng.random() < 0.5
+            trades.append(make_trade(
+                client_user.id,
+                rng.choice(coins),
+                type=rng.choice([TradeType.LONG, TradeType.SHORT]),
+                entry_price=rng.uniform(50, 150),
+                quantity=rng.uniform(0.1, 3),
+                timestamp=opened_at,
+                exit_price=rng.uniform(50, 150) if closed else None,
+                closed_at=opened_at + rng.randrange(HOUR) if closed else None
+            ))
+        test_db.add_all(ticks + trades)
+        test_db.commit()
+        
+        response = get_equity(admin_token, client_user.id, **{"from": T0 - 45_000, "to": T0 + 2 * HOUR, "step": 45_000})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["resolution"] == "tick"
+        assert len(data["points"]) == 162
+        for point in data["points"]:
+            assert point["balance"] == pytest.approx(loop_balance(10000.0, trades, ticks, point["timestamp"]))
+    
+    def test_query_count_is_constant(self, admin_token, client_user, test_db, make_trade):
+        test_db.add_all([
+            make_trade(client_user.id, f"coin-{i}", entry_price=10.0, timestamp=T0 + i)
+            for i in range(20)
+        ])
+        test_db.commit()
+        
+        response = get_equity(admin_token, client_user.id, **{"from": T0, "to": T0 + 24 * HOUR})
+        assert response.status_code == 200
+        assert len(response.json()["points"]) == 25
+        assert_max_queries(response, 6)
+    
+    def test_no_trades_is_flat(self, client_token, client_user):
+        response = get_equity(client_token, client_user.id, **{"from": T0, "to": T0 + HOUR, "step": 60_000})
+        assert response.status_code == 200
+        assert {point["balance"] for point in response.json()["points"]} == {10000.0}
+    
+    def test_point_limit(self, admin_token, client_user):
+        too_long = (settings.PORTFOLIO_EQUITY_MAX_POINTS + 1) * 1000
+        assert get_equity(admin_token, client_user.id, **{"from": T0, "to": T0 + too_long, "step": 1000}).status_code == 400
+        assert get_equity(admin_token, client_user.id, **{"from": T0, "to": T0 - 1}).status_code == 400
+    
+    def test_client_cannot_view_other_equity(self, client_token, admin_user):
+        assert get_equity(client_token, admin_user.id, **{"from": T0}).status_code == 403
+    
+    def test_nonexistent_user(self, admin_token):
+        assert get_equity(admin_token, "nonexistent", **{"from": T0, "to": T0 + HOUR}).status_code == 404
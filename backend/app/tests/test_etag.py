@@ -0,0 +1,188 @@
+import secrets
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.api import portfolio
+from app.models.models import Announcement, Reply, Trade, TradeStatus, TradeType
+from app.tests.conftest import async_engine
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def statements():
+    """SQL statements the API runs during the test"""
+    captured = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+
+@pytest.fixture
+def trades(test_db, client_user):
+    """A few trades for the client, oldest first"""
+    now = int(time.time() * 1000)
+    ids = []
+    for i in range(3):
+        trade = Trade(
+            id=secrets.token_urlsafe(16),
+            client_id=client_user.id,
+            coin_id="bitcoin",
+            coin_symbol="BTC",
+            entry_price=100.0 + i,
+            quantity=1.0,
+            type=TradeType.LONG,
+            status=TradeStatus.OPEN,
+            timestamp=now + i
+        )
+        test_db.add(trade)
+        ids.append(trade.id)
+    test_db.commit()
+    return ids
+
+
+def get(path, token, etag=None):
+    """GET with an optional If-None-Match"""
+    headers = {"Authorization": f"Bearer {token}"}
+    if etag is not None:
+        headers["If-None-Match"] = etag
+    return client.get(path, headers=headers)
+
+
+def full_trade_selects(statements):
+    """Statements that load whole trade rows (the expensive path)"""
+    return [statement for statement in statements if "trades.entry_price" in statement]
+
+
+class TestTradeListETag:
+    """Test conditional GET on the trade list"""
+    
+    def test_not_modified_skips_full_query(self, client_token, trades, statements):
+        """Test a matching If-None-Match gets an empty 304 without loading trades"""
+        first = get("/trades/", client_token)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert etag.startswith('W/"')
+        assert first.headers["cache-control"] == "private, no-cache"
+        
+        statements.clear()
+        second = get("/trades/", client_token, etag)
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+        assert full_trade_selects(statements) == []
+    
+    def test_changed_list_is_resent(self, admin_token, client_token, trades, statements):
+        """Test an update or delete invalidates the tag"""
+        etag = get("/trades/", client_token).headers["etag"]
+        
+        time.sleep(0.002)
+        client.put(f"/trades/{trades[0]}", json={"notes": "edited"}, headers={"Authorization": f"Bearer {admin_token}"})
+        response = get("/trades/", client_token, etag)
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        
+        etag = response.headers["etag"]
+        client.delete(f"/trades/{trades[1]}", headers={"Authorization": f"Bearer {admin_token}"})
+        response = get("/trades/", client_token, etag)
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+    
+    def test_page_etag(self, admin_token, client_token, trades, statements):
+        """Test pages are tagged by their rows and skip the full query when unchanged"""
+        etag = get("/trades/?limit=2", client_token).headers["etag"]
+        
+        statements.clear()
+        assert get("/trades/?limit=2", client_token, etag).status_code == 304
+        assert full_trade_selects(statements) == []
+        
+        # Deleting a row of the page shifts the next one in
+        client.delete(f"/trades/{trades[2]}", headers={"Authorization": f"Bearer {admin_token}"})
+        assert get("/trades/?limit=2", client_token, etag).status_code == 200
+    
+    def test_tags_differ_per_scope(self, admin_token, client_token, trades):
+        """Test the same URL yields different tags for differently scoped callers"""
+        assert get("/trades/", client_token).headers["etag"] != get("/trades/", admin_token).headers["etag"]
+    
+    def test_if_none_match_lists(self, client_token, trades):
+        """Test any tag of a list, weak or strong, can match"""
+        etag = get("/trades/", client_token).headers["etag"]
+        strong = etag.removeprefix("W/")
+        assert get("/trades/", client_token, f'"stale", {strong}').status_code == 304
+        assert get("/trades/", client_token, "*").status_code == 304
+
+
+class TestAnnouncementETag:
+    """Test conditional GET on announcements and replies"""
+    
+    def test_announcements(self, client_token, admin_user, test_db, statements):
+        """Test announcements are served as 304 until one is added"""
+        etag = get("/announcements/", client_token).headers["etag"]
+        
+        statements.clear()
+        assert get("/announcements/", client_token, etag).status_code == 304
+        assert not any("announcements.content" in statement for statement in statements)
+        
+        client.post("/announcements/", json={"title": "News", "content": "Body"}, headers={"Authorization": f"Bearer {client_token}"})
+        assert get("/announcements/", client_token, etag).status_code == 200
+    
+    def test_replies(self, client_token, client_user, admin_user, test_db, statements):
+        """Test replies are served as 304 until one is added"""
+        announcement = Announcement(
+            id=secrets.token_urlsafe(16),
+            title="NEWS",
+            content="Body",
+            author_id=admin_user.id,
+            timestamp=int(time.time() * 1000)
+        )
+        test_db.add(announcement)
+        test_db.add(Reply(
+            id=secrets.token_urlsafe(16),
+            announcement_id=announcement.id,
+            user_id=client_user.id,
+            user_name=client_user.name,
+            content="First",
+            timestamp=int(time.time() * 1000)
+        ))
+        test_db.commit()
+        path = f"/announcements/{announcement.id}/replies"
+        etag = get(path, client_token).headers["etag"]
+        
+        statements.clear()
+        assert get(path, client_token, etag).status_code == 304
+        assert not any("replies.content" in statement for statement in statements)
+        
+        client.post(path, json={"announcement_id": announcement.id, "content": "Second"}, headers={"Authorization": f"Bearer {client_token}"})
+        assert get(path, client_token, etag).status_code == 200
+
+
+class TestPortfolioSummaryETag:
+    """Test conditional GET on the portfolio summary"""
+    
+    def test_not_modified_skips_aggregation(self, client_token, client_user, trades, monkeypatch):
+        """Test a 304 is answered without computing the aggregates"""
+        path = f"/portfolio/{client_user.id}/summary"
+        etag = get(path, client_token).headers["etag"]
+        
+        async def fail(*args, **kwargs):
+            raise AssertionError("aggregates computed for a 304")
+        
+        monkeypatch.setattr(portfolio, "get_portfolio_aggregates", fail)
+        assert get(path, client_token, etag).status_code == 304
+    
+    def test_price_mark_invalidates(self, admin_token, client_token, client_user, trades):
+        """Test a new current_price on an open trade changes the tag"""
+        path = f"/portfolio/{client_user.id}/summary"
+        etag = get(path, client_token).headers["etag"]
+        
+        time.sleep(0.002)
+        client.put(f"/trades/{trades[0]}", json={"current_price": 150.0}, headers={"Authorization": f"Bearer {admin_token}"})
+        response = get(path, client_token, etag)
+        assert response.status_code == 200
+        assert response.json()["total_pnl"] == 50.0
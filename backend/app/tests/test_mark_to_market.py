@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from app.models.models import Trade, TradeStatus
+from app.services.mark_to_market import apply_prices, mark_to_market, MarkToMarketWorker
+from app.services.triggers import TriggerEngine
+from app.tests.conftest import AsyncTestingSessionLocal, metric_value
+
+
+async def run_mark_to_market(service):
+    async with AsyncTestingSessionLocal() as db:
+        return await mark_to_market(db, service)
+
+
+class TestMarkToMarket:
+    """Test bulk mark-to-market of open trades"""
+    
+    def test_updates_open_trades_only(self, client_user, test_db, price_stub, price_service, make_trade):
+        """Test open trades get the latest quote and closed trades are untouched"""
+        open_btc = [make_trade(client_user.id, "bitcoin") for _ in range(3)]
+        open_eth = make_trade(client_user.id, "ethereum", current_price=3000.0)
+        closed_btc = make_trade(client_user.id, "bitcoin", exit_price=110.0)
+        test_db.add_all(open_btc + [open_eth, closed_btc])
+        test_db.commit()
+        price_stub.prices = {"bitcoin": 50000.0, "ethereum": 3000.0}
+        
+        result = asyncio.run(run_mark_to_market(price_service))
+        
+        # ethereum already carries the quoted price, so only bitcoin rows change
+        assert result.coins == 2
+        assert result.rows_updated == 3
+        assert metric_value("mark_to_market_last_rows_updated") == 3
+        assert metric_value("mark_to_market_lag_seconds") >= 0
+        
+        test_db.expire_all()
+        assert all(t.current_price == 50000.0 for t in open_btc)
+        assert open_eth.current_price == 3000.0
+        assert closed_btc.current_price is None
+        assert price_stub.requests == [["bitcoin", "ethereum"]]
+    
+    def test_apply_prices_in_batches(self, client_user, test_db, make_trade):
+        """Test coins split across several UPDATE batches are all applied"""
+        coins = [f"coin-{i}" for i in range(5)]
+        test_db.add_all([make_trade(client_user.id, coin_id) for coin_id in coins])
+        test_db.commit()
+        
+        async def run():
+            async with AsyncTestingSessionLocal() as db:
+                rows = await apply_prices(db, {coin_id: float(i) for i, coin_id in enumerate(coins)}, batch_size=2)
+                await db.commit()
+                return rows
+        
+        assert asyncio.run(run()) == 5
+        prices = {t.coin_id: t.current_price for t in test_db.query(Trade).all()}
+        assert prices == {coin_id: float(i) for i, coin_id in enumerate(coins)}
+    
+    def test_worker_fires_triggers_set_elsewhere(self, client_user, test_db, price_stub, price_service, make_trade):
+        """Test the mark_to_market.py worker loads trigger levels written by other processes"""
+        trade = make_trade(client_user.id, "bitcoin", take_profit=120.0)
+        test_db.add(trade)
+        test_db.commit()
+        price_stub.prices = {"bitcoin": 125.0}
+        before = metric_value("mark_to_market_runs_total", outcome="success")
+        
+        worker = MarkToMarketWorker(
+            interval=60, prices=price_service, triggers=TriggerEngine(), session_factory=AsyncTestingSessionLocal
+        )
+        result = asyncio.run(worker.run_once())
+        assert (result.rows_updated, result.triggers_fired) == (1, 1)
+        assert metric_value("mark_to_market_runs_total", outcome="success") == before + 1
+        
+        test_db.expire_all()
+        assert (trade.status, trade.exit_price) == (TradeStatus.CLOSED, 125.0)
+    
+    def test_worker_survives_price_feed_errors(self, client_user, test_db, price_stub, price_service, make_trade):
+        """Test a failing price feed is counted and does not raise"""
+        test_db.add(make_trade(client_user.id, "bitcoin"))
+        test_db.commit()
+        price_stub.fail = True
+        before = metric_value("mark_to_market_runs_total", outcome="price_error")
+        
+        worker = MarkToMarketWorker(interval=60, prices=price_service, session_factory=AsyncTestingSessionLocal)
+        assert asyncio.run(worker.run_once()) is None
+        assert metric_value("mark_to_market_runs_total", outcome="price_error") == before + 1
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+import time
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from app.main import app
+from app.core.database import instrumented_pool_class
+from app.core.metrics import generate_latest, mark_dead_processes
+from app.core.runtime_metrics import RuntimeMetricsWorker
+from app.tests.conftest import metric_value
+
+client = TestClient(app)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# A worker process: counts three requests, then holds one in flight
+WORKER_SCRIPT = textwrap.dedent("""
+    import os, signal, sys
+    from app.core.metrics import mark_process_dead
+    from app.core.middleware import http_requests, http_requests_in_flight
+
+    http_requests.labels(method="GET", route="/a", status="200").inc(3)
+    http_requests_in_flight.labels(method="GET", route="/a").inc()
+    if sys.argv[1] == "kill":
+        os.kill(os.getpid(), signal.SIGKILL)
+    print("ready", flush=True)
+    sys.stdin.readline()
+    mark_process_dead()
+""")
+
+
+class TestMetricsEndpoint:
+    """Test the /metrics endpoint and request instrumentation"""
+
+    def test_metrics_exposition(self):
+        """Test metrics are served in the Prometheus text format"""
+        client.get("/health")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE http_requests_total counter" in response.text
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+        assert 'http_requests_total{method="GET",route="/health",status="200"}' in response.text
+        assert 'http_request_duration_seconds_bucket{le="+Inf",method="GET",route="/health"}' in response.text
+
+    def test_requests_labelled_by_route_template(self, admin_token):
+        """Test path parameters are collapsed into the route template"""
+        labels = {"method": "GET", "route": "/trades/{trade_id}"}
+        before = metric_value("http_requests_total", status="404", **labels)
+        for trade_id in ("missing-1", "missing-2"):
+            response = client.get(f"/trades/{trade_id}", headers={"Authorization": f"Bearer {admin_token}"})
+            assert response.status_code == 404
+
+        assert metric_value("http_requests_total", status="404", **labels) == before + 2
+        assert metric_value("http_request_duration_seconds_count", **labels) >= 2
+        assert metric_value("http_requests_in_flight", **labels) == 0
+
+    def test_unmatched_requests_share_a_label(self):
+        """Test unknown URLs do not create a series per path"""
+        labels = {"method": "GET", "route": "unmatched", "status": "404"}
+        before = metric_value("http_requests_total", **labels)
+        client.get("/no/such/path/1")
+        client.get("/no/such/path/2")
+        assert metric_value("http_requests_total", **labels) == before + 2
+
+    def test_pool_checkout_wait(self):
+        """Test connection checkouts from the instrumented pool are timed"""
+        url = "sqlite://"
+        engine = create_engine(url, poolclass=instrumented_pool_class(url, "test"))
+        before = metric_value("db_pool_checkout_wait_seconds_count", pool="test")
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        engine.dispose()
+        assert metric_value("db_pool_checkout_wait_seconds_count", pool="test") == before + 1
+
+    def test_event_loop_lag(self):
+        """Test a blocked event loop shows up as lag"""
+        worker = RuntimeMetricsWorker(interval=0.01)
+
+        async def block_loop():
+            worker.start()
+            await asyncio.sleep(0.02)
+            time.sleep(0.2)
+            await asyncio.sleep(0.05)
+            await worker.stop()
+
+        asyncio.run(block_loop())
+        assert metric_value("event_loop_last_lag_seconds") < 1.0
+        assert metric_value("event_loop_lag_seconds_sum") >= 0.15
+
+
+class TestMultiprocessMetrics:
+    """Test aggregation of metrics written by several worker processes"""
+
+    def start_worker(self, directory, mode):
+        return subprocess.Popen(
+            [sys.executable, "-c", WORKER_SCRIPT, mode],
+            cwd=BACKEND_DIR,
+            env={**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(directory)},
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True
+        )
+
+    def test_workers_are_aggregated(self, tmp_path, monkeypatch):
+        """Test counters survive a killed worker and gauges only count live workers"""
+        killed = self.start_worker(tmp_path, "kill")
+        killed.wait(timeout=60)
+        live = self.start_worker(tmp_path, "live")
+        assert live.stdout.readline().strip() == "ready"
+
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        try:
+            mark_dead_processes()
+            output = generate_latest().decode()
+            assert 'http_requests_total{method="GET",route="/a",status="200"} 6.0' in output
+            assert 'http_requests_in_flight{method="GET",route="/a"} 1.0' in output
+        finally:
+            live.communicate("\n", timeout=60)
+
+        # A worker that shuts down cleanly drops its gauges but keeps its counts
+        output = generate_latest().decode()
+        assert 'http_requests_total{method="GET",route="/a",status="200"} 6.0' in output
+        assert 'http_requests_in_flight{method="GET",route="/a"}' not in output
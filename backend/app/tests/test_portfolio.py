@@ -162,3 +162,162 @@ class TestPortfolioEndpoints:
             headers={"Authorization": f"Bearer {admin_token}"}
         )
         assert response.status_code == 404
+    
+    def test_portfolio_summary_matches_python_loop(self, admin_token, client_user, test_db):
+        """Test SQL aggregation gives the same numbers as iterating trades in Python"""
+        from app.models.models import Trade, TradeStatus, TradeType
+        import random
+        import secrets
+        import time
+        
+        rng = random.Random(42)
+        trades = []
+        for _ in range(200):
+            status = rng.choice([TradeStatus.OPEN, TradeStatus.CLOSED])
+            entry_price = round(rng.uniform(1, 50000), 2)
+            trades.append(Trade(
+                id=secrets.token_urlsafe(16),
+                client_id=client_user.id,
+                coin_id="bitcoin",
+                coin_symbol="BTC",
+                entry_price=entry_price,
+                current_price=rng.choice([None, round(entry_price * rng.uniform(0.5, 1.5), 2)]),
+                exit_price=round(entry_price * rng.uniform(0.5, 1.5), 2) if status == TradeStatus.CLOSED else None,
+                quantity=round(rng.uniform(0.01, 5), 4),
+                type=rng.choice([TradeType.LONG, TradeType.SHORT]),
+                status=status,
+                timestamp=int(time.time() * 1000)
+            ))
+        test_db.add_all(trades)
+        test_db.commit()
+        
+        # Reference: the original per-trade Python loop
+        realized_pnl = unrealized_pnl = total_invested = 0.0
+        win_count = closed_count = open_count = 0
+        for trade in trades:
+            price = trade.exit_price if trade.status == TradeStatus.CLOSED else (trade.current_price or trade.entry_price)
+            diff = price - trade.entry_price if trade.type == TradeType.LONG else trade.entry_price - price
+            pnl = diff * trade.quantity
+            if trade.status == TradeStatus.CLOSED:
+                realized_pnl += pnl
+                closed_count += 1
+                if pnl > 0:
+                    win_count += 1
+            else:
+                unrealized_pnl += pnl
+                total_invested += trade.entry_price * trade.quantity
+                open_count += 1
+        total_pnl = realized_pnl + unrealized_pnl
+        
+        response = client.get(
+            f"/portfolio/{client_user.id}/summary",
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["open_trades_count"] == open_count
+        assert data["total_invested"] == pytest.approx(total_invested)
+        assert data["total_pnl"] == pytest.approx(total_pnl)
+        assert data["current_balance"] == pytest.approx(10000 + total_pnl)
+        assert data["roi"] == pytest.approx(total_pnl / 10000 * 100)
+        assert data["win_rate"] == pytest.approx(win_count / closed_count * 100)
+
+
+class TestPortfolioOverview:
+    """Test the admin all-clients portfolio overview"""
+    
+    def add_clients(self, test_db, count):
+        """Clients with random trades (every third has none) and varied deposits"""
+        from app.models.models import Trade, TradeStatus, TradeType, User, UserRole
+        import random
+        import secrets
+        import time
+        
+        rng = random.Random(11)
+        clients = []
+        for i in range(count):
+            user = User(
+                id=secrets.token_urlsafe(16),
+                email=f"overview{i}@test.com",
+                name=f"Client {rng.randrange(1000):03d}",
+                hashed_password="x",
+                role=UserRole.CLIENT,
+                initial_deposit=rng.choice([0.0, 1000.0, 10000.0])
+            )
+            clients.append(user)
+            test_db.add(user)
+            for _ in range(0 if i % 3 == 0 else rng.randrange(1, 8)):
+                status = rng.choice([TradeStatus.OPEN, TradeStatus.CLOSED])
+                entry_price = rng.uniform(1, 500)
+                test_db.add(Trade(
+                    id=secrets.token_urlsafe(16),
+                    client_id=user.id,
+                    coin_id=rng.choice(["bitcoin", "ethereum", "solana"]),
+                    coin_symbol="BTC",
+                    entry_price=entry_price,
+                    current_price=rng.choice([None, entry_price * rng.uniform(0.5, 1.5)]),
+                    exit_price=entry_price * rng.uniform(0.5, 1.5) if status == TradeStatus.CLOSED else None,
+                    quantity=rng.uniform(0.1, 5),
+                    type=rng.choice([TradeType.LONG, TradeType.SHORT]),
+                    status=status,
+                    timestamp=int(time.time() * 1000)
+                ))
+        test_db.commit()
+        return clients
+    
+    def get_overview(self, token, **params):
+        return client.get("/portfolio/overview", params=params, headers={"Authorization": f"Bearer {token}"})
+    
+    def all_pages(self, token, **params):
+        items, cursor = [], None
+        while True:
+            response = self.get_overview(token, **params, **({"cursor": cursor} if cursor else {}))
+            assert response.status_code == 200
+            page = response.json()
+            items.extend(page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return items
+    
+    def test_overview_matches_summaries(self, admin_token, client_user, test_db):
+        """Test every client (and no admin) is listed with exactly their summary metrics"""
+        from app.tests.conftest import assert_max_queries
+        
+        clients = self.add_clients(test_db, 12) + [client_user]
+        response = self.get_overview(admin_token, limit=100)
+        assert response.status_code == 200
+        assert_max_queries(response, 2)
+        rows = {row["id"]: row for row in response.json()["items"]}
+        assert set(rows) == {user.id for user in clients}
+        
+        for user in clients:
+            summary = client.get(
+                f"/portfolio/{user.id}/summary",
+                headers={"Authorization": f"Bearer {admin_token}"}
+            ).json()
+            assert rows[user.id] == {"id": user.id, "name": user.name, "email": user.email, **summary}
+    
+    def test_sorted_pages(self, admin_token, test_db):
+        """Test walking the pages in every order visits each client once, in sort order"""
+        self.add_clients(test_db, 13)
+        expected = self.get_overview(admin_token, limit=100).json()["items"]
+        
+        for sort in ("roi", "name", "open_trades_count"):
+            for order in ("asc", "desc"):
+                items = self.all_pages(admin_token, sort=sort, order=order, limit=4)
+                ordered = sorted(expected, key=lambda row: (row[sort], row["id"]), reverse=order == "desc")
+                assert [row["id"] for row in items] == [row["id"] for row in ordered]
+    
+    def test_default_sort_is_richest_first(self, admin_token, test_db):
+        self.add_clients(test_db, 5)
+        items = self.get_overview(admin_token).json()["items"]
+        balances = [row["current_balance"] for row in items]
+        assert balances == sorted(balances, reverse=True)
+    
+    def test_invalid_cursor(self, admin_token):
+        assert self.get_overview(admin_token, cursor="not-a-cursor").status_code == 400
+        from app.core.pagination import encode_cursor
+        assert self.get_overview(admin_token, sort="roi", cursor=encode_cursor("abc", "id")).status_code == 400
+    
+    def test_requires_admin(self, client_token):
+        assert self.get_overview(client_token).status_code == 403
@@ -0,0 +1,177 @@
+import asyncio
+import secrets
+import time
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+from app.main import app
+from app.models.models import PortfolioAggregate, Trade, TradeStatus, TradeType
+from app.services.portfolio_aggregates import check_portfolio_aggregates, rebuild_portfolio_aggregates
+from app.services.triggers import TriggerEngine
+from app.tests.conftest import AsyncTestingSessionLocal
+
+client = TestClient(app)
+
+
+def check():
+    """Mismatches between stored aggregates and a recomputation from trades"""
+    async def run():
+        async with AsyncTestingSessionLocal() as db:
+            return await check_portfolio_aggregates(db)
+    return asyncio.run(run())
+
+
+def aggregate(test_db, client_id, coin_id):
+    """Current aggregate row of a client and coin"""
+    test_db.expire_all()
+    return test_db.scalar(select(PortfolioAggregate).where(
+        PortfolioAggregate.client_id == client_id,
+        PortfolioAggregate.coin_id == coin_id
+    ))
+
+
+class TestAggregateMaintenance:
+    """Test trade writes keep portfolio_aggregates consistent"""
+    
+    def test_trade_lifecycle(self, admin_token, client_user, test_db):
+        """Test create, update, close and delete adjust the per-coin totals"""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        created = []
+        for entry_price in (100.0, 200.0):
+            response = client.post("/trades/", json={
+                "client_id": client_user.id,
+                "coin_id": "bitcoin",
+                "coin_symbol": "BTC",
+                "entry_price": entry_price,
+                "quantity": 2.0,
+                "type": "LONG"
+            }, headers=headers)
+            created.append(response.json()["id"])
+        
+        row = aggregate(test_db, client_user.id, "bitcoin")
+        assert (row.open_count, row.open_notional, row.open_quantity) == (2, 600.0, 4.0)
+        
+        # Price marks do not touch the aggregates; closing moves a trade to realized
+        client.put(f"/trades/{created[0]}", json={"current_price": 150.0}, headers=headers)
+        client.post(f"/trades/{created[0]}/close?exit_price=130.0", headers=headers)
+        row = aggregate(test_db, client_user.id, "bitcoin")
+        assert (row.open_count, row.open_notional, row.open_quantity) == (1, 400.0, 2.0)
+        assert (row.closed_count, row.win_count, row.realized_pnl) == (1, 1, 60.0)
+        
+        # Correcting the exit price of a closed trade re-derives its PnL
+        client.put(f"/trades/{created[0]}", json={"exit_price": 90.0}, headers=headers)
+        row = aggregate(test_db, client_user.id, "bitcoin")
+        assert (row.closed_count, row.win_count, row.realized_pnl) == (1, 0, -20.0)
+        
+        client.delete(f"/trades/{created[1]}", headers=headers)
+        row = aggregate(test_db, client_user.id, "bitcoin")
+        assert (row.open_count, row.open_notional, row.open_quantity) == (0, 0.0, 0.0)
+        assert check() == []
+    
+    def test_direct_orm_writes(self, client_user, test_db):
+        """Test trades written outside the API (scripts, fixtures) are tracked too"""
+        trade = Trade(
+            id=secrets.token_urlsafe(16),
+            client_id=client_user.id,
+            coin_id="ethereum",
+            coin_symbol="ETH",
+            entry_price=2000.0,
+            quantity=1.0,
+            type=TradeType.SHORT,
+            status=TradeStatus.OPEN,
+            timestamp=int(time.time() * 1000)
+        )
+        test_db.add(trade)
+        test_db.commit()
+        
+        # Expired after commit: the old status must still be known
+        trade.status = TradeStatus.CLOSED
+        trade.exit_price = 1800.0
+        test_db.commit()
+        
+        row = aggregate(test_db, client_user.id, "ethereum")
+        assert (row.open_count, row.closed_count, row.realized_pnl) == (0, 1, 200.0)
+        assert check() == []
+    
+    def test_triggered_closes(self, client_user, test_db):
+        """Test trades closed by take-profit triggers move to realized PnL"""
+        trade = Trade(
+            id=secrets.token_urlsafe(16),
+            client_id=client_user.id,
+            coin_id="bitcoin",
+            coin_symbol="BTC",
+            entry_price=100.0,
+            quantity=3.0,
+            take_profit=110.0,
+            type=TradeType.LONG,
+            status=TradeStatus.OPEN,
+            timestamp=int(time.time() * 1000)
+        )
+        test_db.add(trade)
+        test_db.commit()
+        engine = TriggerEngine()
+        
+        async def run():
+            async with AsyncTestingSessionLocal() as db:
+                await engine.load(db)
+                await engine.process_ticks(db, {"bitcoin": 115.0})
+                await db.commit()
+        
+        asyncio.run(run())
+        row = aggregate(test_db, client_user.id, "bitcoin")
+        assert (row.open_count, row.closed_count, row.realized_pnl) == (0, 1, 45.0)
+        assert check() == []
+    
+    def test_deleting_client_removes_aggregates(self, admin_token, client_user, test_db):
+        """Test a deleted client's aggregate rows go with it"""
+        client.post("/trades/", json={
+            "client_id": client_user.id,
+            "coin_id": "bitcoin",
+            "coin_symbol": "BTC",
+            "entry_price": 100.0,
+            "quantity": 1.0,
+            "type": "LONG"
+        }, headers={"Authorization": f"Bearer {admin_token}"})
+        
+        response = client.delete(f"/auth/users/{client_user.id}", headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 204
+        assert aggregate(test_db, client_user.id, "bitcoin") is None
+
+
+class TestAggregateRepair:
+    """Test the consistency checker and rebuild"""
+    
+    def test_check_and_rebuild(self, admin_token, client_user, test_db):
+        """Test drift is reported, served by the summary, and fixed by a rebuild"""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = client.post("/trades/", json={
+            "client_id": client_user.id,
+            "coin_id": "bitcoin",
+            "coin_symbol": "BTC",
+            "entry_price": 100.0,
+            "quantity": 1.0,
+            "type": "LONG"
+        }, headers=headers)
+        client.post(f"/trades/{response.json()['id']}/close?exit_price=150.0", headers=headers)
+        
+        test_db.execute(update(PortfolioAggregate).values(realized_pnl=999.0, win_count=0))
+        test_db.commit()
+        
+        mismatches = check()
+        assert {(m.field, m.stored, m.expected) for m in mismatches} == {
+            ("realized_pnl", 999.0, 50.0),
+            ("win_count", 0, 1),
+        }
+        
+        # The summary is served from the aggregate table
+        summary = client.get(f"/portfolio/{client_user.id}/summary", headers=headers).json()
+        assert summary["total_pnl"] == 999.0
+        
+        async def rebuild():
+            async with AsyncTestingSessionLocal() as db:
+                return await rebuild_portfolio_aggregates(db)
+        
+        assert asyncio.run(rebuild()) == 1
+        assert check() == []
+        summary = client.get(f"/portfolio/{client_user.id}/summary", headers=headers).json()
+        assert summary["total_pnl"] == 50.0
+        assert summary["win_rate"] == 100.0
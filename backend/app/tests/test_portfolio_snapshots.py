@@ -0,0 +1,149 @@
+import asyncio
+import pytest
+import random
+import secrets
+import time
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from app.main import app
+from app.models.models import PortfolioSnapshot, Trade, TradeStatus, TradeType, User, UserRole
+from app.services import portfolio_snapshots
+from app.services.portfolio_snapshots import DAY_MS, last_completed_day, take_portfolio_snapshots
+from app.tests.conftest import AsyncTestingSessionLocal
+
+client = TestClient(app)
+
+# 2024-01-01T00:00:00Z
+DAY = 1_704_067_200_000
+
+
+def add_clients(test_db, count, rng):
+    """Clients with a random mix of open and closed trades (every fourth has none)"""
+    clients = []
+    for i in range(count):
+        user = User(
+            id=f"client-{i:03d}-{secrets.token_hex(4)}",
+            email=f"client{i}@snapshots.com",
+            name=f"Client {i}",
+            hashed_password="x",
+            role=UserRole.CLIENT,
+            initial_deposit=rng.choice([0.0, 5000.0, 10000.0])
+        )
+        clients.append(user)
+        test_db.add(user)
+        for _ in range(0 if i % 4 == 0 else rng.randrange(1, 6)):
+            closed = rng.random() < 0.5
+            test_db.add(Trade(
+                id=secrets.token_urlsafe(16),
+                client_id=user.id,
+                coin_id=rng.choice(["bitcoin", "ethereum"]),
+                coin_symbol="BTC",
+                entry_price=rng.uniform(50, 150),
+                current_price=None if closed else rng.uniform(50, 150),
+                exit_price=rng.uniform(50, 150) if closed else None,
+                quantity=rng.uniform(0.1, 3),
+                type=rng.choice([TradeType.LONG, TradeType.SHORT]),
+                status=TradeStatus.CLOSED if closed else TradeStatus.OPEN,
+                timestamp=int(time.time() * 1000)
+            ))
+    test_db.commit()
+    return clients
+
+
+@pytest.fixture
+def run_snapshots(monkeypatch):
+    """Run the batch for `day` with the clock set to shortly after that day ended"""
+    def run(day=DAY, chunk_size=3, **kwargs):
+        monkeypatch.setattr(portfolio_snapshots, "current_millis", lambda: day + DAY_MS + 5000)
+        return asyncio.run(take_portfolio_snapshots(day, chunk_size, session_factory=AsyncTestingSessionLocal, **kwargs))
+    return run
+
+
+def stored_snapshots(test_db, day=DAY):
+    test_db.expire_all()
+    return {
+        snapshot.client_id: snapshot
+        for snapshot in test_db.scalars(select(PortfolioSnapshot).where(PortfolioSnapshot.day == day))
+    }
+
+
+class TestPortfolioSnapshots:
+    """Test the nightly portfolio snapshot batch"""
+    
+    def test_snapshots_match_summary(self, admin_token, admin_user, test_db, run_snapshots):
+        """Test every client gets a snapshot equal to their live summary"""
+        clients = add_clients(test_db, 10, random.Random(1))
+        
+        progress = run_snapshots()
+        assert progress.clients == 10
+        assert progress.clients_per_second > 0
+        
+        snapshots = stored_snapshots(test_db)
+        assert set(snapshots) == {user.id for user in clients}
+        for user in clients:
+            summary = client.get(
+                f"/portfolio/{user.id}/summary",
+                headers={"Authorization": f"Bearer {admin_token}"}
+            ).json()
+            for field, value in summary.items():
+                assert getattr(snapshots[user.id], field) == pytest.approx(value), field
+    
+    def test_interrupted_run_resumes(self, test_db, run_snapshots):
+        """Test a rerun after a failed chunk only processes the remaining clients"""
+        clients = add_clients(test_db, 10, random.Random(2))
+        
+        def fail_after_first_chunk(progress):
+            raise RuntimeError("interrupted")
+        
+        with pytest.raises(RuntimeError):
+            run_snapshots(on_chunk=fail_after_first_chunk)
+        first_chunk = stored_snapshots(test_db)
+        assert len(first_chunk) == 3
+        taken_at = {client_id: snapshot.taken_at for client_id, snapshot in first_chunk.items()}
+        
+        progress = run_snapshots()
+        assert progress.clients == 7
+        snapshots = stored_snapshots(test_db)
+        assert set(snapshots) == {user.id for user in clients}
+        assert {client_id: snapshots[client_id].taken_at for client_id in taken_at} == taken_at
+        
+        # A finished day is left alone unless restarted
+        assert run_snapshots().clients == 0
+        assert run_snapshots(restart=True).clients == 10
+    
+    def test_days_are_kept_apart(self, test_db, run_snapshots):
+        add_clients(test_db, 2, random.Random(3))
+        run_snapshots(day=DAY)
+        run_snapshots(day=DAY + DAY_MS)
+        assert len(stored_snapshots(test_db, DAY)) == len(stored_snapshots(test_db, DAY + DAY_MS)) == 2
+    
+    def test_last_completed_day(self):
+        assert last_completed_day(DAY + DAY_MS + 5000) == DAY
+        assert last_completed_day(DAY + DAY_MS) == DAY
+    
+    def test_snapshot_endpoint(self, client_token, client_user, test_db, run_snapshots):
+        """Test a client reads their own snapshots, oldest first, filtered by day"""
+        run_snapshots(day=DAY + DAY_MS)
+        run_snapshots(day=DAY)
+        headers = {"Authorization": f"Bearer {client_token}"}
+        
+        data = client.get(f"/portfolio/{client_user.id}/snapshots", headers=headers).json()
+        assert [snapshot["day"] for snapshot in data] == [DAY, DAY + DAY_MS]
+        assert data[0]["current_balance"] == 10000.0
+        
+        data = client.get(f"/portfolio/{client_user.id}/snapshots", params={"from": DAY + 1}, headers=headers).json()
+        assert [snapshot["day"] for snapshot in data] == [DAY + DAY_MS]
+    
+    def test_only_last_completed_day(self, test_db):
+        """Test other days are refused rather than stored with today's figures"""
+        for day in (last_completed_day() - DAY_MS, last_completed_day() + DAY_MS):
+            with pytest.raises(ValueError):
+                asyncio.run(take_portfolio_snapshots(day, 3, session_factory=AsyncTestingSessionLocal))
+        assert stored_snapshots(test_db, last_completed_day() - DAY_MS) == {}
+    
+    def test_client_cannot_view_other_snapshots(self, client_token, admin_user):
+        response = client.get(
+            f"/portfolio/{admin_user.id}/snapshots",
+            headers={"Authorization": f"Bearer {client_token}"}
+        )
+        assert response.status_code == 403
@@ -0,0 +1,213 @@
+import asyncio
+import random
+import secrets
+import time
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from app.main import app
+from app.models.models import PriceCandle, PriceTick, Trade, TradeStatus, TradeType
+from app.services.mark_to_market import mark_to_market
+from app.services.price_history import RESOLUTIONS, PriceRollupWorker, roll_up
+from app.tests.conftest import AsyncTestingSessionLocal, metric_value
+
+client = TestClient(app)
+
+# 2024-01-01T00:00:00Z
+DAY_START = 1_704_067_200_000
+
+
+def random_ticks(rng, coins, start, count, spacing):
+    """Random-walk ticks for each coin, `spacing` ms apart with some jitter"""
+    ticks = []
+    for coin_id in coins:
+        price = 100.0
+        for i in range(count):
+            price = max(1.0, price * (1 + rng.gauss(0, 0.01)))
+            ticks.append(PriceTick(coin_id=coin_id, timestamp=start + i * spacing + rng.randrange(spacing // 2), price=price))
+    return ticks
+
+
+def expected_candles(ticks):
+    """OHLC per (coin, resolution, bucket) computed directly from the ticks"""
+    candles = {}
+    for tick in sorted(ticks, key=lambda tick: (tick.coin_id, tick.timestamp)):
+        for width in RESOLUTIONS.values():
+            key = (tick.coin_id, width, tick.timestamp // width * width)
+            if key not in candles:
+                candles[key] = [tick.price] * 4
+            candle = candles[key]
+            candle[1] = max(candle[1], tick.price)
+            candle[2] = min(candle[2], tick.price)
+            candle[3] = tick.price
+    return {key: tuple(values) for key, values in candles.items()}
+
+
+def stored_candles(test_db):
+    test_db.expire_all()
+    return {
+        (candle.coin_id, candle.resolution, candle.bucket_start): (candle.open, candle.high, candle.low, candle.close)
+        for candle in test_db.scalars(select(PriceCandle))
+    }
+
+
+def run_roll_up():
+    async def run():
+        async with AsyncTestingSessionLocal() as db:
+            written = await roll_up(db)
+            await db.commit()
+            return written
+    
+    return asyncio.run(run())
+
+
+def add_ticks(test_db, ticks):
+    test_db.add_all([PriceTick(coin_id=tick.coin_id, timestamp=tick.timestamp, price=tick.price) for tick in ticks])
+    test_db.commit()
+
+
+class TestRollup:
+    """Test OHLC candles rolled up from ticks"""
+    
+    def test_candles_match_ticks(self, test_db):
+        """Test 1m/1h/1d candles over two days of ticks match a direct computation"""
+        ticks = random_ticks(random.Random(3), ["bitcoin", "ethereum"], DAY_START, 600, 300_000)
+        add_ticks(test_db, ticks)
+        
+        written = run_roll_up()
+        expected = expected_candles(ticks)
+        assert stored_candles(test_db) == expected
+        assert written["1d"] == 2 * 3
+    
+    def test_incremental_runs_pick_up_new_and_late_ticks(self, test_db):
+        """Test later runs only rewrite recent buckets and still end up exact"""
+        rng = random.Random(4)
+        ticks = random_ticks(rng, ["bitcoin", "ethereum"], DAY_START, 500, 10_000)
+        add_ticks(test_db, ticks)
+        run_roll_up()
+        
+        # New ticks, plus a late one a minute behind the newest bucket
+        newest = max(tick.timestamp for tick in ticks)
+        more = random_ticks(rng, ["bitcoin", "ethereum"], newest + 10_000, 50, 10_000)
+        late = PriceTick(coin_id="bitcoin", timestamp=newest - 60_001, price=1000.0)
+        add_ticks(test_db, more + [late])
+        
+        written = run_roll_up()
+        assert written["1m"] < 40
+        assert stored_candles(test_db) == expected_candles(ticks + more + [late])
+    
+    def test_rerun_is_idempotent(self, test_db):
+        ticks = random_ticks(random.Random(5), ["bitcoin"], DAY_START, 100, 60_000)
+        add_ticks(test_db, ticks)
+        run_roll_up()
+        before = stored_candles(test_db)
+        run_roll_up()
+        assert stored_candles(test_db) == before
+    
+    def test_worker_run_once(self, test_db):
+        """Test the price_rollup.py worker writes candles and counts its runs"""
+        ticks = random_ticks(random.Random(6), ["bitcoin"], DAY_START, 10, 60_000)
+        add_ticks(test_db, ticks)
+        before = metric_value("price_rollup_runs_total", outcome="success")
+        
+        worker = PriceRollupWorker(interval=60, session_factory=AsyncTestingSessionLocal)
+        assert asyncio.run(worker.run_once())["1m"] == 10
+        assert stored_candles(test_db) == expected_candles(ticks)
+        assert metric_value("price_rollup_runs_total", outcome="success") == before + 1
+
+
+class TestPriceHistoryEndpoint:
+    """Test GET /prices/{coin_id}/history"""
+    
+    def history(self, token, **params):
+        response = client.get("/prices/bitcoin/history", params=params, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        return response.json()
+    
+    def test_resolution_fits_point_budget(self, client_token, test_db):
+        """Test the finest resolution within max_points is chosen"""
+        ticks = random_ticks(random.Random(6), ["bitcoin"], DAY_START, 3 * 8640, 10_000)
+        add_ticks(test_db, ticks)
+        run_roll_up()
+        
+        # A few minutes of ticks fit as they are
+        data = self.history(client_token, **{"from": DAY_START, "to": DAY_START + 300_000, "max_points": 100})
+        assert data["resolution"] == "tick"
+        assert len(data["points"]) == 30
+        assert data["points"][0]["open"] == data["points"][0]["close"] == ticks[0].price
+        
+        # Two hours: 720 ticks are too many, 120 one-minute candles fit
+        data = self.history(client_token, **{"from": DAY_START, "to": DAY_START + 7_200_000, "max_points": 200})
+        assert data["resolution"] == "1m"
+        assert len(data["points"]) == 120
+        
+        # Three days at 100 points: 72 hourly candles
+        data = self.history(client_token, **{"from": DAY_START, "to": DAY_START + 3 * 86_400_000, "max_points": 100})
+        assert data["resolution"] == "1h"
+        assert len(data["points"]) == 72
+        first_hour = [tick.price for tick in ticks if tick.timestamp < DAY_START + 3_600_000]
+        assert data["points"][0] == {
+            "timestamp": DAY_START,
+            "open": first_hour[0],
+            "high": max(first_hour),
+            "low": min(first_hour),
+            "close": first_hour[-1]
+        }
+        
+        # Too long for hourly candles: daily ones
+        data = self.history(client_token, **{"from": DAY_START, "to": DAY_START + 3 * 86_400_000, "max_points": 10})
+        assert data["resolution"] == "1d"
+        assert len(data["points"]) == 3
+    
+    def test_unknown_coin_is_empty(self, client_token):
+        data = self.history(client_token, **{"from": 0})
+        assert data == {"coin_id": "bitcoin", "resolution": "tick", "points": []}
+    
+    def test_requires_authentication(self):
+        assert client.get("/prices/bitcoin/history", params={"from": 0}).status_code == 401
+
+
+class TestTickFeeds:
+    """Test every writer of Trade.current_price also records ticks"""
+    
+    def test_mark_to_market_records_ticks(self, client_user, test_db, price_stub, price_service):
+        test_db.add(Trade(
+            id=secrets.token_urlsafe(16),
+            client_id=client_user.id,
+            coin_id="bitcoin",
+            coin_symbol="BTC",
+            entry_price=100.0,
+            quantity=1.0,
+            type=TradeType.LONG,
+            status=TradeStatus.OPEN,
+            timestamp=int(time.time() * 1000)
+        ))
+        test_db.commit()
+        price_stub.prices = {"bitcoin": 50000.0}
+        
+        async def run():
+            async with AsyncTestingSessionLocal() as db:
+                await mark_to_market(db, price_service)
+        
+        asyncio.run(run())
+        assert [(tick.coin_id, tick.price) for tick in test_db.scalars(select(PriceTick))] == [("bitcoin", 50000.0)]
+    
+    def test_trade_reprice_records_tick(self, admin_token, client_user, test_db):
+        trade = Trade(
+            id=secrets.token_urlsafe(16),
+            client_id=client_user.id,
+            coin_id="ethereum",
+            coin_symbol="ETH",
+            entry_price=100.0,
+            quantity=1.0,
+            type=TradeType.LONG,
+            status=TradeStatus.OPEN,
+            timestamp=int(time.time() * 1000)
+        )
+        test_db.add(trade)
+        test_db.commit()
+        
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        client.put(f"/trades/{trade.id}", json={"notes": "no price"}, headers=headers)
+        assert test_db.scalars(select(PriceTick)).all() == []
+        client.put(f"/trades/{trade.id}", json={"current_price": 3100.0}, headers=headers)
+        assert [(tick.coin_id, tick.price) for tick in test_db.scalars(select(PriceTick))] == [("ethereum", 3100.0)]
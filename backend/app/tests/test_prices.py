@@ -0,0 +1,223 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from app.main import app
+from app.core.config import settings
+from app.models.models import PriceTick, TradeStatus
+from app.services.triggers import trigger_engine
+from app.tests.conftest import assert_max_queries
+
+client = TestClient(app)
+
+
+class TestPriceEndpoints:
+    """Test server-side price oracle"""
+    
+    def test_get_prices_batches_traded_coins(self, client_token, client_user, test_db, price_stub, price_service, make_trade):
+        """Test one upstream request covers every traded coin"""
+        test_db.add_all([make_trade(client_user.id, "bitcoin"), make_trade(client_user.id, "ethereum")])
+        test_db.commit()
+        price_stub.prices = {"bitcoin": 50000.0, "ethereum": 3000.0}
+        
+        response = client.get("/prices/", headers={"Authorization": f"Bearer {client_token}"})
+        assert response.status_code == 200
+        assert response.json() == {"bitcoin": 50000.0, "ethereum": 3000.0}
+        assert len(price_stub.requests) == 1
+        assert sorted(price_stub.requests[0]) == ["bitcoin", "ethereum"]
+    
+    def test_get_prices_served_from_cache(self, client_token, client_user, test_db, price_stub, price_service, make_trade):
+        """Test quotes within the TTL do not hit upstream again"""
+        test_db.add(make_trade(client_user.id, "bitcoin"))
+        test_db.commit()
+        price_stub.prices = {"bitcoin": 50000.0, "solana": 150.0}
+        
+        for _ in range(3):
+            response = client.get("/prices/?ids=bitcoin", headers={"Authorization": f"Bearer {client_token}"})
+            assert response.json() == {"bitcoin": 50000.0}
+        assert len(price_stub.requests) == 1
+        
+        # An untracked coin is added to the next batch alongside traded coins
+        response = client.get("/prices/?ids=bitcoin,solana", headers={"Authorization": f"Bearer {client_token}"})
+        assert response.json() == {"bitcoin": 50000.0, "solana": 150.0}
+        assert len(price_stub.requests) == 2
+        assert sorted(price_stub.requests[1]) == ["bitcoin", "solana"]
+    
+    def test_all_prices_served_from_cache(self, client_token, client_user, test_db, price_stub, price_service, make_trade):
+        """Test GET /prices/ without ids only hits upstream once per TTL"""
+        test_db.add(make_trade(client_user.id, "bitcoin"))
+        test_db.commit()
+        price_stub.prices = {"bitcoin": 50000.0}
+
+        for _ in range(3):
+            response = client.get("/prices/", headers={"Authorization": f"Bearer {client_token}"})
+            assert response.json() == {"bitcoin": 50000.0}
+        assert len(price_stub.requests) == 1
+
+    def test_unknown_ids_are_cached(self, client_token, client_user, test_db, price_stub, price_service, make_trade):
+        """Test ids upstream has no quote for do not hit upstream again within the TTL"""
+        test_db.add(make_trade(client_user.id, "bitcoin"))
+        test_db.commit()
+        price_stub.prices = {"bitcoin": 50000.0}
+
+        for _ in range(3):
+            response = client.get("/prices/?ids=bogus", headers={"Authorization": f"Bearer {client_token}"})
+            assert response.status_code == 200
+            assert response.json() == {}
+        assert len(price_stub.requests) == 1
+        assert sorted(price_stub.requests[0]) == ["bitcoin", "bogus"]
+
+        response = client.get("/prices/?ids=bitcoin,bogus", headers={"Authorization": f"Bearer {client_token}"})
+        assert response.json() == {"bitcoin": 50000.0}
+        assert len(price_stub.requests) == 1
+
+        # Once the TTL runs out the id is asked for again
+        price_service.ttl = 0
+        client.get("/prices/?ids=bogus", headers={"Authorization": f"Bearer {client_token}"})
+        assert len(price_stub.requests) == 2
+
+    def test_extra_ids_are_bounded(self, client_token, price_stub, price_service, monkeypatch):
+        """Test invalid or too many ids are rejected and queued extra ids are capped"""
+        headers = {"Authorization": f"Bearer {client_token}"}
+        assert client.get("/prices/?ids=Bit%20coin", headers=headers).status_code == 400
+        assert client.get("/prices/?ids=" + "x" * 101, headers=headers).status_code == 400
+        monkeypatch.setattr(settings, "PRICES_MAX_QUERY_IDS", 3)
+        assert client.get("/prices/?ids=a,b,c,d", headers=headers).status_code == 400
+        assert price_stub.requests == []
+
+        price_service.max_extra_ids = 2
+        response = client.get("/prices/?ids=a,b,c", headers=headers)
+        assert response.status_code == 200
+        assert sorted(price_stub.requests[0]) == ["a", "b"]
+        # The id left out is not retried until the TTL runs out either
+        client.get("/prices/?ids=c", headers=headers)
+        assert len(price_stub.requests) == 1
+
+    def test_expired_quotes_are_refreshed(self, client_token, client_user, test_db, price_stub, price_service, make_trade):
+        """Test quotes older than the TTL trigger a new upstream request"""
+        test_db.add(make_trade(client_user.id, "bitcoin"))
+        test_db.commit()
+        price_stub.prices = {"bitcoin": 50000.0}
+        price_service.ttl = 0
+        
+        client.get("/prices/?ids=bitcoin", headers={"Authorization": f"Bearer {client_token}"})
+        price_stub.prices = {"bitcoin": 51000.0}
+        response = client.get("/prices/?ids=bitcoin", headers={"Authorization": f"Bearer {client_token}"})
+        assert response.json() == {"bitcoin": 51000.0}
+        assert len(price_stub.requests) == 2
+    
+    def test_upstream_failure(self, client_token, client_user, test_db, price_stub, price_service):
+        """Test stale quotes are served on upstream errors, 503 when none exist"""
+        price_stub.fail = True
+        response = client.get("/prices/?ids=bitcoin", headers={"Authorization": f"Bearer {client_token}"})
+        assert response.status_code == 503
+        
+        price_stub.fail = False
+        price_stub.prices = {"bitcoin": 50000.0}
+        price_service.ttl = 0
+        client.get("/prices/?ids=bitcoin", headers={"Authorization": f"Bearer {client_token}"})
+        price_stub.fail = True
+        response = client.get("/prices/?ids=bitcoin", headers={"Authorization": f"Bearer {client_token}"})
+        assert response.status_code == 200
+        assert response.json() == {"bitcoin": 50000.0}
+    
+    def test_concurrent_requests_coalesce(self, client_user, test_db, price_stub, price_service, make_trade):
+        """Test concurrent cache misses share a single upstream request"""
+        from app.tests.conftest import AsyncTestingSessionLocal
+        
+        test_db.add(make_trade(client_user.id, "bitcoin"))
+        test_db.commit()
+        price_stub.prices = {"bitcoin": 50000.0}
+        price_stub.delay = 0.2
+        
+        async def fetch():
+            async with AsyncTestingSessionLocal() as db:
+                return await price_service.get_prices(db, ["bitcoin"])
+        
+        async def run():
+            return await asyncio.gather(*(fetch() for _ in range(10)))
+        
+        results = asyncio.run(run())
+        assert all(result == {"bitcoin": 50000.0} for result in results)
+        assert len(price_stub.requests) == 1
+    
+    def test_get_prices_requires_auth(self):
+        """Test prices endpoint requires authentication"""
+        response = client.get("/prices/")
+        assert response.status_code == 401
+
+
+@pytest.fixture
+def fresh_triggers():
+    """Make the shared trigger engine reload from this test's database"""
+    trigger_engine.clear()
+    yield
+    trigger_engine.clear()
+
+
+class TestPriceIngest:
+    """Test bulk price ingestion"""
+    
+    def ingest(self, token, prices, **extra):
+        return client.post(
+            "/prices/ingest",
+            json={"prices": prices, **extra},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+    
+    def test_reprices_open_trades_and_records_ticks(self, admin_token, client_user, test_db, fresh_triggers, make_trade):
+        """Test every open trade of each coin is repriced and one tick per coin is stored"""
+        trades = [make_trade(client_user.id, coin_id) for coin_id in ("bitcoin", "bitcoin", "ethereum", "solana")]
+        closed = make_trade(client_user.id, "bitcoin", exit_price=90.0)
+        test_db.add_all(trades + [closed])
+        test_db.commit()
+        
+        response = self.ingest(
+            admin_token, {"bitcoin": 50000.0, "ethereum": 3000.0, "dogecoin": 0.1}, timestamp=1_700_000_000_000
+        )
+        assert response.status_code == 200
+        assert response.json() == {"coins": 3, "trades_updated": 3, "ticks_recorded": 3, "triggers_fired": 0}
+        assert_max_queries(response, 6)
+        
+        test_db.expire_all()
+        assert [trade.current_price for trade in trades] == [50000.0, 50000.0, 3000.0, None]
+        assert closed.current_price is None
+        ticks = test_db.execute(select(PriceTick.coin_id, PriceTick.timestamp, PriceTick.price).order_by(PriceTick.coin_id)).all()
+        assert ticks == [
+            ("bitcoin", 1_700_000_000_000, 50000.0),
+            ("dogecoin", 1_700_000_000_000, 0.1),
+            ("ethereum", 1_700_000_000_000, 3000.0),
+        ]
+        
+        # Unchanged prices update no rows; a repeated instant keeps the latest tick
+        response = self.ingest(admin_token, {"bitcoin": 50000.0, "ethereum": 3100.0}, timestamp=1_700_000_000_000)
+        assert response.json()["trades_updated"] == 1
+        test_db.expire_all()
+        assert test_db.get(PriceTick, ("ethereum", 1_700_000_000_000)).price == 3100.0
+        assert test_db.query(PriceTick).count() == 3
+    
+    def test_ticks_fire_triggers(self, admin_token, client_user, test_db, fresh_triggers, make_trade):
+        """Test trades whose stop-loss the ingested price crosses are closed at that price"""
+        trade = make_trade(client_user.id, "bitcoin")
+        trade.stop_loss = 90.0
+        test_db.add(trade)
+        test_db.commit()
+        
+        response = self.ingest(admin_token, {"bitcoin": 85.0})
+        assert response.json()["triggers_fired"] == 1
+        
+        test_db.expire_all()
+        assert trade.status == TradeStatus.CLOSED
+        assert trade.exit_price == 85.0
+    
+    def test_rejects_invalid_batches(self, admin_token, monkeypatch):
+        assert self.ingest(admin_token, {}).status_code == 422
+        assert self.ingest(admin_token, {"bitcoin": -1.0}).status_code == 422
+        assert self.ingest(admin_token, {"bitcoin": 0}).status_code == 422
+        
+        monkeypatch.setattr(settings, "PRICES_MAX_INGEST_SIZE", 2)
+        response = self.ingest(admin_token, {"a": 1.0, "b": 2.0, "c": 3.0})
+        assert response.status_code == 400
+    
+    def test_admin_only(self, client_token):
+        assert self.ingest(client_token, {"bitcoin": 50000.0}).status_code == 403
@@ -0,0 +1,130 @@
+import secrets
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.models import Trade, TradeStatus, TradeType, Announcement, Reply
+from app.tests.conftest import assert_max_queries, query_count
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def populated(test_db, admin_user, client_user):
+    """Trades and an announcement with replies, enough to expose N+1 patterns"""
+    now = int(time.time() * 1000)
+    for i in range(20):
+        test_db.add(Trade(
+            id=secrets.token_urlsafe(16),
+            client_id=client_user.id,
+            coin_id="bitcoin",
+            coin_symbol="BTC",
+            entry_price=40000.0,
+            current_price=41000.0,
+            quantity=0.1,
+            type=TradeType.LONG,
+            status=TradeStatus.OPEN if i % 2 else TradeStatus.CLOSED,
+            exit_price=None if i % 2 else 42000.0,
+            timestamp=now - i
+        ))
+    announcement = Announcement(
+        id=secrets.token_urlsafe(16),
+        title="UPDATE",
+        content="Content",
+        author_id=admin_user.id,
+        timestamp=now
+    )
+    test_db.add(announcement)
+    for i in range(10):
+        test_db.add(Reply(
+            id=secrets.token_urlsafe(16),
+            announcement_id=announcement.id,
+            user_id=client_user.id,
+            user_name=client_user.name,
+            content=f"Reply {i}",
+            timestamp=now + i
+        ))
+    test_db.commit()
+    return announcement
+
+
+class TestQueryBudgets:
+    """Per-endpoint SQL query budgets; a higher count usually means an N+1 regression"""
+    
+    def test_server_timing_header(self, admin_token):
+        """Test responses report query count and database time"""
+        response = client.get("/auth/me", headers={"Authorization": f"Bearer {admin_token}"})
+        timings = response.headers.get_list("server-timing")
+        assert any(value.startswith("db;dur=") for value in timings)
+        assert any(value.startswith("app;dur=") for value in timings)
+        assert query_count(response) >= 0
+    
+    def test_trade_list_budget(self, admin_token, client_user, populated):
+        response = client.get("/trades/", headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        assert len(response.json()) == 20
+        assert_max_queries(response, 2)
+    
+    def test_trade_page_budget(self, admin_token, client_user, populated):
+        response = client.get("/trades/?limit=5", headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        assert_max_queries(response, 2)
+    
+    def test_portfolio_summary_budget(self, client_token, client_user, populated):
+        response = client.get(
+            f"/portfolio/{client_user.id}/summary",
+            headers={"Authorization": f"Bearer {client_token}"}
+        )
+        assert response.status_code == 200
+        assert_max_queries(response, 3)
+    
+    def test_announcements_budget(self, client_token, populated):
+        response = client.get("/announcements/", headers={"Authorization": f"Bearer {client_token}"})
+        assert response.status_code == 200
+        assert_max_queries(response, 2)
+    
+    def test_replies_budget(self, client_token, populated):
+        response = client.get(
+            f"/announcements/{populated.id}/replies",
+            headers={"Authorization": f"Bearer {client_token}"}
+        )
+        assert response.status_code == 200
+        assert len(response.json()) == 10
+        assert_max_queries(response, 2)
+    
+    def test_users_budget(self, admin_token, client_user):
+        response = client.get("/auth/users", headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        assert_max_queries(response, 2)
+    
+    def test_cached_user_saves_a_query(self, admin_token):
+        """Test the second request is served without the user lookup"""
+        first = client.get("/auth/me", headers={"Authorization": f"Bearer {admin_token}"})
+        second = client.get("/auth/me", headers={"Authorization": f"Bearer {admin_token}"})
+        assert query_count(first) == 1
+        assert query_count(second) == 0
+    
+    def test_slow_queries_are_logged(self, admin_token, monkeypatch, caplog):
+        """Test queries over the threshold are logged with the request path"""
+        from app.core.config import settings
+        
+        monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0.0)
+        with caplog.at_level("WARNING", logger="app.sql"):
+            client.get("/announcements/", headers={"Authorization": f"Bearer {admin_token}"})
+        assert any("Slow query" in r.message and "/announcements/" in r.message for r in caplog.records)
+    
+    def test_failed_queries_are_counted(self):
+        """Test a statement that raises is timed and counted as failed"""
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.exc import OperationalError
+        from app.core.query_stats import track_queries
+        
+        engine = create_engine("sqlite://")
+        with engine.connect() as conn, track_queries("/test") as stats:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            conn.execute(text("SELECT 1"))
+        engine.dispose()
+        
+        assert (stats.count, stats.failed) == (2, 1)
+        assert 'desc="2 queries, 1 failed"' in stats.server_timing()
@@ -0,0 +1,207 @@
+import asyncio
+import secrets
+import pytest
+from fastapi.testclient import TestClient
+from fastapi import Request
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.main import app
+from app.core.config import settings
+from app.core.database import Base, get_read_db, read_session_factory
+from app.core.replicas import ReplicaSet, RoutingSession
+from app.models.models import User, UserRole
+from app.tests.conftest import AsyncTestingSessionLocal, async_engine as primary_engine
+
+client = TestClient(app)
+
+
+def make_database(path, emails):
+    """Create a SQLite database file holding users with the given emails"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for email in emails:
+        db.add(User(
+            id=secrets.token_urlsafe(16),
+            email=email,
+            name=email.split("@")[0],
+            hashed_password="x",
+            role=UserRole.CLIENT,
+            initial_deposit=0
+        ))
+    db.commit()
+    db.close()
+    engine.dispose()
+
+
+def replica_engine(path):
+    """Async engine for a database file (NullPool: TestClient uses a loop per request)"""
+    return create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """A primary and two replicas whose contents differ, so reads reveal where they went"""
+    make_database(tmp_path / "primary.db", ["primary@test.com"])
+    make_database(tmp_path / "replica0.db", ["replica0@test.com"])
+    make_database(tmp_path / "replica1.db", ["replica1@test.com"])
+    return tmp_path
+
+
+def session_factory(tmp_path, replicas):
+    """Routing session factory with the primary database as its bind"""
+    return async_sessionmaker(
+        bind=replica_engine(tmp_path / "primary.db"),
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        replicas=replicas,
+        expire_on_commit=False
+    )
+
+
+async def emails(db):
+    """Emails of all users visible to the session"""
+    return sorted((await db.scalars(select(User.email))).all())
+
+
+class TestRoutingSession:
+    """Test reads go to replicas and writes to the primary"""
+    
+    def test_reads_use_replica(self, databases):
+        """Test reads are served by a replica"""
+        replicas = ReplicaSet([replica_engine(databases / "replica0.db")])
+        
+        async def run():
+            async with session_factory(databases, replicas)() as db:
+                return await emails(db)
+        
+        assert asyncio.run(run()) == ["replica0@test.com"]
+    
+    def test_round_robin(self, databases):
+        """Test consecutive sessions alternate between replicas"""
+        replicas = ReplicaSet([
+            replica_engine(databases / "replica0.db"),
+            replica_engine(databases / "replica1.db")
+        ])
+        factory = session_factory(databases, replicas)
+        
+        async def run():
+            seen = []
+            for _ in range(4):
+                async with factory() as db:
+                    seen.append((await emails(db))[0])
+            return seen
+        
+        assert asyncio.run(run()) == [
+            "replica0@test.com", "replica1@test.com", "replica0@test.com", "replica1@test.com"
+        ]
+
+
+class TestReplicaHealth:
+    """Test unhealthy replicas are skipped"""
+    
+    def test_failed_replica_is_skipped(self, databases):
+        """Test a replica failing its health check receives no reads"""
+        replicas = ReplicaSet([
+            replica_engine(databases / "missing" / "replica.db"),
+            replica_engine(databases / "replica1.db")
+        ])
+        factory = session_factory(databases, replicas)
+        
+        async def run():
+            await replicas.check()
+            seen = []
+            for _ in range(3):
+                async with factory() as db:
+                    seen.append((await emails(db))[0])
+            return seen
+        
+        assert asyncio.run(run()) == ["replica1@test.com"] * 3
+    
+    def test_falls_back_to_primary(self, databases):
+        """Test reads go to the primary when no replica is healthy"""
+        replicas = ReplicaSet([replica_engine(databases / "missing" / "replica.db")])
+        
+        async def run():
+            await replicas.check()
+            async with session_factory(databases, replicas)() as db:
+                return await emails(db)
+        
+        assert asyncio.run(run()) == ["primary@test.com"]
+
+
+@pytest.fixture
+def stale_replica(tmp_path):
+    """Route read endpoints to a replica holding none of the test database's rows"""
+    make_database(tmp_path / "replica.db", ["replica@test.com"])
+    replicas = ReplicaSet([replica_engine(tmp_path / "replica.db")])
+    factory = async_sessionmaker(
+        bind=primary_engine,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        replicas=replicas,
+        expire_on_commit=False
+    )
+    
+    async def override_get_read_db(request: Request):
+        async with read_session_factory(request, AsyncTestingSessionLocal, factory)() as db:
+            yield db
+    
+    original = app.dependency_overrides[get_read_db]
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    yield
+    app.dependency_overrides[get_read_db] = original
+
+
+class TestReadEndpoints:
+    """Test read-only endpoints use the read session"""
+    
+    def test_list_users_reads_from_replica(self, admin_token, stale_replica):
+        """Test GET /auth/users is served from the replica"""
+        response = client.get("/auth/users", headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        assert [user["email"] for user in response.json()] == ["replica@test.com"]
+    
+    def test_reads_after_a_write_use_primary(self, admin_token, client_user, stale_replica, monkeypatch):
+        """Test a client's reads within the lag window after its own write see that write"""
+        writer = TestClient(app)
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        assert writer.get("/trades/", headers=headers).json() == []
+        
+        response = writer.post("/trades/", headers=headers, json={
+            "client_id": client_user.id,
+            "coin_id": "bitcoin",
+            "coin_symbol": "BTC",
+            "entry_price": 45000.0,
+            "quantity": 0.5,
+            "type": "LONG"
+        })
+        assert response.status_code == 201
+        written_at = response.headers["x-last-write"]
+        assert writer.cookies["last_write"] == written_at
+        
+        # The cookie sends the writer's next read to the primary
+        assert [trade["id"] for trade in writer.get("/trades/", headers=headers).json()] == [response.json()["id"]]
+        # So does echoing the header, for clients without cookies
+        echoed = TestClient(app).get("/trades/", headers={**headers, "X-Last-Write": written_at})
+        assert len(echoed.json()) == 1
+        # Other clients, and the writer once the window has passed, read the replica
+        assert TestClient(app).get("/trades/", headers=headers).json() == []
+        monkeypatch.setattr(settings, "REPLICA_READ_YOUR_WRITES_SECONDS", 0)
+        assert writer.get("/trades/", headers=headers).json() == []
+    
+    def test_trade_changes_read_the_primary(self, admin_token, client_user, test_db, make_trade, stale_replica):
+        """Test delta sync never advances its watermark past rows a replica has not seen yet"""
+        trade = make_trade(client_user.id)
+        test_db.add(trade)
+        test_db.commit()
+        
+        response = client.get("/trades/changes", headers={"Authorization": f"Bearer {admin_token}"})
+        assert [change["id"] for change in response.json()["trades"]] == [trade.id]
+    
+    def test_failed_write_does_not_pin(self, client_token, stale_replica):
+        response = client.post("/trades/", headers={"Authorization": f"Bearer {client_token}"}, json={})
+        assert response.status_code >= 400
+        assert "x-last-write" not in response.headers
@@ -0,0 +1,98 @@
+import random
+import secrets
+import time
+from typing import List
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from app.main import app
+from app.core.responses import ORJSONResponse
+from app.models.models import Trade, TradeStatus, TradeType
+from app.schemas.schemas import TradePage, TradeResponse
+
+client = TestClient(app)
+
+
+def legacy_body(content, annotation) -> bytes:
+    """Body FastAPI renders for `content` through a response_model"""
+    adapter = TypeAdapter(annotation)
+    return JSONResponse(adapter.dump_python(adapter.validate_python(content), mode="json")).body
+
+
+@pytest.fixture
+def trades(test_db, client_user):
+    """Trades covering nulls, closed positions, odd text and (oldest) extreme prices"""
+    now = int(time.time() * 1000)
+    values = [
+        dict(entry_price=0.00001234, quantity=1e7, current_price=0.0000131, notes="tiny 🐸 coin"),
+        dict(entry_price=3e16, quantity=1.0, notes='quotes " and \\ and\nnewline   ü'),
+        dict(entry_price=45000.0, quantity=0.5, current_price=46000.25, take_profit=50000.0),
+        dict(entry_price=2500.0, quantity=2.0, exit_price=2600.0, status=TradeStatus.CLOSED, closed_at=now),
+    ]
+    for i, fields in enumerate(values):
+        test_db.add(Trade(
+            id=secrets.token_urlsafe(16),
+            client_id=client_user.id,
+            coin_id="coin",
+            coin_symbol="CN",
+            type=TradeType.LONG if i % 2 else TradeType.SHORT,
+            status=fields.pop("status", TradeStatus.OPEN),
+            timestamp=now + i,
+            **fields
+        ))
+    test_db.commit()
+
+
+class TestORJSONResponse:
+    """Test the orjson renderer matches the stdlib one byte for byte"""
+    
+    @pytest.mark.parametrize("value", [
+        0.0, -0.0, 1.0, 0.1, 1e-4, 9.99e-5, 1.5e-7, 123456.789, 9.99e15, 1e16, 2.5e22, -3.25e-9
+    ])
+    def test_float_formatting(self, value):
+        """Test floats on both sides of the exponent thresholds"""
+        content = {"value": value, "nested": [value, {"value": value}]}
+        assert ORJSONResponse(content).body == JSONResponse(content).body
+    
+    def test_random_floats(self):
+        """Test randomly scaled floats render identically"""
+        rng = random.Random(42)
+        content = [rng.uniform(-1, 1) * 10 ** rng.uniform(-12, 20) for _ in range(5000)]
+        assert ORJSONResponse(content).body == JSONResponse(content).body
+    
+    def test_strings(self):
+        """Test escaping and non-ASCII text render identically"""
+        content = {"text": 'tab\t "quote" back\\slash \x01   ü 🐸', "none": None, "flag": True}
+        assert ORJSONResponse(content).body == JSONResponse(content).body
+    
+    def test_non_finite_floats_still_rejected(self):
+        """Test NaN is refused like the stdlib encoder does, not rendered as null"""
+        with pytest.raises(ValueError):
+            ORJSONResponse({"value": float("nan")})
+
+
+class TestTradeListBody:
+    """Test trade list responses are unchanged by the fast path"""
+    
+    def test_list_matches_response_model(self, admin_token, trades, test_db):
+        """Test the unpaginated list renders like List[TradeResponse]"""
+        response = client.get("/trades/", headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        
+        test_db.expire_all()
+        expected = test_db.scalars(select(Trade).order_by(Trade.timestamp.desc(), Trade.id.desc())).all()
+        assert response.content == legacy_body(expected, List[TradeResponse])
+    
+    def test_page_matches_response_model(self, admin_token, trades, test_db):
+        """Test a page of orjson-rendered rows matches TradePage"""
+        response = client.get("/trades/?limit=2", headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        next_cursor = response.json()["next_cursor"]
+        assert next_cursor is not None
+        
+        test_db.expire_all()
+        expected = test_db.scalars(select(Trade).order_by(Trade.timestamp.desc(), Trade.id.desc()).limit(2)).all()
+        page = {"items": [TradeResponse.model_validate(trade) for trade in expected], "next_cursor": next_cursor}
+        assert response.content == legacy_body(page, TradePage)
@@ -0,0 +1,73 @@
+import asyncio
+import secrets
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core import security
+from app.core.security import pwd_context, get_password_hash_async, verify_password_async
+from app.models.models import User, UserRole
+from app.tests.conftest import metric_value
+
+client = TestClient(app)
+
+
+class TestPasswordHashing:
+    """Test password hashing worker pool and rehash-on-login"""
+    
+    def test_hash_and_verify_in_worker_pool(self):
+        """Test async hashing helpers round-trip through the worker pool"""
+        async def run():
+            hashed = await get_password_hash_async("secret123")
+            return hashed, await verify_password_async("secret123", hashed), await verify_password_async("wrong", hashed)
+        
+        hashed, valid, invalid = asyncio.run(run())
+        assert hashed.startswith("$2b$")
+        assert valid is True
+        assert invalid is False
+    
+    def test_queue_depth_tracks_waiting_jobs(self, monkeypatch):
+        """Test queue depth counts jobs waiting for a worker and drains to zero"""
+        monkeypatch.setattr(security, "_hash_executor", None)
+        monkeypatch.setattr(security.settings, "PASSWORD_HASH_WORKERS", 1)
+        release = threading.Event()
+        
+        def blocking_hash(password):
+            release.wait(5)
+            return pwd_context.hash(password, rounds=4)
+        
+        async def run():
+            jobs = [asyncio.ensure_future(security._run_in_hash_pool(blocking_hash, "pw")) for _ in range(4)]
+            await asyncio.sleep(0.1)
+            depth = metric_value("password_hash_queue_depth")
+            release.set()
+            await asyncio.gather(*jobs)
+            return depth
+        
+        # With a single worker busy, the other three jobs are queued
+        assert asyncio.run(run()) == 3
+        assert metric_value("password_hash_queue_depth") == 0
+        security._hash_executor.shutdown()
+    
+    def test_login_rehashes_outdated_cost(self, test_db):
+        """Test login upgrades a hash created with a different bcrypt cost"""
+        user = User(
+            id=secrets.token_urlsafe(16),
+            email="legacy@test.com",
+            name="Legacy User",
+            hashed_password=pwd_context.hash("password123", rounds=4),
+            role=UserRole.CLIENT,
+            initial_deposit=0
+        )
+        test_db.add(user)
+        test_db.commit()
+        
+        response = client.post(
+            "/auth/login",
+            json={"email": "legacy@test.com", "password": "password123"}
+        )
+        assert response.status_code == 200
+        
+        test_db.refresh(user)
+        assert user.hashed_password.startswith(f"$2b${security.settings.BCRYPT_ROUNDS:02d}$")
+        assert pwd_context.verify("password123", user.hashed_password)
@@ -0,0 +1,127 @@
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def add_trade(test_db, make_trade):
+    """Insert an open trade last written at `updated_at`; returns its id"""
+    def add(client_id, updated_at):
+        trade = make_trade(client_id, timestamp=updated_at, updated_at=updated_at)
+        test_db.add(trade)
+        test_db.commit()
+        return trade.id
+    
+    return add
+
+
+def changes(token, since=None, **params):
+    """Call GET /trades/changes and return the JSON body"""
+    if since is not None:
+        params["since"] = since
+    response = client.get("/trades/changes", params=params, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture
+def no_settle(monkeypatch):
+    """Let watermarks advance to the current time"""
+    monkeypatch.setattr(settings, "TRADE_CHANGES_SETTLE_MS", 0)
+
+
+class TestTradeChanges:
+    """Test GET /trades/changes"""
+    
+    def test_full_sync_then_delta(self, admin_token, client_user, test_db, no_settle, add_trade):
+        """Test a poll returns only trades updated or deleted since the watermark"""
+        old = int(time.time() * 1000) - 60000
+        first, second, third = (add_trade(client_user.id, old + i) for i in range(3))
+        
+        data = changes(admin_token)
+        assert [trade["id"] for trade in data["trades"]] == [first, second, third]
+        assert (data["deleted"], data["has_more"]) == ([], False)
+        
+        data = changes(admin_token, data["watermark"])
+        assert (data["trades"], data["deleted"]) == ([], [])
+        watermark = data["watermark"]
+        
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        time.sleep(0.002)
+        client.put(f"/trades/{first}", json={"notes": "trimmed"}, headers=headers)
+        client.delete(f"/trades/{third}", headers=headers)
+        time.sleep(0.002)
+        
+        data = changes(admin_token, watermark)
+        assert [trade["id"] for trade in data["trades"]] == [first]
+        assert data["trades"][0]["notes"] == "trimmed"
+        assert data["deleted"] == [third]
+    
+    def test_pagination(self, admin_token, client_user, test_db, no_settle, add_trade):
+        """Test a limited poll reports has_more and resumes after the last change"""
+        old = int(time.time() * 1000) - 60000
+        ids = [add_trade(client_user.id, old + i) for i in range(3)]
+        
+        page = changes(admin_token, limit=2)
+        assert [trade["id"] for trade in page["trades"]] == ids[:2]
+        assert page["has_more"]
+        
+        page = changes(admin_token, page["watermark"], limit=2)
+        assert [trade["id"] for trade in page["trades"]] == ids[2:]
+        assert not page["has_more"]
+    
+    def test_bulk_writes_are_tracked(self, admin_token, client_user, test_db, no_settle):
+        """Test Core bulk inserts and updates advance updated_at"""
+        watermark = changes(admin_token)["watermark"]
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        time.sleep(0.002)
+        created = client.post("/trades/bulk", json={"trades": [{
+            "client_id": client_user.id,
+            "coin_id": "bitcoin",
+            "coin_symbol": "BTC",
+            "entry_price": 100.0,
+            "quantity": 1.0
+        }]}, headers=headers).json()["results"][0]["trade"]
+        time.sleep(0.002)
+        
+        data = changes(admin_token, watermark)
+        assert [trade["id"] for trade in data["trades"]] == [created["id"]]
+        
+        time.sleep(0.002)
+        client.post("/trades/bulk-close", json={"trades": [
+            {"trade_id": created["id"], "exit_price": 110.0}
+        ]}, headers=headers)
+        time.sleep(0.002)
+        
+        data = changes(admin_token, data["watermark"])
+        assert [(trade["id"], trade["status"]) for trade in data["trades"]] == [(created["id"], "CLOSED")]
+    
+    def test_recent_changes_are_redelivered(self, admin_token, client_user, test_db, add_trade):
+        """Test the watermark trails the clock, so fresh changes show up again"""
+        trade_id = add_trade(client_user.id, int(time.time() * 1000))
+        
+        data = changes(admin_token)
+        assert [trade["id"] for trade in data["trades"]] == [trade_id]
+        data = changes(admin_token, data["watermark"])
+        assert [trade["id"] for trade in data["trades"]] == [trade_id]
+    
+    def test_client_sees_own_changes(self, client_token, client_user, admin_user, test_db, no_settle, add_trade):
+        """Test clients only receive their own trades and tombstones"""
+        old = int(time.time() * 1000) - 60000
+        own = add_trade(client_user.id, old)
+        add_trade(admin_user.id, old)
+        
+        data = changes(client_token, client_id=admin_user.id)
+        assert [trade["id"] for trade in data["trades"]] == [own]
+    
+    def test_invalid_watermark(self, admin_token):
+        """Test a malformed watermark is rejected"""
+        response = client.get(
+            "/trades/changes?since=not-a-cursor",
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert response.status_code == 400
@@ -0,0 +1,143 @@
+import asyncio
+import csv
+import io
+import json
+import time
+import tracemalloc
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.models.models import TradeStatus
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def add_trades(test_db, make_trade):
+    """Insert `count` trades for a client, entered at 45000.0 + i at now + i ms"""
+    def add(client_id, count, status=TradeStatus.OPEN):
+        now = int(time.time() * 1000)
+        test_db.add_all([
+            make_trade(client_id, entry_price=45000.0 + i, quantity=0.5, status=status, timestamp=now + i)
+            for i in range(count)
+        ])
+        test_db.commit()
+    
+    return add
+
+
+def export(token, **params):
+    response = client.get("/trades/export", params=params, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    return response
+
+
+def export_peak_memory(token, export_format):
+    """Run an export straight through the ASGI app, discarding the body; return (bytes sent, peak traced bytes)"""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "root_path": "",
+        "path": "/trades/export",
+        "raw_path": b"/trades/export",
+        "query_string": f"format={export_format}".encode(),
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    }
+    sent = 0
+    
+    async def receive():
+        # Streaming responses listen for a disconnect that never comes
+        await asyncio.Event().wait()
+    
+    async def send(message):
+        nonlocal sent
+        sent += len(message.get("body", b""))
+    
+    tracemalloc.start()
+    try:
+        asyncio.run(app(scope, receive, send))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return sent, peak
+
+
+class TestTradeExport:
+    """Test GET /trades/export"""
+    
+    def test_csv_export(self, admin_token, client_user, test_db, add_trades):
+        add_trades(client_user.id, 3)
+        response = export(admin_token)
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.headers["content-disposition"] == 'attachment; filename="trades.csv"'
+        
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 3
+        assert rows[0]["client_id"] == client_user.id
+        assert rows[0]["status"] == "OPEN"
+        assert rows[0]["type"] == "LONG"
+        assert rows[0]["exit_price"] == ""
+        # Newest first, like the trade list
+        assert [float(row["entry_price"]) for row in rows] == [45002.0, 45001.0, 45000.0]
+    
+    def test_ndjson_matches_trade_list(self, admin_token, client_user, test_db, add_trades):
+        add_trades(client_user.id, 5)
+        response = export(admin_token, format="ndjson")
+        assert response.headers["content-type"] == "application/x-ndjson"
+        
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        listed = client.get("/trades/", headers={"Authorization": f"Bearer {admin_token}"}).json()
+        assert rows == listed
+    
+    def test_empty_export_has_header_only(self, admin_token):
+        header = export(admin_token).text.strip().split(",")
+        assert header[:3] == ["client_id", "coin_id", "coin_symbol"]
+        assert header[-1] == "updated_at"
+        assert export(admin_token, format="ndjson").text == ""
+    
+    def test_filters_and_client_scoping(self, admin_token, client_token, client_user, admin_user, test_db, add_trades):
+        add_trades(client_user.id, 2)
+        add_trades(client_user.id, 1, status=TradeStatus.CLOSED)
+        add_trades(admin_user.id, 4)
+        
+        assert len(export(admin_token, format="ndjson").text.splitlines()) == 7
+        assert len(export(admin_token, format="ndjson", client_id=client_user.id).text.splitlines()) == 3
+        closed = export(admin_token, format="ndjson", status_filter="CLOSED").text.splitlines()
+        assert [json.loads(line)["status"] for line in closed] == ["CLOSED"]
+        
+        # Clients only ever see their own trades
+        rows = [json.loads(line) for line in export(client_token, format="ndjson", client_id=admin_user.id).text.splitlines()]
+        assert len(rows) == 3
+        assert {row["client_id"] for row in rows} == {client_user.id}
+    
+    def test_rejects_unknown_format(self, admin_token):
+        response = client.get(
+            "/trades/export", params={"format": "xlsx"}, headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert response.status_code == 422
+    
+    def test_requires_authentication(self):
+        assert client.get("/trades/export").status_code in (401, 403)
+
+
+class TestExportMemory:
+    """Test exports stream in constant memory"""
+    
+    def test_peak_memory_does_not_grow_with_rows(self, admin_token, client_user, test_db, monkeypatch, add_trades):
+        """Test ten times the rows needs no more memory, and far less than the body"""
+        monkeypatch.setattr(settings, "TRADES_EXPORT_BATCH_SIZE", 200)
+        add_trades(client_user.id, 2_000)
+        # First request warms up imports and caches
+        export_peak_memory(admin_token, "ndjson")
+        small = {export_format: export_peak_memory(admin_token, export_format) for export_format in ("ndjson", "csv")}
+        
+        add_trades(client_user.id, 18_000)
+        for export_format, (small_size, small_peak) in small.items():
+            size, peak = export_peak_memory(admin_token, export_format)
+            assert size > 5 * small_size
+            assert peak < small_peak * 2
+            assert peak < size / 4
@@ -317,6 +317,32 @@ class TestTradeEndpoints:
         )
         assert response.status_code == 400
     
+    def test_writes_lock_the_trade(self, admin_token, client_user, test_db, make_trade):
+        """Test update and close load the trade FOR UPDATE, so concurrent writes serialize"""
+        from sqlalchemy import event
+        from sqlalchemy.dialects import postgresql
+        from app.tests.conftest import async_engine
+        
+        trade = make_trade(client_user.id)
+        test_db.add(trade)
+        test_db.commit()
+        locked = []
+        
+        def record_locks(conn, clauseelement, multiparams, params, execution_options):
+            sql = str(clauseelement.compile(dialect=postgresql.dialect()))
+            if sql.startswith("SELECT trades.") and sql.endswith("FOR UPDATE"):
+                locked.append(sql)
+        
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        event.listen(async_engine.sync_engine, "before_execute", record_locks)
+        try:
+            assert client.put(f"/trades/{trade.id}", json={"take_profit": 150.0}, headers=headers).status_code == 200
+            assert len(locked) == 1
+            assert client.post(f"/trades/{trade.id}/close?exit_price=120.0", headers=headers).status_code == 200
+            assert len(locked) == 2
+        finally:
+            event.remove(async_engine.sync_engine, "before_execute", record_locks)
+    
     def test_delete_trade(self, admin_token, client_user, test_db):
         """Test deleting a trade"""
         from app.models.models import Trade, TradeStatus, TradeType
@@ -350,3 +376,66 @@ class TestTradeEndpoints:
             headers={"Authorization": f"Bearer {admin_token}"}
         )
         assert response.status_code == 404
+    
+    def test_get_trades_keyset_pagination(self, admin_token, client_user, test_db):
+        """Test walking trades page by page with cursors"""
+        from app.models.models import Trade, TradeStatus, TradeType
+        import secrets
+        
+        # Duplicate timestamps exercise the id tie-breaker
+        for i in range(7):
+            test_db.add(Trade(
+                id=secrets.token_urlsafe(16),
+                client_id=client_user.id,
+                coin_id="bitcoin",
+                coin_symbol="BTC",
+                entry_price=45000.0,
+                quantity=0.5,
+                type=TradeType.LONG,
+                status=TradeStatus.OPEN,
+                timestamp=1700000000000 + i // 2
+            ))
+        test_db.commit()
+        
+        full = client.get(
+            "/trades/",
+            headers={"Authorization": f"Bearer {admin_token}"}
+        ).json()
+        
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 3}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get(
+                "/trades/",
+                params=params,
+                headers={"Authorization": f"Bearer {admin_token}"}
+            )
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page["items"]) <= 3
+            seen.extend(t["id"] for t in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        
+        assert seen == [t["id"] for t in full]
+        assert len(seen) == 7
+    
+    def test_get_trades_invalid_cursor(self, admin_token):
+        """Test a malformed cursor is rejected"""
+        response = client.get(
+            "/trades/?cursor=not-a-cursor",
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert response.status_code == 400
+    
+    def test_get_trades_limit_bounds(self, admin_token):
+        """Test page size must be within bounds"""
+        response = client.get(
+            "/trades/?limit=0",
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert response.status_code == 422
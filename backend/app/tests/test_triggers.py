@@ -0,0 +1,256 @@
+import asyncio
+import random
+import time
+import pytest
+from app.models.models import Trade, TradeStatus, TradeType
+from app.services.triggers import TriggerEngine, TAKE_PROFIT, STOP_LOSS
+from app.core.config import settings
+from app.services.mark_to_market import apply_prices, mark_to_market
+from app.tests.conftest import AsyncTestingSessionLocal
+
+
+def random_trades(make_trade, rng, coins, count):
+    """Trades with take-profit/stop-loss on either side of a 100.0 entry"""
+    trades = []
+    for _ in range(count):
+        trade_type = rng.choice([TradeType.LONG, TradeType.SHORT])
+        above = rng.choice([None, rng.uniform(100.5, 140)])
+        below = rng.choice([None, rng.uniform(60, 99.5)])
+        if trade_type == TradeType.LONG:
+            take_profit, stop_loss = above, below
+        else:
+            take_profit, stop_loss = below, above
+        trades.append(make_trade("client", rng.choice(coins), type=trade_type, take_profit=take_profit, stop_loss=stop_loss))
+    return trades
+
+
+def price_series(rng, coins, steps):
+    """Synthetic random-walk ticks: list of (coin_id, price)"""
+    prices = {coin_id: 100.0 for coin_id in coins}
+    ticks = []
+    for _ in range(steps):
+        coin_id = rng.choice(coins)
+        prices[coin_id] = max(1.0, prices[coin_id] * (1 + rng.gauss(0, 0.03)))
+        ticks.append((coin_id, prices[coin_id]))
+    return ticks
+
+
+def replay(engine, ticks):
+    """Feed ticks through the engine, returning (step, trade_id, kind, price) per firing"""
+    events = []
+    for step, (coin_id, price) in enumerate(ticks):
+        for trigger in engine.on_tick(coin_id, price):
+            events.append((step, trigger.trade_id, trigger.kind, trigger.price))
+    return events
+
+
+def rescan_reference(trades, ticks):
+    """Naive reference: rescan every open trade on every tick"""
+    open_trades = {trade.id: trade for trade in trades}
+    events = []
+    for step, (coin_id, price) in enumerate(ticks):
+        for trade in list(open_trades.values()):
+            if trade.coin_id != coin_id:
+                continue
+            tp, sl = trade.take_profit, trade.stop_loss
+            if trade.type == TradeType.LONG:
+                kind = TAKE_PROFIT if tp is not None and price >= tp else STOP_LOSS if sl is not None and price <= sl else None
+            else:
+                kind = TAKE_PROFIT if tp is not None and price <= tp else STOP_LOSS if sl is not None and price >= sl else None
+            if kind:
+                events.append((step, trade.id, kind, price))
+                del open_trades[trade.id]
+    return events
+
+
+def normalize(events):
+    return sorted(events)
+
+
+class TestTriggerEngine:
+    """Replay synthetic price series through the take-profit / stop-loss engine"""
+    
+    def test_replay_matches_rescan(self, make_trade):
+        """Test the indexed engine fires exactly what a full rescan would"""
+        rng = random.Random(1234)
+        coins = ["bitcoin", "ethereum", "solana"]
+        trades = random_trades(make_trade, rng, coins, 600)
+        ticks = price_series(rng, coins, 2000)
+        
+        engine = TriggerEngine()
+        for trade in trades:
+            engine.upsert(trade)
+        
+        events = replay(engine, ticks)
+        assert events
+        assert normalize(events) == normalize(rescan_reference(trades, ticks))
+        # Every fired trade has left the index
+        fired_ids = {trade_id for _, trade_id, _, _ in events}
+        assert len(engine) == len([t for t in trades if t.take_profit or t.stop_loss]) - len(fired_ids)
+    
+    def test_replay_with_edits_and_removals(self, make_trade):
+        """Test re-levelled and removed trades follow their latest state"""
+        rng = random.Random(99)
+        coins = ["bitcoin", "ethereum"]
+        trades = random_trades(make_trade, rng, coins, 300)
+        ticks = price_series(rng, coins, 1000)
+        
+        engine = TriggerEngine()
+        for trade in trades:
+            engine.upsert(trade)
+        
+        # Remove a third of the trades and move the levels of another third
+        removed = trades[:100]
+        for trade in removed:
+            engine.discard(trade.id)
+        for trade in trades[100:200]:
+            if trade.take_profit is not None:
+                trade.take_profit = trade.take_profit * (1.05 if trade.type == TradeType.LONG else 0.95)
+            engine.upsert(trade)
+        
+        events = replay(engine, ticks)
+        assert normalize(events) == normalize(rescan_reference(trades[100:], ticks))
+    
+    def test_tick_only_visits_crossed_levels(self, make_trade):
+        """Test a tick that crosses nothing leaves the index untouched"""
+        engine = TriggerEngine()
+        engine.upsert(make_trade("client", type=TradeType.LONG, take_profit=110.0, stop_loss=90.0))
+        engine.upsert(make_trade("client", type=TradeType.SHORT, take_profit=90.0, stop_loss=110.0))
+        
+        assert engine.on_tick("bitcoin", 100.0) == []
+        assert engine.on_tick("ethereum", 1.0) == []
+        assert len(engine) == 2
+        
+        fired = engine.on_tick("bitcoin", 111.0)
+        assert sorted(t.kind for t in fired) == [STOP_LOSS, TAKE_PROFIT]
+        assert len(engine) == 0
+    
+    def test_process_ticks_closes_trades_in_batch(self, client_user, test_db, make_trade):
+        """Test triggered trades are closed at the tick price"""
+        long_tp = make_trade(client_user.id, type=TradeType.LONG, take_profit=110.0, stop_loss=90.0)
+        short_sl = make_trade(client_user.id, type=TradeType.SHORT, take_profit=90.0, stop_loss=105.0)
+        untouched = make_trade(client_user.id, type=TradeType.LONG, take_profit=150.0, stop_loss=50.0)
+        test_db.add_all([long_tp, short_sl, untouched])
+        test_db.commit()
+        
+        engine = TriggerEngine()
+        
+        async def run():
+            async with AsyncTestingSessionLocal() as db:
+                await engine.load(db)
+                fired = await engine.process_ticks(db, {"bitcoin": 112.0})
+                await db.commit()
+                return fired
+        
+        fired = asyncio.run(run())
+        assert {t.trade_id for t in fired} == {long_tp.id, short_sl.id}
+        
+        test_db.expire_all()
+        for trade in (long_tp, short_sl):
+            assert trade.status == TradeStatus.CLOSED
+            assert trade.exit_price == 112.0
+            assert trade.closed_at is not None
+        assert untouched.status == TradeStatus.OPEN
+    
+    def test_stale_index_does_not_close_relevelled_trade(self, client_user, test_db, make_trade):
+        """Test the database re-checks levels changed behind the engine's back"""
+        trade = make_trade(client_user.id, type=TradeType.LONG, take_profit=110.0, stop_loss=90.0)
+        test_db.add(trade)
+        test_db.commit()
+        
+        engine = TriggerEngine()
+        engine.upsert(trade)
+        test_db.query(Trade).filter(Trade.id == trade.id).update({"take_profit": 200.0})
+        test_db.commit()
+        
+        async def run():
+            async with AsyncTestingSessionLocal() as db:
+                await engine.process_ticks(db, {"bitcoin": 115.0})
+                await db.commit()
+        
+        asyncio.run(run())
+        test_db.expire_all()
+        assert trade.status == TradeStatus.OPEN
+    
+    def test_refresh_picks_up_trades_written_elsewhere(self, client_user, test_db, make_trade):
+        """Test trades created, re-levelled or deleted by another worker reach a loaded index"""
+        relevelled = make_trade(client_user.id, type=TradeType.LONG, take_profit=200.0, stop_loss=50.0)
+        deleted = make_trade(client_user.id, type=TradeType.LONG, take_profit=110.0, stop_loss=50.0)
+        test_db.add_all([relevelled, deleted])
+        test_db.commit()
+
+        engine = TriggerEngine()
+
+        async def tick(price):
+            async with AsyncTestingSessionLocal() as db:
+                await engine.refresh(db)
+                fired = await engine.process_ticks(db, {"bitcoin": price})
+                await db.commit()
+                return {t.trade_id for t in fired}
+
+        assert asyncio.run(tick(100.0)) == set()
+        assert engine.loaded and len(engine) == 2
+
+        # Written straight to the database, as another process would
+        inserted = make_trade(client_user.id, type=TradeType.LONG, take_profit=110.0, stop_loss=50.0)
+        test_db.add(inserted)
+        test_db.query(Trade).filter(Trade.id == relevelled.id).update({"take_profit": 110.0})
+        test_db.delete(deleted)
+        test_db.commit()
+
+        assert asyncio.run(tick(115.0)) == {inserted.id, relevelled.id}
+        test_db.expire_all()
+        assert inserted.status == TradeStatus.CLOSED
+        assert inserted.exit_price == 115.0
+        assert len(engine) == 0
+
+    def test_refresh_skips_repriced_trades(self, client_user, test_db, make_trade, monkeypatch):
+        """Test repricing open trades does not make the next refresh re-read them"""
+        test_db.add_all([make_trade(client_user.id) for _ in range(50)])
+        watched = make_trade(client_user.id, take_profit=110.0)
+        test_db.add(watched)
+        test_db.commit()
+        
+        engine = TriggerEngine()
+        upserted = []
+        
+        async def reprice_and_refresh(price):
+            async with AsyncTestingSessionLocal() as db:
+                await engine.refresh(db)
+                await apply_prices(db, {"bitcoin": price})
+                await db.commit()
+        
+        asyncio.run(reprice_and_refresh(101.0))
+        upsert = engine.upsert
+        monkeypatch.setattr(engine, "upsert", lambda trade: upserted.append(trade.id) or upsert(trade))
+        monkeypatch.setattr(settings, "TRADE_CHANGES_SETTLE_MS", 0)
+        time.sleep(0.002)
+        asyncio.run(reprice_and_refresh(102.0))
+        asyncio.run(reprice_and_refresh(103.0))
+        assert upserted == []
+        
+        # A level change is still picked up
+        test_db.query(Trade).filter(Trade.id == watched.id).first().take_profit = 120.0
+        test_db.commit()
+        asyncio.run(reprice_and_refresh(104.0))
+        assert upserted == [watched.id]
+        assert len(engine) == 1
+    
+    def test_mark_to_market_fires_triggers(self, client_user, test_db, price_stub, price_service, make_trade):
+        """Test the mark-to-market run feeds new quotes to the trigger engine"""
+        trade = make_trade(client_user.id, type=TradeType.LONG, take_profit=110.0, stop_loss=90.0)
+        test_db.add(trade)
+        test_db.commit()
+        price_stub.prices = {"bitcoin": 85.0}
+        
+        async def run():
+            async with AsyncTestingSessionLocal() as db:
+                return await mark_to_market(db, price_service, TriggerEngine())
+        
+        result = asyncio.run(run())
+        assert result.triggers_fired == 1
+        
+        test_db.expire_all()
+        assert trade.status == TradeStatus.CLOSED
+        assert trade.exit_price == 85.0
+        assert trade.current_price == 85.0
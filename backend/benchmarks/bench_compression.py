@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Response Compression Benchmark
+Reports bytes saved and CPU cost of CompressionMiddleware per response size
+class, for every encoding available in this environment (gzip always; br and
+zstd when the brotli / zstandard packages are installed).
+
+Bodies are trade lists shaped like GET /trades/ output, sent through the
+middleware as a single complete body. CPU time is process time per response,
+best of --rounds.
+
+Usage:
+    cd backend
+    python benchmarks/bench_compression.py [--rounds 5] [--gzip-level 6]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.compression import CompressionMiddleware, available_compressors  # noqa: E402
+from app.core.responses import ORJSONResponse  # noqa: E402
+
+# (label, trades in the list)
+SIZE_CLASSES = [("1 KB", 3), ("10 KB", 25), ("100 KB", 250), ("1 MB", 2500), ("10 MB", 25000)]
+
+
+def trade_list(count: int, rng: random.Random) -> ORJSONResponse:
+    """A response shaped like GET /trades/ with `count` trades"""
+    client_ids = [secrets.token_urlsafe(16) for _ in range(20)]
+    coins = [("bitcoin", "BTC"), ("ethereum", "ETH"), ("solana", "SOL"), ("cardano", "ADA")]
+    now = int(time.time() * 1000)
+    rows = []
+    for i in range(count):
+        coin_id, symbol = rng.choice(coins)
+        entry = round(rng.uniform(0.3, 60000), 2)
+        closed = i % 3 == 0
+        rows.append({
+            "client_id": rng.choice(client_ids),
+            "coin_id": coin_id,
+            "coin_symbol": symbol,
+            "entry_price": entry,
+            "quantity": round(rng.uniform(0.01, 10), 4),
+            "type": "LONG" if i % 2 else "SHORT",
+            "take_profit": round(entry * 1.2, 2) if i % 2 else None,
+            "stop_loss": round(entry * 0.8, 2) if i % 2 else None,
+            "notes": None,
+            "id": secrets.token_urlsafe(16),
+            "current_price": round(entry * rng.uniform(0.9, 1.1), 2),
+            "exit_price": round(entry * rng.uniform(0.9, 1.1), 2) if closed else None,
+            "status": "CLOSED" if closed else "OPEN",
+            "timestamp": now - i * 1000,
+            "closed_at": now if closed else None,
+            "updated_at": now
+        })
+    return ORJSONResponse(rows)
+
+
+async def compress_once(response, encoding: str, levels: dict) -> tuple:
+    """Send `response` through the middleware; return (CPU seconds, bytes on the wire)"""
+    middleware = CompressionMiddleware(response, minimum_size=0, encodings=[encoding], levels=levels)
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", encoding.encode())]}
+    sent = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal sent
+        sent += len(message.get("body", b""))
+
+    start = time.process_time()
+    await middleware(scope, receive, send)
+    return time.process_time() - start, sent
+
+
+async def run(args):
+    levels = {"gzip": args.gzip_level, "br": args.brotli_quality, "zstd": args.zstd_level}
+    encodings = list(available_compressors(levels))
+    rng = random.Random(11)
+    print(f"📊 Encodings available: {', '.join(encodings)} (levels {levels})")
+
+    print(f"\n{'size class':<11} {'encoding':<9} {'raw KB':>9} {'sent KB':>9} {'saved':>7} {'CPU ms':>8} {'MB/s':>7}")
+    for label, count in SIZE_CLASSES:
+        response = trade_list(count, rng)
+        raw = len(response.body)
+        for encoding in encodings:
+            best_cpu, sent = min([await compress_once(response, encoding, levels) for _ in range(args.rounds)])
+            print(
+                f"{label:<11} {encoding:<9} {raw / 1024:>9.1f} {sent / 1024:>9.1f} "
+                f"{(1 - sent / raw) * 100:>6.1f}% {best_cpu * 1000:>8.2f} {raw / max(best_cpu, 1e-9) / 1e6:>7.0f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5, help="repetitions per measurement (best is reported)")
+    parser.add_argument("--gzip-level", type=int, default=6)
+    parser.add_argument("--brotli-quality", type=int, default=4)
+    parser.add_argument("--zstd-level", type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
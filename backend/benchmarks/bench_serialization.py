@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Trade List Serialization Benchmark
+Measures the per-row cost of rendering a large trade list two ways:
+
+  response_model  ORM objects -> TradeResponse validation -> stdlib json
+                  (what FastAPI does for a `response_model` route)
+  orjson rows     column tuples -> dicts -> ORJSONResponse
+                  (the fast path GET /trades/ uses)
+
+Fetch and serialization are timed separately (best of --rounds) and the two
+bodies are checked to be byte-identical.
+
+Usage:
+    cd backend
+    python benchmarks/bench_serialization.py [--trades 10000] [--rounds 5]
+"""
+
+import argparse
+import os
+import random
+import secrets
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=10_000, help="trades in the list")
+    parser.add_argument("--rounds", type=int, default=5, help="timed repetitions (best is reported)")
+    return parser.parse_args()
+
+
+args = parse_args()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="cc-bench-"), "serialize.db")
+
+from typing import List  # noqa: E402
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from app.api.trades import TRADE_RESPONSE_COLUMNS  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.core.responses import ORJSONResponse, column_rows  # noqa: E402
+from app.models.models import Trade, TradeStatus, TradeType, User, UserRole  # noqa: E402
+from app.schemas.schemas import TradeResponse  # noqa: E402
+
+
+def seed(count: int):
+    """One client holding `count` mixed open and closed trades"""
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    now = int(time.time() * 1000)
+    with SessionLocal() as db:
+        client = User(
+            id=secrets.token_urlsafe(16),
+            email="client@bench.com",
+            name="Bench Client",
+            hashed_password="x",
+            role=UserRole.CLIENT,
+            initial_deposit=10000
+        )
+        db.add(client)
+        for i in range(count):
+            closed = i % 3 == 0
+            entry = rng.uniform(1, 60000)
+            db.add(Trade(
+                id=secrets.token_urlsafe(16),
+                client_id=client.id,
+                coin_id="bitcoin",
+                coin_symbol="BTC",
+                entry_price=entry,
+                current_price=entry * rng.uniform(0.9, 1.1),
+                exit_price=entry * rng.uniform(0.9, 1.1) if closed else None,
+                quantity=rng.uniform(0.01, 10),
+                take_profit=entry * 1.2 if i % 2 else None,
+                stop_loss=entry * 0.8 if i % 2 else None,
+                type=TradeType.LONG if i % 2 else TradeType.SHORT,
+                status=TradeStatus.CLOSED if closed else TradeStatus.OPEN,
+                notes="rebalance" if i % 5 == 0 else None,
+                timestamp=now - i,
+                closed_at=now if closed else None
+            ))
+        db.commit()
+
+
+def response_model_path(db):
+    trades = db.scalars(select(Trade).order_by(Trade.timestamp.desc(), Trade.id.desc())).all()
+    fetched = time.perf_counter()
+    adapter = TypeAdapter(List[TradeResponse])
+    body = JSONResponse(adapter.dump_python(adapter.validate_python(trades), mode="json")).body
+    return fetched, body
+
+
+def orjson_path(db):
+    rows = db.execute(
+        select(*TRADE_RESPONSE_COLUMNS).order_by(Trade.timestamp.desc(), Trade.id.desc())
+    ).all()
+    fetched = time.perf_counter()
+    body = ORJSONResponse(column_rows(TRADE_RESPONSE_COLUMNS, rows)).body
+    return fetched, body
+
+
+def measure(path):
+    """Best fetch and serialization times over the rounds, plus the body"""
+    best_fetch = best_serialize = float("inf")
+    for _ in range(args.rounds):
+        with SessionLocal() as db:
+            start = time.perf_counter()
+            fetched, body = path(db)
+            done = time.perf_counter()
+        best_fetch = min(best_fetch, fetched - start)
+        best_serialize = min(best_serialize, done - fetched)
+    return best_fetch, best_serialize, body
+
+
+def main():
+    print(f"📊 Seeding {args.trades} trades")
+    seed(args.trades)
+
+    results = {
+        "response_model": measure(response_model_path),
+        "orjson rows": measure(orjson_path),
+    }
+    bodies = {body for _, _, body in results.values()}
+    print(f"   bodies identical: {'yes' if len(bodies) == 1 else 'NO'} ({len(next(iter(bodies))) / 1024:.0f} KiB)")
+
+    print(f"\n{'path':<16} {'fetch ms':>9} {'serialize ms':>13} {'µs/row':>8}")
+    for label, (fetch, serialize, _) in results.items():
+        total = fetch + serialize
+        print(f"{label:<16} {fetch * 1000:>9.1f} {serialize * 1000:>13.1f} {total / args.trades * 1e6:>8.2f}")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Trade Index Benchmark
+Seeds a large trades table and reports query plans and latencies for the hot
+trade query shapes before and after the composite index migrations. The
+portfolio summary is measured as the API ran it at each revision: a scan of the
+client's trades at 0001, the version (ETag) query plus the maintained
+portfolio_aggregates totals at head.
+
+Runs against a throwaway SQLite file by default; pass --database-url to use
+an empty PostgreSQL database instead.
+
+Usage:
+    cd backend
+    python benchmarks/bench_trade_indexes.py [--trades 1000000] [--clients 1000]
+"""
+
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=1_000_000, help="number of trades to seed")
+    parser.add_argument("--clients", type=int, default=1000, help="number of clients trades are spread over")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per query")
+    parser.add_argument("--database-url", help="database to use (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+args = parse_args()
+os.environ["DATABASE_URL"] = args.database_url or (
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="cc-bench-"), "indexes.db")
+)
+
+import sqlalchemy as sa
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import func, insert, select, tuple_
+
+from app.core.database import engine
+from app.models.models import Trade, UserRole, TradeStatus, TradeType
+from app.services.portfolio import portfolio_aggregate_columns, portfolio_aggregates_query
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHUNK_SIZE = 50_000
+
+# The tables as revision 0001 created them; the ORM models carry columns
+# later migrations add
+users_0001 = sa.table(
+    "users",
+    sa.column("id"), sa.column("email"), sa.column("name"), sa.column("hashed_password"),
+    sa.column("role", sa.Enum(UserRole)), sa.column("initial_deposit"),
+)
+trades_0001 = sa.table(
+    "trades",
+    sa.column("id"), sa.column("client_id"), sa.column("coin_id"), sa.column("coin_symbol"),
+    sa.column("entry_price"), sa.column("current_price"), sa.column("exit_price"), sa.column("quantity"),
+    sa.column("take_profit"), sa.column("stop_loss"), sa.column("status", sa.Enum(TradeStatus)),
+    sa.column("type", sa.Enum(TradeType)), sa.column("notes"), sa.column("timestamp"), sa.column("closed_at"),
+)
+
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    return config
+
+
+def seed(trade_count: int, client_count: int):
+    """Bulk insert clients and trades in chunks"""
+    rng = random.Random(7)
+    client_ids = [f"client-{i:06d}" for i in range(client_count)]
+    now = int(time.time() * 1000)
+
+    with engine.begin() as conn:
+        conn.execute(insert(users_0001), [
+            {
+                "id": client_id,
+                "email": f"{client_id}@bench.com",
+                "name": client_id,
+                "hashed_password": "x",
+                "role": UserRole.CLIENT,
+                "initial_deposit": 10000.0,
+            }
+            for client_id in client_ids
+        ])
+
+        for start in range(0, trade_count, CHUNK_SIZE):
+            rows = []
+            for i in range(start, min(start + CHUNK_SIZE, trade_count)):
+                closed = rng.random() < 0.9
+                rows.append({
+                    "id": f"trade-{i:09d}",
+                    "client_id": rng.choice(client_ids),
+                    "coin_id": "bitcoin",
+                    "coin_symbol": "BTC",
+                    "entry_price": 40000.0,
+                    "current_price": 41000.0,
+                    "exit_price": 42000.0 if closed else None,
+                    "quantity": 0.1,
+                    "status": TradeStatus.CLOSED if closed else TradeStatus.OPEN,
+                    "type": TradeType.LONG,
+                    "timestamp": now - rng.randint(0, 365 * 24 * 3600 * 1000),
+                })
+            conn.execute(insert(trades_0001), rows)
+            print(f"  seeded {min(start + CHUNK_SIZE, trade_count):,} trades", end="\r")
+    print()
+    return client_ids
+
+
+def query_shapes(client_id: str, at_head: bool):
+    """The trade list and portfolio summary queries the API issues at revision 0001 or head"""
+    trades = Trade.__table__ if at_head else trades_0001
+    shapes = {
+        "trades by client+status": select(trades)
+            .where(trades.c.client_id == client_id, trades.c.status == TradeStatus.OPEN)
+            .order_by(trades.c.timestamp.desc(), trades.c.id.desc()),
+        "trades by client": select(trades)
+            .where(trades.c.client_id == client_id)
+            .order_by(trades.c.timestamp.desc(), trades.c.id.desc()),
+        "admin trades by status (first 100)": select(trades)
+            .where(trades.c.status == TradeStatus.OPEN)
+            .order_by(trades.c.timestamp.desc(), trades.c.id.desc())
+            .limit(100),
+        "admin trades (first 100)": select(trades)
+            .order_by(trades.c.timestamp.desc(), trades.c.id.desc())
+            .limit(100),
+        "admin keyset page (deep cursor)": select(trades)
+            .where(tuple_(trades.c.timestamp, trades.c.id) < tuple_(int(time.time() * 1000) - 180 * 24 * 3600 * 1000, ""))
+            .order_by(trades.c.timestamp.desc(), trades.c.id.desc())
+            .limit(100),
+    }
+    if at_head:
+        # GET /portfolio/{id}/summary: the ETag version, then the aggregates
+        shapes["portfolio summary version"] = select(func.count(), func.max(Trade.updated_at)) \
+            .where(Trade.client_id == client_id)
+        shapes["portfolio summary"] = portfolio_aggregates_query(client_id)
+    else:
+        shapes["portfolio summary"] = select(*portfolio_aggregate_columns()).where(Trade.client_id == client_id)
+    return shapes
+
+
+def explain(conn, statement) -> str:
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql).fetchall()
+        return "\n".join(f"    {row[-1]}" for row in rows)
+    rows = conn.exec_driver_sql("EXPLAIN " + sql).fetchall()
+    return "\n".join(f"    {row[0]}" for row in rows)
+
+
+def measure(label: str, client_ids, repeat: int, at_head: bool):
+    """Print the plan and latency percentiles for every query shape"""
+    rng = random.Random(11)
+    print(f"\n===== {label} =====")
+    with engine.connect() as conn:
+        for name, statement in query_shapes(client_ids[0], at_head).items():
+            print(f"\n  {name}")
+            print(explain(conn, statement))
+
+        print(f"\n  {'query':<38} {'p50 ms':>9} {'p95 ms':>9}")
+        for name in query_shapes(client_ids[0], at_head):
+            timings = []
+            for _ in range(repeat):
+                statement = query_shapes(rng.choice(client_ids), at_head)[name]
+                start = time.perf_counter()
+                conn.execute(statement).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            # Nearest rank: the smallest timing at or above 95% of the runs
+            p95 = timings[math.ceil(0.95 * len(timings)) - 1]
+            print(f"  {name:<38} {statistics.median(timings):>9.2f} {p95:>9.2f}")
+
+
+def main():
+    config = alembic_config()
+    print(f"📊 Database: {engine.url.render_as_string(hide_password=True)}")
+    command.upgrade(config, "0001")
+
+    print(f"📊 Seeding {args.trades:,} trades across {args.clients:,} clients...")
+    client_ids = seed(args.trades, args.clients)
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+    measure("before (revision 0001)", client_ids, args.repeat, at_head=False)
+
+    start = time.perf_counter()
+    command.upgrade(config, "head")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    print(f"\n📊 Index migration took {time.perf_counter() - start:.1f}s")
+
+    measure("after (revision head)", client_ids, args.repeat, at_head=True)
+
+
+if __name__ == "__main__":
+    main()
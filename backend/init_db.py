@@ -10,7 +10,10 @@ import os
 # Add the parent directory to the path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app.core.database import SessionLocal, engine, Base
+from alembic import command
+from alembic.config import Config
+
+from app.core.database import SessionLocal
 from app.models.models import User, UserRole
 from app.core.security import get_password_hash
 import secrets
@@ -22,10 +25,14 @@ def init_database():
     print("=" * 50)
     
     try:
-        # Create all tables
-        print("\n📊 Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        print("✓ Tables created successfully")
+        # Create or upgrade the tables through the migrations, so later
+        # `alembic upgrade head` runs (and their backfills) still apply
+        print("\n📊 Applying database migrations...")
+        backend_dir = os.path.dirname(os.path.abspath(__file__))
+        alembic_config = Config(os.path.join(backend_dir, "alembic.ini"))
+        alembic_config.set_main_option("script_location", os.path.join(backend_dir, "alembic"))
+        command.upgrade(alembic_config, "head")
+        print("✓ Migrations applied successfully")
         
         # Create session
         db = SessionLocal()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Mark-to-Market
+Pulls quotes for every coin with open trades, writes them to the trades'
+current_price and the price history, and closes trades whose take-profit or
+stop-loss the new quotes cross.
+
+Usage:
+    python mark_to_market.py [--interval SECONDS]
+    python mark_to_market.py --once
+
+Run exactly one instance next to the API (e.g. as its own service): several
+concurrent runs would each poll the price feed and reprice the same trades.
+By default it runs every MARK_TO_MARKET_INTERVAL_SECONDS until stopped;
+--once runs a single pass and exits, for cron. Give it the API's
+PROMETHEUS_MULTIPROC_DIR to report its runs on /metrics.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.services.mark_to_market import MarkToMarketWorker
+
+
+async def run(args) -> int:
+    worker = MarkToMarketWorker(interval=args.interval)
+    try:
+        if args.once:
+            result = await worker.run_once()
+            if result is None:
+                return 1
+            print(
+                f"✓ Marked {result.rows_updated} trades across {result.coins} coins "
+                f"in {result.duration:.2f}s, {result.triggers_fired} triggers fired"
+            )
+            return 0
+        print(f"📊 Marking open trades to market every {args.interval:g}s")
+        await worker.run_forever()
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--interval", type=float, default=settings.MARK_TO_MARKET_INTERVAL_SECONDS, help="seconds between runs"
+    )
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    args = parser.parse_args()
+
+    try:
+        sys.exit(asyncio.run(run(args)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Portfolio Aggregates Maintenance
+Rebuilds the portfolio_aggregates table from trades, or checks it for drift.
+
+Usage:
+    python portfolio_aggregates.py check [--client-id ID]
+    python portfolio_aggregates.py rebuild [--client-id ID]
+
+`check` exits with status 1 when stored aggregates disagree with a fresh
+recomputation from the trades table.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.services.portfolio_aggregates import check_portfolio_aggregates, rebuild_portfolio_aggregates
+
+
+async def check(client_id):
+    async with AsyncSessionLocal() as db:
+        mismatches = await check_portfolio_aggregates(db, client_id)
+
+    if not mismatches:
+        print("✅ Portfolio aggregates match the trades table")
+        return 0
+
+    print(f"❌ {len(mismatches)} mismatched aggregate fields:")
+    for mismatch in mismatches:
+        print(
+            f"  {mismatch.client_id} / {mismatch.coin_id}: {mismatch.field} "
+            f"stored={mismatch.stored} expected={mismatch.expected}"
+        )
+    print("\n💡 Run `python portfolio_aggregates.py rebuild` to recompute them")
+    return 1
+
+
+async def rebuild(client_id):
+    async with AsyncSessionLocal() as db:
+        rows = await rebuild_portfolio_aggregates(db, client_id)
+    print(f"✓ Rebuilt {rows} portfolio aggregate rows")
+    return 0
+
+
+async def run(args) -> int:
+    try:
+        command = check if args.command == "check" else rebuild
+        return await command(args.client_id)
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["check", "rebuild"])
+    parser.add_argument("--client-id", help="limit to one client")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Nightly Portfolio Snapshots
+Writes every client's portfolio summary for a UTC day to portfolio_snapshots,
+for statements, reports and charts.
+
+Usage:
+    python portfolio_snapshots.py [--day YYYY-MM-DD] [--chunk-size N] [--restart]
+
+Run it shortly after midnight UTC (e.g. `5 0 * * *` in cron). It snapshots
+the day that just ended: summaries are taken from the current trades and
+marks, so past days cannot be backfilled and --day only accepts yesterday
+(to pin a scheduled run to its day). Clients are processed in id order, one
+chunk per query and transaction, so an interrupted run picks up where it
+stopped when started again for the same day. --restart recomputes the day
+from the first client.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.services.portfolio_snapshots import last_completed_day, take_portfolio_snapshots
+
+
+def parse_day(value: str) -> int:
+    """YYYY-MM-DD as epoch ms of its UTC midnight"""
+    try:
+        day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid day '{value}', expected YYYY-MM-DD")
+    return int(day.timestamp() * 1000)
+
+
+def print_progress(progress):
+    print(
+        f"  {progress.clients} clients ({progress.clients_per_second:.0f}/s), "
+        f"last {progress.last_client_id}"
+    )
+
+
+async def run(args) -> int:
+    day = last_completed_day() if args.day is None else args.day
+    label = datetime.fromtimestamp(day / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+    print(f"📊 Snapshotting portfolios for {label}")
+    try:
+        progress = await take_portfolio_snapshots(day, args.chunk_size, args.restart, on_chunk=print_progress)
+    finally:
+        await async_engine.dispose()
+
+    print(
+        f"✓ Snapshotted {progress.clients} clients in {progress.seconds:.1f}s "
+        f"({progress.clients_per_second:.0f} clients/s)"
+    )
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--day", type=parse_day, help="UTC day to snapshot; must be yesterday")
+    parser.add_argument("--chunk-size", type=int, default=settings.PORTFOLIO_SNAPSHOT_CHUNK_SIZE, help="clients per query")
+    parser.add_argument("--restart", action="store_true", help="recompute the day from the first client")
+    args = parser.parse_args()
+    if args.day is not None and args.day != last_completed_day():
+        parser.error("--day must be the last completed UTC day: past days cannot be snapshotted")
+
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
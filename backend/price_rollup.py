@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Price History Rollup
+Rolls price_ticks up into 1m/1h/1d OHLC candles in price_candles.
+
+Usage:
+    python price_rollup.py [--interval SECONDS]
+    python price_rollup.py --once
+
+Run exactly one instance next to the API (e.g. as its own service): candle
+upserts from several concurrent rollups would race. By default it rolls up
+every PRICE_ROLLUP_INTERVAL_SECONDS until stopped; --once runs a single
+rollup and exits, for cron. Give it the API's PROMETHEUS_MULTIPROC_DIR to
+report its runs on /metrics.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.services.price_history import PriceRollupWorker
+
+
+async def run(args) -> int:
+    worker = PriceRollupWorker(interval=args.interval)
+    try:
+        if args.once:
+            written = await worker.run_once()
+            if written is None:
+                return 1
+            print(f"✓ Rolled up price candles: {written}")
+            return 0
+        print(f"📊 Rolling up price candles every {args.interval:g}s")
+        await worker.run_forever()
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--interval", type=float, default=settings.PRICE_ROLLUP_INTERVAL_SECONDS, help="seconds between rollups"
+    )
+    parser.add_argument("--once", action="store_true", help="run a single rollup and exit")
+    args = parser.parse_args()
+
+    try:
+        sys.exit(asyncio.run(run(args)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -152,6 +152,14 @@ export const portfolioAPI = {
     },
 };
 
+// Price APIs
+export const priceAPI = {
+    getPrices: async (ids: string[]) => {
+        const query = ids.length > 0 ? `?ids=${encodeURIComponent(ids.join(','))}` : '';
+        return apiRequest<Record<string, number>>(`/prices/${query}`, { method: 'GET' });
+    },
+};
+
 // Announcement APIs
 export const announcementAPI = {
     getAllAnnouncements: async () => {
@@ -198,6 +206,7 @@ export default {
     auth: authAPI,
     trade: tradeAPI,
     portfolio: portfolioAPI,
+    price: priceAPI,
     announcement: announcementAPI,
     healthCheck,
 };
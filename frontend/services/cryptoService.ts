@@ -1,5 +1,6 @@
 
 import { CoinPrice } from '../types';
+import { priceAPI } from './apiService';
 
 // CoinGecko API Configuration
 const COINGECKO_API_URL = import.meta.env.VITE_COINGECKO_API_URL || 'https://api.coingecko.com/api/v3';
@@ -25,35 +26,21 @@ const buildApiUrl = (endpoint: string, params: Record<string, string>): string =
 };
 
 /**
- * Fetch current prices for multiple cryptocurrencies
+ * Fetch current prices for multiple cryptocurrencies.
+ * Quotes come from the backend price oracle, which batches and caches
+ * CoinGecko requests for all clients.
  * @param ids - Array of CoinGecko coin IDs (e.g., ['bitcoin', 'ethereum'])
  * @returns Record of coin IDs to their current USD prices
  */
 export const fetchPrices = async (ids: string[]): Promise<Record<string, number>> => {
-  try {
-    const url = buildApiUrl('/simple/price', {
-      ids: ids.join(','),
-      vs_currencies: 'usd'
-    });
-
-    const response = await fetch(url);
-
-    if (!response.ok) {
-      throw new Error(`CoinGecko API error: ${response.status}`);
-    }
-
-    const data = await response.json();
+  const response = await priceAPI.getPrices(ids);
 
-    const prices: Record<string, number> = {};
-    Object.keys(data).forEach(id => {
-      prices[id] = data[id].usd;
-    });
-
-    return prices;
-  } catch (error) {
-    console.error('Error fetching crypto prices:', error);
+  if (response.error || !response.data) {
+    console.error('Error fetching crypto prices:', response.error);
     return {};
   }
+
+  return response.data;
 };
 
 /**